@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Measure WeakInstMeta instantiation under contention and on the miss/hit paths.
+
+Usage: PYTHONPATH=src python benchmarks/caching_contention.py [threads]
+"""
+
+import sys
+import threading
+import time
+import timeit
+
+from snakeoil.caching import native_WeakInstMeta
+
+
+def mk_class(delay=0):
+    class inst(object, metaclass=native_WeakInstMeta):
+        __inst_caching__ = True
+        constructed = 0
+
+        def __init__(self, *args):
+            self.__class__.constructed += 1
+            if delay:
+                time.sleep(delay)
+    return inst
+
+
+def contention(count, delay=0.01):
+    """request a single key from ``count`` threads at once"""
+    kls = mk_class(delay)
+    barrier = threading.Barrier(count)
+    refs = []
+
+    def run():
+        barrier.wait()
+        refs.append(kls(1))
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return kls.constructed, time.perf_counter() - start
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 64
+    constructed, elapsed = contention(count)
+    print("contention: %i threads, constructor ran %i times, %.3fs" % (
+        count, constructed, elapsed))
+
+    kls = mk_class()
+    number = 200000
+    # instances aren't kept alive, so every call misses
+    miss = timeit.timeit(lambda: kls(1), number=number)
+    o = kls(1)
+    hit = timeit.timeit(lambda: kls(1), number=number)
+    del o
+    print("miss: %.2fus" % (miss / number * 1e6))
+    print("hit:  %.2fus" % (hit / number * 1e6))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Compare demandload backends: startup time and first access latency.
+
+Each measurement runs in a fresh interpreter with the backend selected via
+SNAKEOIL_DEMANDLOAD_BACKEND.
+
+Usage: PYTHONPATH=src python benchmarks/demandload.py [runs]
+"""
+
+import os
+import subprocess
+import sys
+
+BACKENDS = ('placeholder', 'lazyloader')
+
+# import a handful of modules with demandloaded targets
+STARTUP = """
+from time import perf_counter
+start = perf_counter()
+import snakeoil.cli.arghparse, snakeoil.fileutils, snakeoil.osutils
+import snakeoil.process.spawn
+print(perf_counter() - start)
+"""
+
+# first attribute access of a demandloaded (unloaded) package
+FIRST_ACCESS = """
+from time import perf_counter
+from snakeoil.demandload import demandload
+demandload('email')
+start = perf_counter()
+email.message_from_string
+print(perf_counter() - start)
+"""
+
+
+def measure(backend, code, runs):
+    env = dict(os.environ, SNAKEOIL_DEMANDLOAD_BACKEND=backend)
+    results = []
+    for _ in range(runs):
+        out = subprocess.check_output([sys.executable, '-c', code], env=env)
+        results.append(float(out))
+    results.sort()
+    # median
+    return results[len(results) // 2]
+
+
+def main(argv):
+    runs = int(argv[0]) if argv else 15
+    print("%-12s %12s %16s" % ("backend", "startup (ms)", "first access (us)"))
+    for backend in BACKENDS:
+        print("%-12s %12.1f %16.0f" % (
+            backend,
+            measure(backend, STARTUP, runs) * 1e3,
+            measure(backend, FIRST_ACCESS, runs) * 1e6))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Compare SlottedDict instances against plain dicts: size, len() and setitem.
+
+Usage: PYTHONPATH=src python benchmarks/slotted_dict.py [keys]
+"""
+
+import sys
+import timeit
+
+from snakeoil.mappings import make_SlottedDict_kls
+
+
+def main(argv):
+    sizes = [int(argv[0])] if argv else [3, 100, 1000]
+    number = 100000
+    print("%5s  %-8s %10s %10s %14s" % (
+        "keys", "type", "size (B)", "len (ns)", "setitem (ns)"))
+    for size in sizes:
+        items = [('key%i' % (x,), x) for x in range(size)]
+        key = items[-1][0]
+        kls = make_SlottedDict_kls(k for k, _ in items)
+        for name, d in (('dict', dict(items)), ('slotted', kls(items))):
+            length = timeit.timeit(lambda: len(d), number=number)
+            setitem = timeit.timeit(
+                lambda: d.__setitem__(key, 1), number=number)
+            print("%5i  %-8s %10i %10.0f %14.0f" % (
+                size, name, sys.getsizeof(d),
+                length / number * 1e9, setitem / number * 1e9))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
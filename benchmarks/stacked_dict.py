@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Compare StackedDict and IndexedStackedDict lookups and key iteration.
+
+Usage: PYTHONPATH=src python benchmarks/stacked_dict.py [keys per layer]
+"""
+
+import sys
+import timeit
+
+from snakeoil.mappings import IndexedStackedDict, StackedDict, VersionedDict
+
+
+def main(argv):
+    width = int(argv[0]) if argv else 50
+    number = 20000
+    print("%5s  %-22s %-22s" % ("depth", "lookup (us)", "list(keys) (us)"))
+    for depth in (2, 10, 20):
+        layers = [
+            VersionedDict(('%i-%i' % (layer, x), x) for x in range(width))
+            for layer in range(depth)]
+        # a key only provided by the last layer
+        key = '%i-0' % (depth - 1,)
+        results = []
+        for kls in (StackedDict, IndexedStackedDict):
+            d = kls(*layers)
+            results.append((
+                timeit.timeit(lambda: d[key], number=number) / number * 1e6,
+                timeit.timeit(lambda: list(d.keys()), number=number // 10)
+                / (number // 10) * 1e6))
+        print("%5i  %-22s %-22s" % (
+            depth,
+            "%.2f / %.2f" % (results[0][0], results[1][0]),
+            "%.1f / %.1f" % (results[0][1], results[1][1])))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -18,6 +18,10 @@
 static PyObject *snakeoil_equality_attr = NULL;
 static PyObject *snakeoil__orig_attr = NULL;
 static PyObject *snakeoil__new_attr = NULL;
+static PyObject *snakeoil_value_attr = NULL;
+/* tags (marker, generation, value) tuples stored by generational jit attrs */
+static PyObject *snakeoil_generation_marker = NULL;
+static PyObject *snakeoil_jit_attr_single_flight = NULL;
 
 
 /* Note since the redirect target is a tuple of strings, we don't do
@@ -229,8 +233,10 @@ typedef struct {
 	PyObject *function;
 	PyObject *singleton;
 	PyObject *doc;
+	PyObject *generation;
 	int use_setattr;
 	int use_singleton;
+	int locking;
 } snakeoil_InternalJitAttr;
 
 static PyMemberDef snakeoil_InternalJitAttr_members[] = {
@@ -241,6 +247,8 @@ static PyMemberDef snakeoil_InternalJitAttr_members[] = {
 	{"singleton", T_OBJECT_EX, offsetof(snakeoil_InternalJitAttr, singleton),
 		READONLY, "singleton value to look for if regeneration is needed, or if unset"},
 	{"__doc__", T_OBJECT, offsetof(snakeoil_InternalJitAttr,doc), READONLY},
+	{"generation", T_OBJECT, offsetof(snakeoil_InternalJitAttr, generation),
+		READONLY, "Generation invalidating cached values, or None"},
 	{NULL}
 };
 
@@ -251,6 +259,7 @@ snakeoil_InternalJitAttr_clear(snakeoil_InternalJitAttr *self)
 	Py_CLEAR(self->function);
 	Py_CLEAR(self->singleton);
 	Py_CLEAR(self->doc);
+	Py_CLEAR(self->generation);
 	return 0;
 }
 static void
@@ -266,17 +275,19 @@ snakeoil_InternalJitAttr_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 	snakeoil_InternalJitAttr *self;
 	PyObject *attr = NULL, *func = NULL, *singleton = NULL,
 		*use_setattr_obj = NULL, *use_singleton_obj = NULL,
-		*doc = NULL;
+		*doc = NULL, *generation = Py_None, *locking_obj = NULL;
 
 	int use_setattr = 0;
 	int use_singleton = 1;
+	int locking = 0;
 
 	static char *kwlist[] = {"func", "attr_name", "singleton", "use_cls_setattr",
-		"use_singleton", "doc", NULL};
+		"use_singleton", "doc", "generation", "locking", NULL};
 
-	if (!PyArg_ParseTupleAndKeywords(args, kwds, "OS|OOOO:__new__",
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "OS|OOOOOO:__new__",
 		kwlist,
-		&func, &attr, &singleton, &use_setattr_obj, &use_singleton_obj, &doc))
+		&func, &attr, &singleton, &use_setattr_obj, &use_singleton_obj, &doc,
+		&generation, &locking_obj))
 		return NULL;
 
 	if (use_setattr_obj) {
@@ -291,6 +302,22 @@ snakeoil_InternalJitAttr_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 		}
 	}
 
+	if (locking_obj) {
+		if (-1 == (locking = PyObject_IsTrue(locking_obj))) {
+			return NULL;
+		}
+	}
+
+	if (generation != Py_None && !use_singleton) {
+		PyErr_SetString(PyExc_ValueError, "generation requires use_singleton");
+		return NULL;
+	}
+
+	if (locking && !use_singleton) {
+		PyErr_SetString(PyExc_ValueError, "locking requires use_singleton");
+		return NULL;
+	}
+
 	if (doc == NULL || doc == Py_None) {
 		// Steal the doc from the func now.
 		doc = PyObject_GetAttrString(func, "__doc__");
@@ -310,8 +337,11 @@ snakeoil_InternalJitAttr_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 		self->singleton = singleton;
 		self->use_setattr = use_setattr;
 		self->use_singleton = use_singleton;
+		self->locking = locking;
 		Py_INCREF(doc);
 		self->doc = doc;
+		Py_INCREF(generation);
+		self->generation = generation;
 	}
 	return (PyObject *)self;
 }
@@ -322,58 +352,174 @@ snakeoil_InternalJitAttr_traverse(snakeoil_InternalJitAttr *self,
 {
 	Py_VISIT(self->function);
 	Py_VISIT(self->singleton);
+	Py_VISIT(self->generation);
 	return 0;
 }
 
-static PyObject *
-snakeoil_InternalJitAttr_get(PyObject *self_pyo, PyObject *obj,
-	PyObject *type)
+static int
+snakeoil_InternalJitAttr_store(snakeoil_InternalJitAttr *self, PyObject *obj,
+	PyObject *value)
 {
-	PyObject *result = NULL;
-	snakeoil_InternalJitAttr *self = (snakeoil_InternalJitAttr *)self_pyo;
-	// mimic property behaviour.
-	if (!obj || obj == Py_None) {
-		Py_INCREF(self_pyo);
-		return self_pyo;
+	if (self->use_setattr) {
+		return PyObject_SetAttr(obj, self->storage_attr, value);
 	}
+	return PyObject_GenericSetAttr(obj, self->storage_attr, value);
+}
 
-	if (self->use_singleton) {
-		if (Py_EnterRecursiveCall(" in InternalJitAttr.__get__ "))
-			return NULL;
+/* Returns a new reference to the cached value, or NULL without an exception
+ * set if it needs to be generated.
+ */
+static PyObject *
+snakeoil_InternalJitAttr_cached(snakeoil_InternalJitAttr *self, PyObject *obj,
+	PyObject *generation)
+{
+	PyObject *cached, *result = NULL;
+	int match = 0;
 
-		result = PyObject_GetAttr(obj, self->storage_attr);
+	if (Py_EnterRecursiveCall(" in InternalJitAttr.__get__ "))
+		return NULL;
 
-		Py_LeaveRecursiveCall();
+	cached = PyObject_GetAttr(obj, self->storage_attr);
 
-		if (!result) {
-			if (!PyErr_ExceptionMatches(PyExc_AttributeError)) {
-				return result;
-			}
+	Py_LeaveRecursiveCall();
+
+	if (!cached) {
+		if (PyErr_ExceptionMatches(PyExc_AttributeError)) {
 			PyErr_Clear();
-		} else if (self->singleton != result) {
-			return result;
-		} else {
-			// got the singleton back...
-			Py_DECREF(result);
 		}
+		return NULL;
+	}
+
+	if (!generation) {
+		if (self->singleton != cached) {
+			return cached;
+		}
+		// got the singleton back...
+		Py_DECREF(cached);
+		return NULL;
 	}
 
-	// generate the attr.
+	if (PyTuple_CheckExact(cached) && PyTuple_GET_SIZE(cached) == 3 &&
+		PyTuple_GET_ITEM(cached, 0) == snakeoil_generation_marker) {
+		match = PyObject_RichCompareBool(
+			PyTuple_GET_ITEM(cached, 1), generation, Py_EQ);
+	}
+	if (match == 1) {
+		result = PyTuple_GET_ITEM(cached, 2);
+		Py_INCREF(result);
+	}
+	Py_DECREF(cached);
+	return result;
+}
+
+static PyObject *
+snakeoil_InternalJitAttr_generate(snakeoil_InternalJitAttr *self, PyObject *obj,
+	PyObject *generation)
+{
+	PyObject *result, *stored;
+
 	result = PyObject_CallFunctionObjArgs(self->function, obj, NULL);
-	if (result) {
-		if (self->use_setattr) {
-			if (-1 == PyObject_SetAttr(obj, self->storage_attr, result)) {
-				Py_CLEAR(result);
-			}
-		} else {
-			if (-1 == PyObject_GenericSetAttr(obj, self->storage_attr, result)) {
-				Py_CLEAR(result);
-			}
+	if (!result)
+		return NULL;
+
+	if (generation) {
+		// tag the value with the generation it was generated in.
+		if (!(stored = PyTuple_Pack(3, snakeoil_generation_marker, generation, result))) {
+			Py_DECREF(result);
+			return NULL;
 		}
+	} else {
+		Py_INCREF(result);
+		stored = result;
 	}
+	if (-1 == snakeoil_InternalJitAttr_store(self, obj, stored)) {
+		Py_CLEAR(result);
+	}
+	Py_DECREF(stored);
 	return result;
 }
 
+static PyObject *
+snakeoil_InternalJitAttr_single_flight(snakeoil_InternalJitAttr *self,
+	PyObject *obj, PyObject *type)
+{
+	PyObject *unlocked, *result;
+
+	if (!snakeoil_jit_attr_single_flight) {
+		// loaded lazily since snakeoil.klass imports this module.
+		snakeoil_LOAD_SINGLE_ATTR2(snakeoil_jit_attr_single_flight,
+			"snakeoil.klass", "_jit_attr_single_flight", return NULL);
+	}
+
+	unlocked = PyObject_GetAttrString((PyObject *)self->ob_type, "_unlocked_get");
+	if (!unlocked)
+		return NULL;
+
+	result = PyObject_CallFunctionObjArgs(snakeoil_jit_attr_single_flight,
+		(PyObject *)self, obj, type ? type : Py_None, unlocked, NULL);
+	Py_DECREF(unlocked);
+	return result;
+}
+
+static PyObject *
+snakeoil_InternalJitAttr_lookup(snakeoil_InternalJitAttr *self, PyObject *obj,
+	PyObject *type, int locking)
+{
+	PyObject *generation = NULL, *result = NULL;
+
+	if (self->generation != Py_None) {
+		if (!(generation = PyObject_GetAttr(self->generation, snakeoil_value_attr)))
+			return NULL;
+	}
+
+	if (self->use_singleton) {
+		result = snakeoil_InternalJitAttr_cached(self, obj, generation);
+		if (result || PyErr_Occurred())
+			goto finished;
+	}
+
+	// generate the attr.
+	if (locking) {
+		result = snakeoil_InternalJitAttr_single_flight(self, obj, type);
+	} else {
+		result = snakeoil_InternalJitAttr_generate(self, obj, generation);
+	}
+
+finished:
+	Py_XDECREF(generation);
+	return result;
+}
+
+static PyObject *
+snakeoil_InternalJitAttr_get(PyObject *self_pyo, PyObject *obj,
+	PyObject *type)
+{
+	snakeoil_InternalJitAttr *self = (snakeoil_InternalJitAttr *)self_pyo;
+	// mimic property behaviour.
+	if (!obj || obj == Py_None) {
+		Py_INCREF(self_pyo);
+		return self_pyo;
+	}
+	return snakeoil_InternalJitAttr_lookup(self, obj, type, self->locking);
+}
+
+static PyObject *
+snakeoil_InternalJitAttr_unlocked_get(snakeoil_InternalJitAttr *self,
+	PyObject *args)
+{
+	PyObject *obj, *type = NULL;
+
+	if (!PyArg_ParseTuple(args, "O|O:_unlocked_get", &obj, &type))
+		return NULL;
+	return snakeoil_InternalJitAttr_lookup(self, obj, type, 0);
+}
+
+static PyMethodDef snakeoil_InternalJitAttr_methods[] = {
+	{"_unlocked_get", (PyCFunction)snakeoil_InternalJitAttr_unlocked_get,
+		METH_VARARGS, "__get__ bypassing locking; used for single flight generation"},
+	{NULL}
+};
+
 
 static PyTypeObject snakeoil_InternalJitAttrType = {
 	PyObject_HEAD_INIT(NULL)
@@ -405,7 +551,7 @@ static PyTypeObject snakeoil_InternalJitAttrType = {
 	0,											   /* tp_weaklistoffset */
 	0,											   /* tp_iter */
 	0,											   /* tp_iternext */
-	0,											   /* tp_methods */
+	snakeoil_InternalJitAttr_methods,			   /* tp_methods */
 	snakeoil_InternalJitAttr_members,			   /* tp_members */
 	0,											   /* tp_getset */
 	0,											   /* tp_base */
@@ -1405,6 +1551,14 @@ init_klass(void)
 	snakeoil_LOAD_STRING(snakeoil_equality_attr, "__attr_comparison__");
 	snakeoil_LOAD_STRING(snakeoil__orig_attr, "_orig");
 	snakeoil_LOAD_STRING(snakeoil__new_attr, "_new");
+	snakeoil_LOAD_STRING(snakeoil_value_attr, "value");
+
+	if (!snakeoil_generation_marker) {
+		snakeoil_generation_marker = PyObject_CallObject(
+			(PyObject *)&PyBaseObject_Type, NULL);
+		if (!snakeoil_generation_marker)
+			return;
+	}
 
 
 #define ADD_TYPE_INSTANCE(type_ptr, name)				\
@@ -0,0 +1,83 @@
+# distutils: language = c
+# cython: language_level = 3
+
+"""Native instance caching support for :py:mod:`snakeoil.caching`."""
+
+cimport cython
+
+
+@cython.final
+cdef class signature_key:
+    """Map invocation args to a canonical caching key for a bound signature.
+
+    See :py:func:`snakeoil.caching._signature_key_func`; returns None if the
+    args don't bind against the signature.
+    """
+
+    cdef tuple pos_names, pos_defaults, kwonly_names, kwonly_defaults
+    cdef frozenset pos_keywords, known
+    cdef bint var_positional, var_keyword, kwonly_required
+    cdef Py_ssize_t npos, nrequired
+    cdef object empty
+
+    def __init__(self, tuple pos_names, frozenset pos_keywords, tuple pos_defaults,
+                 tuple kwonly_names, tuple kwonly_defaults, frozenset known,
+                 bint var_positional, bint var_keyword, empty):
+        self.pos_names = pos_names
+        self.pos_keywords = pos_keywords
+        self.pos_defaults = pos_defaults
+        self.kwonly_names = kwonly_names
+        self.kwonly_defaults = kwonly_defaults
+        self.known = known
+        self.var_positional = var_positional
+        self.var_keyword = var_keyword
+        self.empty = empty
+        self.npos = len(pos_names)
+        # defaults for positional args are always trailing
+        self.nrequired = sum(default is empty for default in pos_defaults)
+        self.kwonly_required = any(default is empty for default in kwonly_defaults)
+
+    def __call__(self, tuple a, dict kw):
+        cdef Py_ssize_t i, nargs = len(a)
+        cdef list values
+        if nargs > self.npos and not self.var_positional:
+            return None
+        if not kw:
+            # fast path; no keyword args to sort out
+            if nargs < self.nrequired or self.kwonly_required:
+                return None
+            if nargs < self.npos:
+                a = a + self.pos_defaults[nargs:]
+            if self.kwonly_names:
+                a = a + self.kwonly_defaults
+            if self.var_keyword:
+                a = a + ((),)
+            return a
+
+        for i in range(min(nargs, self.npos)):
+            name = self.pos_names[i]
+            if name in kw and name in self.pos_keywords:
+                # multiple values for the same arg
+                return None
+        values = list(a)
+        for i in range(nargs, self.npos):
+            name = self.pos_names[i]
+            if name in self.pos_keywords and name in kw:
+                values.append(kw[name])
+            else:
+                default = self.pos_defaults[i]
+                if default is self.empty:
+                    return None
+                values.append(default)
+        for i in range(len(self.kwonly_names)):
+            val = kw.get(self.kwonly_names[i], self.kwonly_defaults[i])
+            if val is self.empty:
+                return None
+            values.append(val)
+        if self.var_keyword:
+            extra = [(k, v) for k, v in kw.items() if k not in self.known]
+            extra.sort()
+            values.append(tuple(extra))
+        elif not self.known.issuperset(kw):
+            return None
+        return tuple(values)
@@ -0,0 +1,88 @@
+# distutils: language = c
+# cython: language_level = 3
+
+"""Native refcounting support for :py:mod:`snakeoil.containers`."""
+
+cimport cython
+from cpython.dict cimport PyDict_DelItem, PyDict_GetItemWithError, PyDict_SetItem
+from cpython.object cimport PyObject
+
+from collections import Counter
+from collections.abc import Mapping
+
+
+cdef inline int _incr(d, item) except -1:
+    cdef PyObject *count = PyDict_GetItemWithError(d, item)
+    if count is NULL:
+        return PyDict_SetItem(d, item, 1)
+    return PyDict_SetItem(d, item, <object>count + 1)
+
+
+cdef inline int _add(d, item, n) except -1:
+    cdef PyObject *count = PyDict_GetItemWithError(d, item)
+    if count is NULL:
+        return PyDict_SetItem(d, item, n)
+    return PyDict_SetItem(d, item, <object>count + n)
+
+
+cdef inline int _remove(d, item, n) except -1:
+    cdef PyObject *count = PyDict_GetItemWithError(d, item)
+    if count is NULL:
+        raise KeyError(item)
+    remaining = <object>count - n
+    if remaining:
+        return PyDict_SetItem(d, item, remaining)
+    return PyDict_DelItem(d, item)
+
+
+cdef _tally(items):
+    if isinstance(items, Mapping):
+        counts = dict(items)
+        for count in counts.values():
+            if count < 0:
+                raise ValueError("negative count: %r" % (count,))
+        return counts
+    # Counter tallies iterables in C, hashing each item once
+    return Counter(items)
+
+
+@cython.auto_pickle(False)
+cdef class RefCountingSetBase(dict):
+    """dict subclass implementing the refcounting add/remove operations."""
+
+    def add(self, item):
+        _incr(self, item)
+
+    def remove(self, item):
+        _remove(self, item, 1)
+
+    def update_many(self, items):
+        """Add items in bulk.
+
+        :param items: iterable of items to add, or mapping of items to the
+            number of times to add them
+        """
+        for item, n in _tally(items).items():
+            if n:
+                _add(self, item, n)
+
+    def remove_many(self, items):
+        """Remove items in bulk.
+
+        Either all of the removals are applied or, if any item isn't present
+        enough times, none of them are.
+
+        :param items: iterable of items to remove, or mapping of items to the
+            number of times to remove them
+        :raises KeyError: if an item isn't present enough times
+        """
+        cdef PyObject *count
+        counts = _tally(items)
+        for item, n in counts.items():
+            if n:
+                count = PyDict_GetItemWithError(self, item)
+                if count is NULL or <object>count < n:
+                    raise KeyError(item)
+        for item, n in counts.items():
+            if n:
+                _remove(self, item, n)
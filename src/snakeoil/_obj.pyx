@@ -0,0 +1,48 @@
+# distutils: language = c
+# cython: language_level = 3
+
+"""Native proxy base and method forwarding for :py:mod:`snakeoil.obj`."""
+
+
+cdef class DelayedObjectBase:
+    """Proxy base storing the proxied object in a C level slot.
+
+    Once the proxied object is set, attribute access is forwarded directly
+    to it without any python level dispatch.
+    """
+
+    cdef public object __obj__
+
+    def __getattribute__(self, attr):
+        obj = self.__obj__
+        if obj is None:
+            if attr == '__class__':
+                return object.__getattribute__(self, '__delayed__')[0]
+            elif attr == '__doc__':
+                kls = object.__getattribute__(self, '__delayed__')[0]
+                return getattr(kls, '__doc__', None)
+            obj = object.__getattribute__(self, '__instantiate_proxy_instance__')()
+
+        if attr == '__obj__':
+            # special casing for klass.alias_method
+            return obj
+        return getattr(obj, attr)
+
+
+cdef class forward_method:
+    """Descriptor forwarding method lookups to the object a proxy wraps."""
+
+    cdef readonly str name
+    cdef readonly object __doc__
+
+    def __init__(self, str name, doc=None):
+        self.name = name
+        self.__doc__ = doc
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        obj = (<DelayedObjectBase?>instance).__obj__
+        if obj is None:
+            obj = getattr(instance, '__obj__')
+        return getattr(obj, self.name)
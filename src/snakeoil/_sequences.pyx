@@ -63,3 +63,94 @@ def iflatten_func(l, skip_func):
             store.append(current)
         else:
             yield x
+
+def flatten_to_list(l, skip_flattening=_str_kls):
+    """collapse [[1],2] into [1,2], returning a list
+
+    :param skip_flattening: list of classes to not descend through
+    :return: list of items that cannot be flattened (or are skipped due to
+        being a instance of ``skip_flattening``)
+    """
+    cdef list store, flattened
+    if isinstance(l, skip_flattening):
+        return [l]
+    flattened = []
+    store = [iter(l)]
+    while store:
+        for x in store[-1]:
+            if (hasattr(x, '__iter__')
+                    and not isinstance(x, skip_flattening)
+                    # prevent infinite descend in case of single characters
+                    and not (isinstance(x, _str_kls) and len(x) == 1)):
+                store.append(iter(x))
+                break
+            flattened.append(x)
+        else:
+            store.pop()
+    return flattened
+
+def namedtuple_new(cls, *values):
+    """Create a namedtuple instance from its field values."""
+    return tuple.__new__(cls, values)
+
+from cpython.object cimport PyObject
+from cpython.ref cimport Py_DECREF, Py_INCREF
+
+
+cdef extern from "Python.h":
+    void PyUnicode_InternInPlace(PyObject **p)
+
+
+cdef inline str _intern(str s):
+    cdef PyObject *p = <PyObject *>s
+    # PyUnicode_InternInPlace() consumes the reference held by p and
+    # replaces it with one to the interned string
+    Py_INCREF(s)
+    PyUnicode_InternInPlace(&p)
+    interned = <str>p
+    Py_DECREF(interned)
+    return interned
+
+
+cdef list _tokenize(s, sep):
+    if isinstance(s, bytes):
+        s = s.decode()
+    if sep is None:
+        return s.split()
+    return [x for x in s.split(sep) if x]
+
+
+cdef tuple _apply(list l, func):
+    if func is None:
+        return tuple(l)
+    return tuple([x for x in map(func, l) if x is not None])
+
+
+def split_negations_string(s, func=None, sep=None):
+    """Split a delimited string into interned negative and positive elements."""
+    cdef list neg = [], pos = []
+    cdef str token
+    for token in _tokenize(s, sep):
+        if token[0] == u'-':
+            if len(token) == 1:
+                raise ValueError("'-' negation without a token")
+            neg.append(_intern(token[1:]))
+        else:
+            pos.append(_intern(token))
+    return _apply(neg, func), _apply(pos, func)
+
+
+def split_elements_string(s, func=None, sep=None):
+    """Split a delimited string into interned negative, neutral, and positive elements."""
+    cdef list neg = [], neu = [], pos = []
+    cdef str token
+    cdef Py_UCS4 c
+    for token in _tokenize(s, sep):
+        c = token[0]
+        if c == u'-' or c == u'+':
+            if len(token) == 1:
+                raise ValueError('%r without a token' % (token,))
+            (neg if c == u'-' else pos).append(_intern(token[1:]))
+        else:
+            neu.append(_intern(token))
+    return _apply(neg, func), _apply(neu, func), _apply(pos, func)
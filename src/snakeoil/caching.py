@@ -17,12 +17,17 @@ There are some caveats to be aware of in using this metaclass:
 * The implementation doesn't guarantee that it'll always reuse an instance- if the
   args/keywords aren't hashable, this machinery cannot cache the instance.  If the
   invocation of the class differs in positional vs optional arg invocation, it's
-  possible to get back a new instance.
+  possible to get back a new instance unless the class sets
+  ``__inst_normalize_args__ = True``, in which case args are bound against the
+  signature of ``__init__`` (filling in defaults) to generate the caching key.
 * In short, if you're generating a lot of immutable instances and want to
   automatically share instances to lower your memory footprint, WeakInstMeta is
   a good metaclass to use.
 * This is weakref caching of instances- it will not force an instance to stay in
-  memory, it will only reuse instances that are already in memory.
+  memory, it will only reuse instances that are already in memory.  If that's
+  not enough (objects that are repeatedly built, dropped, and rebuilt), a class
+  can additionally set ``__inst_lru_size__`` to hold strong references to the
+  most recently used instances; see :py:class:`StrongRefLRU`.
 
 
 Simple usage example:
@@ -54,17 +59,272 @@ Simple usage example:
 >>> del o
 >>> assert my_count != myfoo(1, 2).counter # a new instance is created
 
+Bounded strong reference caching example:
+
+>>> class mybar(object):
+...   __metaclass__ = WeakInstMeta
+...   __inst_caching__ = True
+...   __inst_lru_size__ = 100 # keep the 100 most recently used instances alive
+...   __inst_lru_ttl__ = 60 # ... for at most 60 seconds since their last use
+...
+...   def __init__(self, arg):
+...     self.arg = arg
+>>>
+>>> o = mybar(1)
+>>> my_id = id(o)
+>>> del o
+>>> assert id(mybar(1)) == my_id # still held by the LRU, thus reused
+>>> assert mybar.__inst_lru__.hits == 1
+
+To determine whether caching is paying off, statistics (hit rates, live
+instance counts and their memory usage per class, along with computation counts
+and times for :py:func:`snakeoil.klass.jit_attr` style attributes) can be
+collected via :py:func:`enable_stats` and reported via :py:func:`dump_stats`.
+Setting ``SNAKEOIL_CACHE_STATS=y`` in the environment enables collection at
+import, dumping a report to stderr at exit.  Alternatively, run a script or
+module under ``python -m snakeoil.caching [-o FILE] [-m] TARGET [ARGS]`` to
+get the report once it finishes.
+
 """
 
-__all__ = ("WeakInstMeta",)
+__all__ = (
+    "WeakInstMeta", "StrongRefLRU",
+    "memoize", "memoize_method", "LRUCache", "LFUCache",
+    "enable_stats", "disable_stats", "reset_stats", "get_stats", "dump_stats",
+)
+
+from collections import OrderedDict
+from functools import partial, wraps
+import os
+from threading import Lock, get_ident
+from time import monotonic
+from weakref import WeakKeyDictionary, WeakSet, WeakValueDictionary
 
 from .demandload import demandload
 demandload(
+    'argparse',
+    'atexit',
+    'inspect',
+    'runpy',
+    'sys',
     'warnings',
-    'weakref:WeakValueDictionary',
 )
 
 
+class StrongRefLRU(object):
+    """
+    bounded strong reference cache layered over a WeakInstMeta ``__inst_dict__``
+
+    Holds strong references to the most recently used instances of a class so
+    they aren't collected (and then rebuilt) as soon as the last external
+    reference goes away.  Entries can optionally expire ``ttl`` seconds after
+    their last use.
+
+    The hits, misses, and evictions attributes count instance reuse, instance
+    construction, and strong references dropped due to size or ttl limits
+    respectively.  Instantiations bypassing the cache (unhashable args, or
+    disable_inst_caching=True) aren't counted; see :py:func:`enable_stats`
+    for tracking unhashable args.
+    """
+
+    __slots__ = ("maxsize", "ttl", "hits", "misses", "evictions", "_entries")
+
+    def __init__(self, maxsize, ttl=None):
+        """
+        :param maxsize: maximum number of instances to hold strong references to
+        :param ttl: if not None, seconds after their last use that entries expire
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive, got %r" % (maxsize,))
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive, got %r" % (ttl,))
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = self.misses = self.evictions = 0
+        # key -> (instance, expiration time), ordered from least to most recently used
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def touch(self, key, instance):
+        """mark ``instance`` stored under ``key`` as the most recently used entry"""
+        entries = self._entries
+        if self.ttl is None:
+            entries[key] = (instance, None)
+            entries.move_to_end(key)
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+                self.evictions += 1
+            return
+
+        now = monotonic()
+        entries[key] = (instance, now + self.ttl)
+        entries.move_to_end(key)
+        # entries are ordered by last use, thus by expiration as well
+        while len(entries) > self.maxsize or next(iter(entries.values()))[1] <= now:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """drop all held references, leaving the counters intact"""
+        self._entries.clear()
+
+    def stats(self):
+        """
+        :return: dict mapping counter names (and the current size) to their values
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+
+# Instance caching statistics; collection is disabled by default and costs
+# nothing in that state since enabling it swaps in instrumented objects.
+
+_stats_enabled = False
+# all classes with instance caching enabled
+_caching_classes = WeakSet()
+# class -> [hits, misses, unhashable keys]
+_inst_stats = WeakKeyDictionary()
+# jit attr descriptor -> [computations, cumulative compute time]
+_jit_attr_stats = WeakKeyDictionary()
+# callables invoked with a boolean when stats collection is toggled
+_stats_toggles = []
+
+
+class _StatsWeakValueDictionary(WeakValueDictionary):
+    """WeakValueDictionary counting lookup results for caching statistics"""
+
+    def __init__(self, counters, *args):
+        self._counters = counters
+        super().__init__(*args)
+
+    def get(self, key, default=None):
+        try:
+            instance = super().get(key, default)
+        except (NotImplementedError, TypeError):
+            self._counters[2] += 1
+            raise
+        self._counters[0 if instance is not default else 1] += 1
+        return instance
+
+
+def _instrument_class(kls):
+    counters = _inst_stats.setdefault(kls, [0, 0, 0])
+    with kls.__inst_lock__:
+        kls.__inst_dict__ = _StatsWeakValueDictionary(counters, kls.__inst_dict__)
+
+
+def enable_stats():
+    """start collecting instance caching and jit attribute statistics"""
+    global _stats_enabled
+    if _stats_enabled:
+        return
+    _stats_enabled = True
+    for kls in list(_caching_classes):
+        _instrument_class(kls)
+    for toggle in _stats_toggles:
+        toggle(True)
+
+
+def disable_stats():
+    """stop collecting statistics; already collected data is kept"""
+    global _stats_enabled
+    if not _stats_enabled:
+        return
+    _stats_enabled = False
+    for kls in list(_caching_classes):
+        with kls.__inst_lock__:
+            kls.__inst_dict__ = WeakValueDictionary(kls.__inst_dict__)
+    for toggle in _stats_toggles:
+        toggle(False)
+
+
+def reset_stats():
+    """zero all collected statistics"""
+    for counters in _inst_stats.values():
+        counters[:] = [0, 0, 0]
+    _jit_attr_stats.clear()
+
+
+def _kls_name(kls):
+    return "%s.%s" % (kls.__module__, getattr(kls, '__qualname__', kls.__name__))
+
+
+def _instance_size(obj):
+    # shallow; attribute values are frequently shared between instances
+    size = sys.getsizeof(obj)
+    d = getattr(obj, '__dict__', None)
+    if d is not None:
+        size += sys.getsizeof(d)
+    return size
+
+
+def get_stats():
+    """
+    :return: dict with ``classes`` and ``jit_attrs`` keys.  ``classes`` maps
+        class names to dicts of hits, misses, unhashable (keys that fell back
+        to uncached instantiation), live (instances currently in the cache)
+        counts, and memory (shallow size in bytes of the live instances);
+        ``jit_attrs`` maps descriptor names to dicts of computations and time
+        (cumulative seconds spent computing) values.
+    """
+    classes = {}
+    for kls in list(_caching_classes):
+        hits, misses, unhashable = _inst_stats.get(kls, (0, 0, 0))
+        live = list(kls.__inst_dict__.values())
+        classes[_kls_name(kls)] = {
+            "hits": hits,
+            "misses": misses,
+            "unhashable": unhashable,
+            "live": len(live),
+            "memory": sum(map(_instance_size, live)),
+        }
+    jit_attrs = {}
+    for descriptor, (computations, elapsed) in list(_jit_attr_stats.items()):
+        func = descriptor.function
+        name = "%s.%s" % (
+            getattr(func, '__module__', None),
+            getattr(func, '__qualname__', descriptor.storage_attr))
+        stats = jit_attrs.setdefault(name, {"computations": 0, "time": 0.0})
+        stats["computations"] += computations
+        stats["time"] += elapsed
+    return {"classes": classes, "jit_attrs": jit_attrs}
+
+
+def dump_stats(out=None):
+    """
+    write a human readable report of the collected statistics
+
+    :param out: file object to write to, defaults to stderr
+    """
+    if out is None:
+        out = sys.stderr
+    stats = get_stats()
+    out.write("instance caching:\n")
+    out.write("  %8s %8s %8s %10s %10s %6s  %s\n" % (
+        "hits", "misses", "live", "memory", "unhashable", "rate", "class"))
+    for name, d in sorted(stats["classes"].items(),
+                          key=lambda x: (-(x[1]["hits"] + x[1]["misses"]), x[0])):
+        lookups = d["hits"] + d["misses"]
+        rate = "%.1f%%" % (100.0 * d["hits"] / lookups) if lookups else "-"
+        out.write("  %8i %8i %8i %10i %10i %6s  %s\n" % (
+            d["hits"], d["misses"], d["live"], d["memory"], d["unhashable"],
+            rate, name))
+    out.write("jit attributes:\n")
+    out.write("  %12s %12s  %s\n" % ("computations", "seconds", "attribute"))
+    for name, d in sorted(stats["jit_attrs"].items(),
+                          key=lambda x: (-x[1]["time"], x[0])):
+        out.write("  %12i %12.6f  %s\n" % (d["computations"], d["time"], name))
+
+
 class native_WeakInstMeta(type):
     """
     metaclass for instance caching, resulting in reuse of unique instances
@@ -80,6 +340,16 @@ class native_WeakInstMeta(type):
         I{do not enable caching for this class}
       - instance caching can be disabled per instantiation via passing
         disabling_inst_caching=True into the class constructor.
+      - setting __inst_lru_size__ (and optionally __inst_lru_ttl__) adds a
+        per class :py:class:`StrongRefLRU` as __inst_lru__, keeping recently
+        used instances alive.
+      - concurrent instantiations of the same caching key are collapsed; one
+        thread runs the constructor while the others wait and reuse its
+        result.
+      - setting __inst_normalize_args__ = True makes the caching key
+        independent of whether args were passed positionally or via keyword,
+        or left to their defaults.  Note that this requires __init__'s
+        signature to fully describe what is accepted.
 
     Being a metaclass, the voodoo used doesn't require modification of
     the class itself.
@@ -102,16 +372,40 @@ class native_WeakInstMeta(type):
                     break
             else:
                 d['__slots__'] = tuple(slots) + ('__weakref__',)
-        return type.__new__(cls, name, bases, d)
+        kls = type.__new__(cls, name, bases, d)
+        if kls.__inst_caching__:
+            kls.__inst_lock__ = Lock()
+            # caching key -> _InFlight for instantiations in progress
+            kls.__inst_inflight__ = {}
+            _caching_classes.add(kls)
+            if _stats_enabled:
+                _instrument_class(kls)
+            # note the following settings are inheritable, thus are pulled
+            # from the class rather than its namespace
+            lru_size = getattr(kls, "__inst_lru_size__", None)
+            if lru_size:
+                kls.__inst_lru__ = StrongRefLRU(
+                    lru_size, getattr(kls, "__inst_lru_ttl__", None))
+            else:
+                kls.__inst_lru__ = None
+            if getattr(kls, "__inst_normalize_args__", False):
+                kls.__inst_key_func__ = _signature_key_func(kls.__init__)
+            else:
+                kls.__inst_key_func__ = None
+        return kls
 
     def __call__(cls, *a, **kw):
         """disable caching via disable_inst_caching=True"""
         if cls.__inst_caching__ and not kw.pop("disable_inst_caching", False):
-            kwlist = list(kw.items())
-            kwlist.sort()
-            key = (a, tuple(kwlist))
+            key_func = cls.__inst_key_func__
+            if key_func is None:
+                kwlist = list(kw.items())
+                kwlist.sort()
+                key = (a, tuple(kwlist))
+            else:
+                key = key_func(a, kw)
             try:
-                instance = cls.__inst_dict__.get(key)
+                instance = None if key is None else cls.__inst_dict__.get(key)
             except (NotImplementedError, TypeError) as t:
                 warnings.warn(
                     "caching keys for %s, got %s for a=%s, kw=%s" % (
@@ -119,16 +413,545 @@ class native_WeakInstMeta(type):
                 del t
                 key = instance = None
 
-            if instance is None:
+            if key is None:
                 instance = super(native_WeakInstMeta, cls).__call__(*a, **kw)
-
-                if key is not None:
-                    cls.__inst_dict__[key] = instance
+            elif instance is None:
+                instance = cls._single_flight_call(key, a, kw)
+            elif cls.__inst_lru__ is not None:
+                with cls.__inst_lock__:
+                    cls.__inst_lru__.hits += 1
+                    cls.__inst_lru__.touch(key, instance)
         else:
             instance = super(native_WeakInstMeta, cls).__call__(*a, **kw)
 
         return instance
 
+    def _single_flight_call(cls, key, a, kw):
+        """
+        instantiate and cache an instance for a key that missed the cache
+
+        Concurrent misses for the same key are collapsed; the first thread
+        constructs the instance while the others wait for and reuse its
+        result (or retry if construction failed).  If waiting would deadlock
+        (the key is being built further up this thread's own stack, or by a
+        thread that is itself waiting on a key this thread is building) the
+        instance is constructed without caching instead.
+
+        All shared state is guarded by explicit locks rather than the GIL.
+        """
+        lock = cls.__inst_lock__
+        inflight = cls.__inst_inflight__
+        lru = cls.__inst_lru__
+        while True:
+            with lock:
+                # bypass any stats instrumentation; this lookup was already counted
+                instance = WeakValueDictionary.get(cls.__inst_dict__, key)
+                if instance is not None:
+                    if lru is not None:
+                        lru.hits += 1
+                        lru.touch(key, instance)
+                    return instance
+                flight = inflight.get(key)
+                if flight is None:
+                    flight = inflight[key] = _InFlight()
+                    break
+            if not _wait_for_flight(flight):
+                # waiting would deadlock, so don't cache.
+                return super(native_WeakInstMeta, cls).__call__(*a, **kw)
+            instance = flight.instance
+            if instance is not None:
+                if lru is not None:
+                    with lock:
+                        lru.hits += 1
+                        lru.touch(key, instance)
+                return instance
+
+        try:
+            instance = super(native_WeakInstMeta, cls).__call__(*a, **kw)
+        except BaseException:
+            with lock:
+                del inflight[key]
+            flight.lock.release()
+            raise
+        flight.instance = instance
+        with lock:
+            cls.__inst_dict__[key] = instance
+            del inflight[key]
+            if lru is not None:
+                lru.misses += 1
+                lru.touch(key, instance)
+        flight.lock.release()
+        return instance
+
+
+# thread ident -> _InFlight the thread is blocked on
+_flight_waits = {}
+_flight_waits_lock = Lock()
+
+
+def _wait_for_flight(flight):
+    """
+    block until the builder of a flight has finished
+
+    :return: False without waiting if waiting would deadlock, True otherwise
+    """
+    ident = get_ident()
+    with _flight_waits_lock:
+        # follow the chain of builders waiting on other flights; if it leads
+        # back to us, the builder can't finish until we do.
+        owner = flight.owner
+        while owner != ident:
+            blocker = _flight_waits.get(owner)
+            if blocker is None:
+                break
+            owner = blocker.owner
+        else:
+            return False
+        _flight_waits[ident] = flight
+    try:
+        with flight.lock:
+            pass
+    finally:
+        with _flight_waits_lock:
+            del _flight_waits[ident]
+    return True
+
+
+class _InFlight(object):
+    """in progress instantiation for a WeakInstMeta caching key"""
+
+    __slots__ = ("owner", "lock", "instance")
+
+    def __init__(self):
+        self.owner = get_ident()
+        # held by the building thread until instantiation is finished
+        self.lock = Lock()
+        self.lock.acquire()
+        self.instance = None
+
+
+def _signature_key_func(init):
+    """
+    generate a function mapping (args, kwargs) to a canonical caching key
+
+    The signature of ``init`` is inspected once; the returned function binds
+    invocation args against it, filling in defaults so that positional and
+    keyword invocations of the same arguments map to the same key.  If the
+    args don't bind, None is returned so the constructor can raise the
+    appropriate error.
+    """
+    params = list(inspect.signature(init).parameters.values())[1:]
+    P = inspect.Parameter
+    positional = tuple(
+        p for p in params if p.kind in (P.POSITIONAL_ONLY, P.POSITIONAL_OR_KEYWORD))
+    kwonly = tuple(p for p in params if p.kind == P.KEYWORD_ONLY)
+    # positional only args can't be passed via keyword; their names are
+    # allowed to land in **kwargs if it exists.
+    pos_keywords = frozenset(
+        p.name for p in positional if p.kind == P.POSITIONAL_OR_KEYWORD)
+    kwonly_names = tuple(p.name for p in kwonly)
+    return _signature_key(
+        pos_names=tuple(p.name for p in positional),
+        pos_keywords=pos_keywords,
+        pos_defaults=tuple(p.default for p in positional),
+        kwonly_names=kwonly_names,
+        kwonly_defaults=tuple(p.default for p in kwonly),
+        known=pos_keywords.union(kwonly_names),
+        var_positional=any(p.kind == P.VAR_POSITIONAL for p in params),
+        var_keyword=any(p.kind == P.VAR_KEYWORD for p in params),
+        empty=P.empty)
+
+
+def _native_signature_key(pos_names, pos_keywords, pos_defaults, kwonly_names,
+                          kwonly_defaults, known, var_positional, var_keyword,
+                          empty):
+    """build the key function for a signature; see :py:func:`_signature_key_func`"""
+    npos = len(pos_names)
+    # defaults for positional args are always trailing
+    nrequired = sum(default is empty for default in pos_defaults)
+    kwonly_required = any(default is empty for default in kwonly_defaults)
+
+    def key_func(a, kw):
+        nargs = len(a)
+        if nargs > npos and not var_positional:
+            return None
+        if not kw:
+            # fast path; no keyword args to sort out
+            if nargs < nrequired or kwonly_required:
+                return None
+            values = a + pos_defaults[nargs:] if nargs < npos else a
+            if kwonly_names:
+                values += kwonly_defaults
+            if var_keyword:
+                values += ((),)
+            return values
+
+        values = list(a)
+        for name in pos_names[:nargs]:
+            if name in kw and name in pos_keywords:
+                # multiple values for the same arg
+                return None
+        for name, default in zip(pos_names[nargs:], pos_defaults[nargs:]):
+            if name in pos_keywords and name in kw:
+                values.append(kw[name])
+            elif default is empty:
+                return None
+            else:
+                values.append(default)
+        for name, default in zip(kwonly_names, kwonly_defaults):
+            val = kw.get(name, default)
+            if val is empty:
+                return None
+            values.append(val)
+        if var_keyword:
+            extra = [(k, v) for k, v in kw.items() if k not in known]
+            extra.sort()
+            values.append(tuple(extra))
+        elif not known.issuperset(kw):
+            return None
+        return tuple(values)
+
+    return key_func
+
+
+try:
+    from ._caching import signature_key as _signature_key
+except ImportError:
+    _signature_key = _native_signature_key
+
+
+class _BoundedCache(object):
+    """common functionality for the memoization caches"""
+
+    __slots__ = ("maxsize", "hits", "misses", "evictions", "_lock")
+
+    def __init__(self, maxsize):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive, got %r" % (maxsize,))
+        self.maxsize = maxsize
+        self.hits = self.misses = self.evictions = 0
+        self._lock = Lock()
+
+    def stats(self):
+        """
+        :return: dict mapping counter names (and the current size) to their values
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self),
+        }
+
+
+class LRUCache(_BoundedCache):
+    """
+    memoization cache evicting the least recently used entries
+
+    If ``weigher`` is passed, ``maxsize`` bounds the summed weights of the
+    cached values rather than the number of entries.
+    """
+
+    __slots__ = ("weigher", "weight", "_entries")
+
+    def __init__(self, maxsize, weigher=None):
+        """
+        :param maxsize: maximum number of entries, or maximum summed weight
+            if ``weigher`` is passed
+        :param weigher: if not None, callable returning the weight of a value
+        """
+        super().__init__(maxsize)
+        self.weigher = weigher
+        self.weight = 0
+        # key -> (value, weight)
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key, default=None):
+        """return the value cached for ``key``, ``default`` if it's missing"""
+        with self._lock:
+            try:
+                value = self._entries[key][0]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def store(self, key, value):
+        """cache ``value`` for ``key``, evicting entries as necessary"""
+        weight = 1 if self.weigher is None else self.weigher(value)
+        if weight > self.maxsize:
+            # would flush the entire cache and still not fit; drop any stale
+            # value cached for the key instead
+            self.invalidate(key)
+            return
+        with self._lock:
+            entries = self._entries
+            old = entries.pop(key, None)
+            if old is not None:
+                self.weight -= old[1]
+            entries[key] = (value, weight)
+            self.weight += weight
+            while self.weight > self.maxsize:
+                self.weight -= entries.popitem(last=False)[1][1]
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """drop ``key`` if it's cached"""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.weight -= old[1]
+
+    def clear(self):
+        """drop all entries, leaving the counters intact"""
+        with self._lock:
+            self._entries.clear()
+            self.weight = 0
+
+
+class LFUCache(_BoundedCache):
+    """memoization cache evicting the least frequently used entries
+
+    Ties are broken by evicting the least recently used entry.  All
+    operations are O(1).
+    """
+
+    __slots__ = ("_entries", "_freqs", "_min_freq")
+
+    def __init__(self, maxsize):
+        """
+        :param maxsize: maximum number of entries
+        """
+        super().__init__(maxsize)
+        # key -> [value, use count]
+        self._entries = {}
+        # use count -> keys with that count, least recently used first
+        self._freqs = {}
+        self._min_freq = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _bump(self, key, entry):
+        freq = entry[1]
+        keys = self._freqs[freq]
+        del keys[key]
+        if not keys:
+            del self._freqs[freq]
+            if self._min_freq == freq:
+                self._min_freq = freq + 1
+        entry[1] = freq + 1
+        self._freqs.setdefault(freq + 1, OrderedDict())[key] = None
+
+    def lookup(self, key, default=None):
+        """return the value cached for ``key``, ``default`` if it's missing"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._bump(key, entry)
+            self.hits += 1
+            return entry[0]
+
+    def store(self, key, value):
+        """cache ``value`` for ``key``, evicting entries as necessary"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[0] = value
+                self._bump(key, entry)
+                return
+            if len(self._entries) >= self.maxsize:
+                keys = self._freqs[self._min_freq]
+                evicted = keys.popitem(last=False)[0]
+                if not keys:
+                    del self._freqs[self._min_freq]
+                del self._entries[evicted]
+                self.evictions += 1
+            self._entries[key] = [value, 1]
+            self._freqs.setdefault(1, OrderedDict())[key] = None
+            self._min_freq = 1
+
+    def invalidate(self, key):
+        """drop ``key`` if it's cached"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                keys = self._freqs[entry[1]]
+                del keys[key]
+                if not keys:
+                    del self._freqs[entry[1]]
+                    if self._freqs and self._min_freq == entry[1]:
+                        self._min_freq = min(self._freqs)
+
+    def clear(self):
+        """drop all entries, leaving the counters intact"""
+        with self._lock:
+            self._entries.clear()
+            self._freqs.clear()
+            self._min_freq = 0
+
+
+_cache_policies = {
+    "lru": LRUCache,
+    "lfu": LFUCache,
+}
+
+# separates positional from keyword args in generated keys
+_kwd_mark = object()
+_missing = object()
+
+
+def _make_key(a, kw):
+    if not kw:
+        return a
+    kwlist = list(kw.items())
+    kwlist.sort()
+    return a + (_kwd_mark,) + tuple(kwlist)
+
+
+def memoize(func=None, maxsize=128, policy="lru", key=None, weigher=None,
+            weak_keys=False):
+    """
+    decorator caching a function's results in a bounded cache
+
+    Unlike :py:func:`snakeoil.klass.jit_attr` and friends, nothing is stored
+    on the arguments themselves, so this works for methods of classes using
+    ``__slots__`` or :py:func:`snakeoil.klass.immutable_instance`.
+
+    The wrapper exposes ``cache_clear()``, ``cache_invalidate(*a, **kw)``
+    (dropping the result for the given args), and ``cache_stats()``.
+
+    :param maxsize: maximum number of cached results, or the maximum summed
+        weight of the cached results if ``weigher`` is passed
+    :param policy: eviction policy, either "lru" or "lfu"
+    :param key: if not None, callable invoked with the function's args
+        returning the key to cache the result under
+    :param weigher: if not None, callable returning the weight of a result;
+        only supported by the lru policy
+    :param weak_keys: if True, results are cached per first argument (self
+        for methods), each with their own bounded cache that is discarded
+        when that argument is garbage collected.  Any ``key`` function must
+        not return it (else it's kept alive).  If the first argument doesn't
+        support weak references (or there isn't one), results are cached in
+        a shared cache keyed on it instead, holding it until evicted.
+
+    >>> from snakeoil.caching import memoize
+    >>> @memoize(maxsize=2)
+    ... def double(x):
+    ...   print("invoked")
+    ...   return x * 2
+    >>> double(2)
+    invoked
+    4
+    >>> double(2)
+    4
+    """
+    if func is None:
+        return partial(
+            memoize, maxsize=maxsize, policy=policy, key=key, weigher=weigher,
+            weak_keys=weak_keys)
+
+    try:
+        policy_kls = _cache_policies[policy]
+    except KeyError:
+        raise ValueError("unknown memoization policy: %r" % (policy,))
+    if weigher is not None:
+        if policy != "lru":
+            raise ValueError("weigher is only supported by the lru policy")
+        cache_factory = lambda: policy_kls(maxsize, weigher=weigher)
+    else:
+        cache_factory = lambda: policy_kls(maxsize)
+    if key is not None:
+        key_func = lambda a, kw: key(*a, **kw)
+    elif weak_keys:
+        # the first arg is implied by the cache used; it must not be part of
+        # the key, else the cache would keep it alive.
+        key_func = lambda a, kw: _make_key(a[1:], kw)
+    else:
+        key_func = _make_key
+
+    if not weak_keys:
+        cache = cache_factory()
+        caches = lambda: (cache,)
+        get_cache = lambda a, kw, create=True: (cache, key_func(a, kw))
+    else:
+        per_obj = WeakKeyDictionary()
+        shared = cache_factory()
+        caches = lambda: list(per_obj.values()) + [shared]
+
+        def get_cache(a, kw, create=True):
+            """return the cache to use for the given args and the key within it"""
+            if a:
+                try:
+                    cache = per_obj.get(a[0])
+                except TypeError:
+                    # can't be weakly referenced
+                    pass
+                else:
+                    if cache is None and create:
+                        cache = per_obj.setdefault(a[0], cache_factory())
+                    return cache, key_func(a, kw)
+            return shared, (a[:1], key_func(a, kw))
+
+    @wraps(func)
+    def wrapper(*a, **kw):
+        try:
+            cache, k = get_cache(a, kw)
+            val = cache.lookup(k, _missing)
+        except TypeError:
+            # unhashable args
+            return func(*a, **kw)
+        if val is _missing:
+            val = func(*a, **kw)
+            cache.store(k, val)
+        return val
+
+    def cache_invalidate(*a, **kw):
+        cache, k = get_cache(a, kw, create=False)
+        if cache is not None:
+            cache.invalidate(k)
+
+    def cache_clear():
+        for cache in caches():
+            cache.clear()
+
+    def cache_stats():
+        stats = {"hits": 0, "misses": 0, "evictions": 0, "size": 0}
+        for cache in caches():
+            for k, v in cache.stats().items():
+                stats[k] += v
+        return stats
+
+    wrapper.cache_invalidate = cache_invalidate
+    wrapper.cache_clear = cache_clear
+    wrapper.cache_stats = cache_stats
+    return wrapper
+
+
+def memoize_method(func=None, maxsize=128, policy="lru", key=None,
+                   weigher=None, weak_keys=True):
+    """
+    variation of :py:func:`memoize` for methods, caching results per instance
+
+    By default results are cached per instance, and discarded when the
+    instance is garbage collected.  Instances that don't support weak
+    references (``__slots__`` lacking ``__weakref__``) share a single cache
+    with the instance as part of the key; pass ``weak_keys=False`` to always
+    do so.
+
+    See :py:func:`memoize` for documentation of the misc params.
+    """
+    return memoize(func, maxsize=maxsize, policy=policy, key=key,
+                   weigher=weigher, weak_keys=weak_keys)
+
+
 # "Invalid name"
 # pylint: disable=C0103
 
@@ -140,3 +963,54 @@ try:
 except ImportError:
     cpy_WeakInstMeta = None
     WeakInstMeta = native_WeakInstMeta
+
+
+def main(argv=None):
+    """
+    run a python script or module with statistics enabled, reporting at exit
+
+    :return: exit status of the target
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m snakeoil.caching',
+        description='run a python script or module, reporting instance caching '
+                    'and jit attribute statistics when it finishes')
+    parser.add_argument(
+        '-o', '--output', type=argparse.FileType('w'), default=sys.stderr,
+        help='file to write the report to (defaults to stderr)')
+    parser.add_argument(
+        '-m', dest='module', action='store_true',
+        help='treat the target as a module name rather than a script path')
+    parser.add_argument('target', help='script or module to run')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help='target arguments')
+    opts = parser.parse_args(argv)
+
+    # the target's argv and path tweaks are only in effect while it runs
+    orig_argv, orig_path = sys.argv, sys.path[:]
+    sys.argv = [opts.target] + opts.args
+    enable_stats()
+    ret = 0
+    try:
+        if opts.module:
+            runpy.run_module(opts.target, run_name='__main__', alter_sys=True)
+        else:
+            sys.path.insert(0, os.path.dirname(os.path.abspath(opts.target)))
+            runpy.run_path(opts.target, run_name='__main__')
+    except SystemExit as e:
+        ret = e.code
+    finally:
+        sys.argv = orig_argv
+        sys.path[:] = orig_path
+        dump_stats(opts.output)
+    return ret
+
+
+if os.environ.get("SNAKEOIL_CACHE_STATS", 'n').lower() in ('y', 'yes', '1', 'true'):
+    enable_stats()
+    atexit.register(dump_stats)
+
+
+if __name__ == '__main__':
+    # run via the importable module so the target sees the enabled stats
+    from snakeoil.caching import main
+    sys.exit(main())
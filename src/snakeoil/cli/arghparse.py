@@ -12,14 +12,14 @@ import sys
 
 from .. import klass
 from ..demandload import demandload
-from ..mappings import ImmutableDict
+from ..mappings import LazyValDict
 
 demandload(
     'operator:attrgetter',
     'logging',
     'textwrap:dedent',
     'traceback',
-    'snakeoil:osutils',
+    'snakeoil:modules,osutils',
     'snakeoil.obj:popattr',
     'snakeoil.version:get_version',
     'snakeoil.sequences:split_negations,split_elements',
@@ -361,10 +361,50 @@ class Expansion(argparse.Action):
         setattr(namespace, self.dest, True)
 
 
+class _LazyParser(object):
+    """Placeholder for a subcommand parser that is constructed on first use."""
+
+    __slots__ = ('_action', '_cls', '_factory', '_kwds')
+
+    def __init__(self, action, cls, factory, **kwds):
+        self._action = action
+        self._cls = cls
+        self._factory = factory
+        self._kwds = kwds
+
+    def realize(self):
+        """Construct the parser, replacing the placeholder in its subparsers action."""
+        parser = self._cls(**self._kwds)
+        factory = self._factory
+        if isinstance(factory, str):
+            factory = modules.load_attribute(factory)
+        factory(parser)
+        # replace all references to the placeholder, including aliases
+        parser_map = self._action._name_parser_map
+        for name, obj in list(parser_map.items()):
+            if obj is self:
+                parser_map[name] = parser
+        return parser
+
+
+def _get_subparser(action, name):
+    if isinstance(action, _SubParser):
+        return action.get_parser(name)
+    return action._name_parser_map[name]
+
+
 class _SubParser(argparse._SubParsersAction):
 
-    def add_parser(self, name, cls=None, **kwds):
-        """argparser subparser that links description/help if one is specified"""
+    def add_parser(self, name, cls=None, factory=None, **kwds):
+        """argparser subparser that links description/help if one is specified
+
+        :param cls: custom parser class to use for the subparser
+        :param factory: callable, or python dotted namespace path of a
+            callable, that is passed the subparser to add its arguments and
+            bind its main function.  The subparser isn't constructed until
+            the subcommand is selected, in which case a placeholder is returned
+            instead of the parser.
+        """
         description = kwds.get("description")
         help_txt = kwds.get("help")
         if description is None:
@@ -377,9 +417,24 @@ class _SubParser(argparse._SubParsersAction):
         orig_class = self._parser_class
         if cls is not None:
             self._parser_class = cls
+        if factory is not None and not _generate_docs:
+            self._parser_class = partial(_LazyParser, self, self._parser_class, factory)
         parser = super().add_parser(name, **kwds)
         self._parser_class = orig_class
 
+        if factory is not None and _generate_docs:
+            # doc generation requires all parsers to be fully constructed
+            if isinstance(factory, str):
+                factory = modules.load_attribute(factory)
+            factory(parser)
+
+        return parser
+
+    def get_parser(self, name):
+        """Return the parser for a given subcommand, constructing it if needed."""
+        parser = self._name_parser_map[name]
+        if isinstance(parser, _LazyParser):
+            parser = parser.realize()
         return parser
 
     def __call__(self, parser, namespace, values, option_string=None):
@@ -397,7 +452,7 @@ class _SubParser(argparse._SubParsersAction):
 
         # select the parser
         try:
-            parser = self._name_parser_map[parser_name]
+            parser = self.get_parser(parser_name)
         except KeyError:
             tup = parser_name, ', '.join(self._name_parser_map)
             msg = _('unknown parser %r (choices: %s)') % tup
@@ -593,13 +648,16 @@ class ArgumentParser(argparse.ArgumentParser):
 
     @klass.cached_property
     def subparsers(self):
-        """Return the set of registered subparsers."""
-        parsers = {}
+        """Return the set of registered subparsers.
+
+        Lazily registered subparsers are constructed when accessed.
+        """
+        actions = {}
         if self._subparsers is not None:
             for x in self._subparsers._actions:
                 if isinstance(x, argparse._SubParsersAction):
-                    parsers.update(x._name_parser_map)
-        return ImmutableDict(parsers)
+                    actions.update((name, x) for name in x._name_parser_map)
+        return LazyValDict(tuple(actions), lambda name: _get_subparser(actions[name], name))
 
     def _parse_known_args(self, arg_strings, namespace):
         """Add support for using a specified, default subparser."""
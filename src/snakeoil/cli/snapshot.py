@@ -0,0 +1,305 @@
+# License: BSD/GPL2
+
+"""Cached parser snapshots for fast help output and completion.
+
+Building the full argument parser of a tool requires importing everything it
+references, which dominates the runtime of short invocations like ``--help``
+or shell completion helpers.  A :py:class:`ParserSnapshot` stores the
+rendered help output, option strings, and subcommands for every parser in a
+parser tree, keyed by the modification times of the source files that were
+imported to build it, so those requests can be answered without importing
+the tool at all.
+
+Note that the parser objects themselves aren't serialized: unpickling them
+would require importing the modules defining their main functions and
+actions, which for most tools are the same modules that construct the
+parser.
+
+Example usage in a tool's entry point:
+
+>>> from snakeoil.cli.snapshot import run
+>>> def main():
+...   return run('mytool.scripts.mytool')
+"""
+
+__all__ = ("ParserSnapshot", "get_snapshot", "run")
+
+import json
+import os
+import sys
+from types import BuiltinFunctionType, FunctionType, ModuleType
+
+from ..demandload import demandload
+
+demandload(
+    'argparse',
+    'importlib:import_module',
+    'shutil',
+    'snakeoil.fileutils:AtomicWriteFile',
+    'snakeoil.osutils:ensure_dirs',
+    'snakeoil.cli.tool:Tool',
+)
+
+_FORMAT_VERSION = 1
+
+
+def _columns():
+    # argparse's help formatter wraps output based on the terminal size
+    return shutil.get_terminal_size().columns
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except EnvironmentError:
+        return None
+
+
+def module_sources(modules):
+    """Return the source files of the given modules.
+
+    :param modules: iterable of module objects
+    :return: sorted list of file paths
+    """
+    sources = set()
+    for module in modules:
+        path = getattr(module, '__file__', None)
+        if path is not None:
+            sources.add(os.path.abspath(path))
+    return sorted(sources)
+
+
+def _module_dependencies(module):
+    """Return a module along with the modules it transitively depends on.
+
+    Dependencies are found via the modules, classes, and functions bound in
+    module namespaces along with parent packages.  Demandload placeholders
+    and lazy modules that haven't been loaded yet aren't followed.
+    """
+    seen = {}
+    stack = [module]
+    while stack:
+        module = stack.pop()
+        name = module.__name__
+        if name in seen:
+            continue
+        seen[name] = module
+        deps = [name.rpartition('.')[0]]
+        # note type checks are used since anything else triggers placeholders
+        for value in list(vars(module).values()):
+            kls = type(value)
+            if kls is ModuleType:
+                stack.append(value)
+            elif issubclass(kls, type) or kls in (FunctionType, BuiltinFunctionType):
+                deps.append(getattr(value, '__module__', None))
+        stack.extend(filter(None, map(sys.modules.get, filter(None, deps))))
+    return list(seen.values())
+
+
+def _subparsers(parser):
+    subparsers = getattr(parser, 'subparsers', None)
+    if subparsers is None:
+        # vanilla argparse parser
+        subparsers = {}
+        for action in parser._actions:
+            if isinstance(action, argparse._SubParsersAction):
+                subparsers.update(action._name_parser_map)
+    return subparsers
+
+
+class ParserSnapshot(object):
+    """Rendered help and completion data for a parser tree."""
+
+    def __init__(self, parsers, sources, columns=None):
+        """
+        :param parsers: mapping of subcommand paths (tuples of subcommand names)
+            to dicts with help, options, and subcommands keys
+        :param sources: mapping of source file paths to their mtimes
+        :param columns: terminal width the help output was rendered for
+        """
+        self.parsers = parsers
+        self.sources = sources
+        self.columns = _columns() if columns is None else columns
+
+    @classmethod
+    def from_parser(cls, parser, sources=()):
+        """Generate a snapshot from a parser and its subparsers.
+
+        :param parser: :obj:`argparse.ArgumentParser` instance
+        :param sources: iterable of source file paths the snapshot depends on
+        """
+        parsers = {}
+        stack = [((), parser)]
+        while stack:
+            path, parser = stack.pop()
+            subparsers = _subparsers(parser)
+            parsers[path] = {
+                'help': parser.format_help(),
+                'options': sorted(
+                    option for action in parser._actions
+                    for option in action.option_strings),
+                'subcommands': sorted(subparsers),
+            }
+            stack.extend((path + (name,), subparser)
+                         for name, subparser in subparsers.items()
+                         # skip aliases to already handled parsers
+                         if subparser is not parser)
+        return cls(parsers, {path: _mtime(path) for path in sources})
+
+    def is_current(self):
+        """Check if the snapshot matches the current source files and terminal size."""
+        if self.columns != _columns():
+            return False
+        return all(_mtime(path) == mtime for path, mtime in self.sources.items())
+
+    def resolve(self, args):
+        """Determine the subcommand path specified by command line args.
+
+        :return: tuple of subcommand names, or None if it can't be determined
+            without the real parser (e.g. options taking values)
+        """
+        path = ()
+        for arg in args:
+            if arg == '--':
+                return None
+            elif arg.startswith('-'):
+                continue
+            elif arg in self.parsers[path]['subcommands']:
+                path += (arg,)
+            else:
+                return None
+        return path
+
+    def help(self, path=()):
+        """Return the help output for the parser at a given subcommand path."""
+        return self.parsers[tuple(path)]['help']
+
+    def complete(self, words):
+        """Return completion candidates for the last word of a command line.
+
+        :param words: command line args, the last of which is the (possibly
+            empty) word being completed
+        :return: sorted list of candidates, or None if the subcommand path
+            can't be determined
+        """
+        words = list(words) or ['']
+        path = self.resolve(words[:-1])
+        if path is None:
+            return None
+        prefix = words[-1]
+        data = self.parsers[path]
+        if prefix.startswith('-'):
+            candidates = data['options']
+        else:
+            candidates = data['subcommands']
+        return [x for x in candidates if x.startswith(prefix)]
+
+    def save(self, path):
+        """Write the snapshot to a file."""
+        ensure_dirs(os.path.dirname(path))
+        data = {
+            'version': _FORMAT_VERSION,
+            'columns': self.columns,
+            'sources': self.sources,
+            'parsers': [[list(k), v] for k, v in self.parsers.items()],
+        }
+        with AtomicWriteFile(path) as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path):
+        """Load a snapshot from a file.
+
+        :return: snapshot instance, or None if the file doesn't exist, is
+            corrupted, or is out of date
+        """
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data['version'] != _FORMAT_VERSION:
+                return None
+            snapshot = cls(
+                {tuple(k): v for k, v in data['parsers']},
+                data['sources'], data['columns'])
+        except (EnvironmentError, ValueError, KeyError, TypeError):
+            return None
+        if not snapshot.is_current():
+            return None
+        return snapshot
+
+
+def default_cache_path(module):
+    """Return the default snapshot file location for a given tool module."""
+    cache_dir = os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))
+    return os.path.join(cache_dir, 'snakeoil', 'parsers', module + '.json')
+
+
+def _import_parser(module, attr):
+    """Import a parser, returning it along with the source files it depends on.
+
+    Besides the modules the parser module transitively depends on, anything
+    first imported while importing it (e.g. via function level imports) is
+    included.
+    """
+    loaded = set(sys.modules)
+    module = import_module(module)
+    parser = getattr(module, attr)
+    modules = _module_dependencies(module)
+    modules.extend(m for name, m in list(sys.modules.items()) if name not in loaded)
+    return parser, module_sources(modules)
+
+
+def get_snapshot(module, attr='argparser', cache_path=None):
+    """Return a current snapshot for a tool's parser, generating it if needed.
+
+    Meant for completion helpers; see :py:meth:`ParserSnapshot.complete`.
+
+    :param module: name of the module defining the parser
+    :param attr: name of the parser attribute in ``module``
+    :param cache_path: snapshot file path, see :py:func:`default_cache_path`
+        for the default location
+    """
+    if cache_path is None:
+        cache_path = default_cache_path(module)
+    snapshot = ParserSnapshot.load(cache_path)
+    if snapshot is None:
+        snapshot = ParserSnapshot.from_parser(*_import_parser(module, attr))
+        try:
+            snapshot.save(cache_path)
+        except EnvironmentError:
+            # caching is best effort
+            pass
+    return snapshot
+
+
+def run(module, attr='argparser', args=None, cache_path=None, tool=None):
+    """Run a tool, answering help requests from a cached parser snapshot if possible.
+
+    When help is requested and a current snapshot exists, its help output is
+    written without importing ``module``; if no current snapshot exists, one
+    is generated for subsequent requests.  Otherwise the module is imported
+    and its parser is run via ``tool``.
+
+    :param module: name of the module defining the parser
+    :param attr: name of the parser attribute in ``module``
+    :param args: arguments to parse, defaulting to C{sys.argv[1:]}
+    :param cache_path: snapshot file path, see :py:func:`default_cache_path`
+        for the default location
+    :param tool: callable taking the parser and returning a
+        :py:class:`snakeoil.cli.tool.Tool` instance
+    :return: exit status
+    """
+    if args is None:
+        args = sys.argv[1:]
+
+    if '-h' in args or '--help' in args:
+        snapshot = get_snapshot(module, attr, cache_path)
+        path = snapshot.resolve(args)
+        if path is not None:
+            sys.stdout.write(snapshot.help(path))
+            return 0
+
+    parser = getattr(import_module(module), attr)
+    if tool is None:
+        tool = Tool
+    return tool(parser)(args)
@@ -7,10 +7,15 @@ Container classes and functionality for implementing them
 """
 
 __all__ = (
-    "InvertedContains", "SetMixin", "LimitedChangeSet", "Unchangable",
-    "ProtectedSet", "RefCountingSet"
+    "InvertedContains", "SetMixin", "LimitedChangeSet",
+    "CheckpointedChangeSet", "Unchangable",
+    "ProtectedSet", "RefCountingSet", "Vocabulary", "BitSet",
 )
 
+from collections import Counter
+from collections.abc import Mapping
+from types import MappingProxyType
+
 from .demandload import demandload
 from .klass import steal_docs
 
@@ -55,6 +60,8 @@ class SetMixin(object):
 
     """
 
+    __slots__ = ()
+
     @steal_docs(set)
     def __and__(self, other, kls=None):
         # Note: for these methods we don't bother to filter dupes from this
@@ -96,6 +103,261 @@ class SetMixin(object):
     __radd__ = steal_docs(set)(__ror__)
 
 
+class Vocabulary(object):
+
+    """Registry assigning bit indexes to keys, for use with :py:class:`BitSet`.
+
+    Keys are assigned consecutive indexes in the order they're registered;
+    keys are never unregistered.
+
+    >>> from snakeoil.containers import Vocabulary
+    >>> vocab = Vocabulary(('amd64', 'x86'))
+    >>> vocab['x86']
+    1
+    >>> vocab.add('arm')
+    2
+    >>> vocab.keys_of(vocab.mask(('arm', 'amd64')))
+    ['amd64', 'arm']
+    """
+
+    __slots__ = ('_index', '_keys')
+
+    def __init__(self, keys=()):
+        self._index = {}
+        self._keys = []
+        for key in keys:
+            self.add(key)
+
+    def add(self, key):
+        """Register a key if necessary, returning its index."""
+        index = self._index.get(key)
+        if index is None:
+            index = self._index[key] = len(self._keys)
+            self._keys.append(key)
+        return index
+
+    def __getitem__(self, key):
+        return self._index[key]
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def mask(self, keys, register=True):
+        """Return the bitmask of a set of keys.
+
+        :param keys: iterable of keys
+        :param register: whether to register unknown keys; if False, they're
+            ignored
+        """
+        if register:
+            indexes = [self.add(key) for key in keys]
+        else:
+            get = self._index.get
+            indexes = [i for i in map(get, keys) if i is not None]
+        if not indexes:
+            return 0
+        # setting bits on a bytearray avoids an int allocation per key
+        mask = bytearray(max(indexes) // 8 + 1)
+        for i in indexes:
+            mask[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(mask, 'little')
+
+    def keys_of(self, mask):
+        """Return the keys whose bits are set in a bitmask, ordered by index."""
+        # reversed, so string offsets match bit indexes
+        bits = bin(mask)[:1:-1]
+        keys = self._keys
+        l = []
+        i = bits.find('1')
+        while i != -1:
+            l.append(keys[i])
+            i = bits.find('1', i + 1)
+        return l
+
+
+class BitSet(SetMixin):
+
+    """Set of keys from a :py:class:`Vocabulary`, stored as a bitmask.
+
+    Membership is a single bit test, and operations between bitsets
+    sharing a vocabulary are done word at a time on the masks rather than
+    per key.  Adding a key not yet in the vocabulary registers it.
+
+    In inverted mode the set contains every key except those added to it,
+    matching the semantics of :py:class:`InvertedContains`; such sets can't
+    be iterated over or sized, but still support the set operators.
+
+    >>> from snakeoil.containers import BitSet, Vocabulary
+    >>> vocab = Vocabulary()
+    >>> stable = BitSet(('amd64', 'x86'), vocab)
+    >>> testing = BitSet(('arm', 'x86'), vocab)
+    >>> sorted(stable & testing)
+    ['x86']
+    >>> masked = BitSet(('x86',), vocab, inverted=True)
+    >>> assert 'amd64' in masked and 'x86' not in masked
+    >>> sorted(stable & masked)
+    ['amd64']
+    """
+
+    __slots__ = ('vocabulary', 'bits', 'inverted', '_index')
+    __hash__ = None
+
+    def __init__(self, iterable=(), vocabulary=None, inverted=False):
+        """
+        :param iterable: keys to add
+        :param vocabulary: :py:class:`Vocabulary` instance to use, sets can
+            only be efficiently combined if they share one
+        :param inverted: whether the set contains all keys except those added
+        """
+        if vocabulary is None:
+            vocabulary = Vocabulary()
+        self.vocabulary = vocabulary
+        self._index = vocabulary._index
+        self.bits = vocabulary.mask(iterable)
+        self.inverted = inverted
+
+    @classmethod
+    def _from_mask(cls, vocabulary, bits, inverted=False):
+        obj = cls.__new__(cls)
+        obj.vocabulary = vocabulary
+        obj._index = vocabulary._index
+        obj.bits = bits
+        obj.inverted = inverted
+        return obj
+
+    def _coerce(self, other):
+        if isinstance(other, BitSet):
+            if other.vocabulary is not self.vocabulary:
+                if other.inverted:
+                    raise TypeError(
+                        "can't combine inverted bitsets with differing vocabularies")
+                return BitSet(other, self.vocabulary)
+            return other
+        elif isinstance(other, InvertedContains):
+            return BitSet(set.__iter__(other), self.vocabulary, inverted=True)
+        return BitSet(other, self.vocabulary)
+
+    def add(self, key):
+        self.bits |= 1 << self.vocabulary.add(key)
+
+    def discard(self, key):
+        index = self._index.get(key)
+        if index is not None:
+            self.bits &= ~(1 << index)
+
+    def remove(self, key):
+        index = self._index.get(key)
+        if index is None or not self.bits >> index & 1:
+            raise KeyError(key)
+        self.bits &= ~(1 << index)
+
+    def update(self, iterable):
+        self.bits |= self.vocabulary.mask(iterable)
+
+    def __contains__(self, key):
+        index = self._index.get(key)
+        if index is None:
+            return self.inverted
+        return self.bits >> index & 1 != self.inverted
+
+    def __iter__(self):
+        if self.inverted:
+            raise TypeError("inverted BitSet cannot be iterated over")
+        return iter(self.vocabulary.keys_of(self.bits))
+
+    def __len__(self):
+        if self.inverted:
+            raise TypeError("inverted BitSet has no length")
+        return bin(self.bits).count('1')
+
+    def __bool__(self):
+        return self.inverted or bool(self.bits)
+
+    def __eq__(self, other):
+        if isinstance(other, BitSet):
+            if other.vocabulary is self.vocabulary:
+                return self.bits == other.bits and self.inverted == other.inverted
+            elif self.inverted or other.inverted:
+                return False
+            return frozenset(self) == frozenset(other)
+        elif isinstance(other, (set, frozenset)) and not isinstance(other, InvertedContains):
+            return not self.inverted and frozenset(self) == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        if eq is NotImplemented:
+            return eq
+        return not eq
+
+    def __repr__(self):
+        if self.inverted:
+            return '<%s inverted, excluding %r>' % (
+                self.__class__.__name__, self.vocabulary.keys_of(self.bits))
+        return '%s(%r)' % (self.__class__.__name__, list(self))
+
+    # Set operations on (bits, inverted) pairs; an inverted set's contents
+    # are the complement of its bits, handled via De Morgan's laws so masks
+    # never have to be complemented against the whole vocabulary.
+
+    def _and(self, other, invert_other=False):
+        other = self._coerce(other)
+        a, b = self.bits, other.bits
+        a_inv, b_inv = self.inverted, other.inverted != invert_other
+        if a_inv and b_inv:
+            return self._from_mask(self.vocabulary, a | b, True)
+        elif a_inv:
+            return self._from_mask(self.vocabulary, b & ~a)
+        elif b_inv:
+            return self._from_mask(self.vocabulary, a & ~b)
+        return self._from_mask(self.vocabulary, a & b)
+
+    def __and__(self, other):
+        return self._and(other)
+
+    def __or__(self, other):
+        other = self._coerce(other)
+        a, b = self.bits, other.bits
+        if self.inverted and other.inverted:
+            return self._from_mask(self.vocabulary, a & b, True)
+        elif self.inverted:
+            return self._from_mask(self.vocabulary, a & ~b, True)
+        elif other.inverted:
+            return self._from_mask(self.vocabulary, b & ~a, True)
+        return self._from_mask(self.vocabulary, a | b)
+
+    def __xor__(self, other):
+        other = self._coerce(other)
+        return self._from_mask(
+            self.vocabulary, self.bits ^ other.bits, self.inverted != other.inverted)
+
+    def __sub__(self, other):
+        return self._and(other, invert_other=True)
+
+    def __rsub__(self, other):
+        return self._coerce(other)._and(self, invert_other=True)
+
+    __rand__ = __and__
+    __ror__ = __or__
+    __rxor__ = __xor__
+    __add__ = __or__
+    __radd__ = __or__
+
+    def __invert__(self):
+        return self._from_mask(self.vocabulary, self.bits, not self.inverted)
+
+    def __copy__(self):
+        return self._from_mask(self.vocabulary, self.bits, self.inverted)
+
+    copy = __copy__
+
+
 class LimitedChangeSet(SetMixin):
 
     """
@@ -121,6 +383,8 @@ class LimitedChangeSet(SetMixin):
 
     _removed = 0
     _added = 1
+    # adding a present key or removing a missing one
+    _unchanged = 2
 
     @staticmethod
     def _default_key_validator(val):
@@ -159,9 +423,10 @@ class LimitedChangeSet(SetMixin):
                 return
             raise Unchangable(key)
 
+        change = self._unchanged if key in self._new else self._added
         self._new.add(key)
         self._changed.add(key)
-        self._change_order.append((self._added, key))
+        self._change_order.append((change, key))
 
     @steal_docs(set)
     def remove(self, key):
@@ -173,8 +438,11 @@ class LimitedChangeSet(SetMixin):
 
         if key in self._new:
             self._new.remove(key)
+            change = self._removed
+        else:
+            change = self._unchanged
         self._changed.add(key)
-        self._change_order.append((self._removed, key))
+        self._change_order.append((change, key))
 
     @steal_docs(set)
     def __contains__(self, key):
@@ -198,7 +466,7 @@ class LimitedChangeSet(SetMixin):
             self._changed.remove(key)
             if change == self._removed:
                 self._new.add(key)
-            else:
+            elif change == self._added:
                 self._new.remove(key)
             l -= 1
 
@@ -226,6 +494,142 @@ class LimitedChangeSet(SetMixin):
         return not self == other
 
 
+class _CommittedLayer(object):
+    """Committed state of a :py:class:`CheckpointedChangeSet`.
+
+    Each layer only stores the keys added and removed by a commit, sharing
+    the rest of its contents with the parent layer.
+    """
+
+    __slots__ = ('parent', 'added', 'removed', 'depth', '_len')
+
+    def __init__(self, parent, added, removed, length):
+        self.parent = parent
+        self.added = added
+        self.removed = removed
+        self.depth = 0 if parent is None else parent.depth + 1
+        self._len = length
+
+    def __contains__(self, key):
+        layer = self
+        while layer.parent is not None:
+            if key in layer.added:
+                return True
+            elif key in layer.removed:
+                return False
+            layer = layer.parent
+        return key in layer.added
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return iter(self.frozen())
+
+    def frozen(self):
+        """Return the layer's contents as a frozenset."""
+        layers = []
+        layer = self
+        while layer.parent is not None:
+            layers.append(layer)
+            layer = layer.parent
+        keys = set(layer.added)
+        for layer in reversed(layers):
+            keys.difference_update(layer.removed)
+            keys.update(layer.added)
+        return frozenset(keys)
+
+
+class CheckpointedChangeSet(LimitedChangeSet):
+
+    """
+    :py:class:`LimitedChangeSet` variant with named checkpoints, meant for
+    backtracking searches.
+
+    Checkpoints are O(1), rolling back to one reverts all later changes in
+    bulk, and commits only store the keys changed since the last commit,
+    sharing the rest with the previously committed state.
+
+    >>> from snakeoil.containers import CheckpointedChangeSet
+    >>> myset = CheckpointedChangeSet((1, 2))
+    >>> myset.add(3)
+    >>> myset.checkpoint('three')
+    1
+    >>> myset.remove(1)
+    >>> myset.add(4)
+    >>> myset.rollback('three')
+    >>> assert sorted(myset) == [1, 2, 3]
+    >>> myset.commit()
+    >>> assert 3 in myset.committed
+    """
+
+    # number of commits stored as layers before flattening them
+    max_depth = 16
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._checkpoints = {}
+        self._orig = _CommittedLayer(None, self._orig, frozenset(), len(self._new))
+
+    @property
+    def committed(self):
+        """Read-only set-like view of the last committed state."""
+        return self._orig
+
+    def checkpoint(self, name):
+        """Mark the current state, returning the matching change count.
+
+        :param name: hashable, non-integer name to pass to :py:meth:`rollback`
+        """
+        point = self._checkpoints[name] = len(self._change_order)
+        return point
+
+    def rollback(self, point=0):
+        """Revert changes made after a given point.
+
+        :param point: change count or checkpoint name to revert to;
+            checkpoints made after it are discarded
+        """
+        if not isinstance(point, int):
+            try:
+                point = self._checkpoints[point]
+            except KeyError:
+                raise KeyError("unknown checkpoint: %r" % (point,))
+        l = self.changes_count()
+        if point < 0 or point > l:
+            raise TypeError(
+                "%s point must be >=0 and <= changes_count()" % point)
+        if point == l:
+            return
+        # keys change at most once between commits, so the order changes
+        # are reverted in doesn't matter
+        changes = self._change_order[point:]
+        del self._change_order[point:]
+        self._changed.difference_update(key for _change, key in changes)
+        self._new.difference_update(
+            key for change, key in changes if change == self._added)
+        self._new.update(
+            key for change, key in changes if change == self._removed)
+        self._checkpoints = {
+            k: v for k, v in self._checkpoints.items() if v <= point}
+
+    def commit(self):
+        if self._change_order:
+            added = frozenset(
+                key for change, key in self._change_order if change == self._added)
+            removed = frozenset(
+                key for change, key in self._change_order if change == self._removed)
+            if self._orig.depth >= self.max_depth:
+                self._orig = _CommittedLayer(
+                    None, frozenset(self._new), frozenset(), len(self._new))
+            else:
+                self._orig = _CommittedLayer(
+                    self._orig, added, removed, len(self._new))
+        self._changed.clear()
+        self._change_order = []
+        self._checkpoints.clear()
+
+
 class Unchangable(Exception):
 
     def __init__(self, key):
@@ -275,7 +679,72 @@ class ProtectedSet(SetMixin):
             self._new.add(key)
 
 
-class RefCountingSet(dict):
+def _counts(items):
+    """Return a mapping of items to counts for a mapping or iterable of items."""
+    if isinstance(items, Mapping):
+        if any(count < 0 for count in items.values()):
+            raise ValueError("negative counts aren't allowed")
+        return items
+    # Counter tallies iterables in C
+    return Counter(items)
+
+
+class _native_RefCountingSetBase(dict):
+
+    @steal_docs(set)
+    def add(self, item):
+        self[item] = self.get(item, 0) + 1
+
+    @steal_docs(set)
+    def remove(self, item):
+        count = self[item]
+        if count == 1:
+            del self[item]
+        else:
+            self[item] = count - 1
+
+    def update_many(self, items):
+        """Add items in bulk.
+
+        :param items: iterable of items to add, or mapping of items to the
+            number of times to add them
+        """
+        get = self.get
+        for item, count in _counts(items).items():
+            if count:
+                self[item] = get(item, 0) + count
+
+    def remove_many(self, items):
+        """Remove items in bulk.
+
+        Either all of the removals are applied or, if any item isn't present
+        enough times, none of them are.
+
+        :param items: iterable of items to remove, or mapping of items to the
+            number of times to remove them
+        :raises KeyError: if an item isn't present enough times
+        """
+        counts = _counts(items)
+        get = self.get
+        for item, count in counts.items():
+            if count and get(item, 0) < count:
+                raise KeyError(item)
+        for item, count in counts.items():
+            if count:
+                remaining = self[item] - count
+                if remaining:
+                    self[item] = remaining
+                else:
+                    del self[item]
+
+
+try:
+    from ._containers import RefCountingSetBase as _RefCountingSetBase
+except ImportError:
+    _RefCountingSetBase = _native_RefCountingSetBase
+
+
+class RefCountingSet(_RefCountingSetBase):
 
     """
     Set implementation that implements refcounting for add/remove, removing the key only when its refcount is 0.
@@ -291,25 +760,25 @@ class RefCountingSet(dict):
     >>> assert list(myset) == [1]
     >>> myset.remove(1)
     >>> assert list(myset) == []
+
+    Bulk changes are supported via :py:meth:`update_many` and
+    :py:meth:`remove_many`, which accept either an iterable of items or a
+    mapping of items to counts.  The set operators combine counts: ``+``
+    sums them, ``-`` subtracts them (dropping items whose count reaches 0),
+    ``|`` takes the maximum and ``&`` the minimum.
+
+    >>> myset.update_many([1, 1, 2])
+    >>> snapshot = myset.snapshot()
+    >>> myset.remove_many({1: 2})
+    >>> myset.add(3)
+    >>> added, removed = myset.diff(snapshot)
+    >>> assert added == {3: 1} and removed == {1: 2}
     """
 
     def __init__(self, iterable=None):
         if iterable is not None:
             self.update(iterable)
 
-    @steal_docs(set)
-    def add(self, item):
-        count = self.get(item, 0)
-        self[item] = count + 1
-
-    @steal_docs(set)
-    def remove(self, item):
-        count = self[item]
-        if count == 1:
-            del self[item]
-        else:
-            self[item] = count - 1
-
     @steal_docs(set)
     def discard(self, item):
         try:
@@ -319,5 +788,72 @@ class RefCountingSet(dict):
 
     @steal_docs(set)
     def update(self, items):
-        for item in items:
-            self.add(item)
+        if isinstance(items, Mapping):
+            # only the keys of a mapping are added
+            items = dict.fromkeys(items, 1)
+        self.update_many(items)
+
+    def copy(self):
+        new = self.__class__()
+        dict.update(new, self)
+        return new
+
+    __copy__ = copy
+
+    def snapshot(self):
+        """Return a read-only copy of the current counts for use with :py:meth:`diff`."""
+        return MappingProxyType(dict(self))
+
+    def diff(self, other):
+        """Compare counts against another set or snapshot.
+
+        :param other: mapping of items to counts, or iterable of items
+        :return: tuple of the counts added and removed relative to ``other``,
+            as :py:class:`RefCountingSet` instances
+        """
+        other_set = self.__class__()
+        other_set.update_many(other)
+        return self - other_set, other_set - self
+
+    def __add__(self, other):
+        new = self.copy()
+        new.update_many(other)
+        return new
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        new = self.copy()
+        for item, count in _counts(other).items():
+            remaining = new.get(item, 0) - count
+            if remaining > 0:
+                dict.__setitem__(new, item, remaining)
+            elif item in new:
+                del new[item]
+        return new
+
+    def __or__(self, other):
+        new = self.copy()
+        for item, count in _counts(other).items():
+            if count > new.get(item, 0):
+                dict.__setitem__(new, item, count)
+        return new
+
+    __ror__ = __or__
+
+    def __ior__(self, other):
+        # override dict's in-place merge
+        for item, count in _counts(other).items():
+            if count > self.get(item, 0):
+                dict.__setitem__(self, item, count)
+        return self
+
+    def __and__(self, other):
+        new = self.__class__()
+        for item, count in _counts(other).items():
+            count = min(count, self.get(item, 0))
+            if count > 0:
+                dict.__setitem__(new, item, count)
+        return new
+
+    __rand__ = __and__
@@ -40,9 +40,24 @@ have to be careful with:
    call will always return False with subsequent calls working as expected. The
    previously mentioned workaround of demandloading the module works in this
    case as well.
+
+An alternate backend based on :py:class:`importlib.util.LazyLoader` can be
+selected by setting ``SNAKEOIL_DEMANDLOAD_BACKEND=lazyloader`` in the
+environment; see :py:func:`lazyloader_demandload` for details.  Note that PEP
+562 module level ``__getattr__`` hooks aren't an option here since they aren't
+consulted for bare global name lookups within the module itself.
+
+To find out which placeholders are triggered, when, and at what cost, set
+``SNAKEOIL_DEMANDLOAD_AUDIT=y`` to dump a report to stderr at exit, or set it
+to a file path to append the collected records (JSON, one per line) to that
+file for later aggregation across runs via :py:func:`read_audit_log` and
+:py:func:`audit_report`.  See :py:func:`enable_audit` for details.
 """
 
-__all__ = ("demandload", "demand_compile_regexp")
+__all__ = (
+    "demandload", "demand_compile_regexp", "lazyloader_demandload",
+    "enable_audit", "disable_audit", "audit_records", "audit_report", "read_audit_log",
+)
 
 import functools
 import os
@@ -126,6 +141,151 @@ else:
     _protection_enabled = _protection_enabled_enabled
     _noisy_protection = _noisy_protection_enabled
 
+# list of _AuditRecord objects while auditing is enabled
+_audit_log = None
+
+
+class _AuditRecord(object):
+    """audit data for a single placeholder"""
+
+    __slots__ = ("file", "name", "target", "loaded", "load_time", "early",
+                 "complaints", "stack")
+
+    def __init__(self, scope, name, load_func):
+        self.file = scope.get("__file__", "unknown")
+        self.name = name
+        self.target = _describe_load_func(load_func)
+        self.loaded = False
+        self.load_time = 0.0
+        self.early = False
+        self.complaints = 0
+        self.stack = ()
+
+    def record_trigger(self, load_time):
+        """record the first access of the placeholder, which took load_time seconds"""
+        self.loaded = True
+        self.load_time = load_time
+        stack = []
+        frame = sys._getframe(1)
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename != __file__:
+                stack.append("%s:%i in %s" % (code.co_filename, frame.f_lineno, code.co_name))
+                # triggered while the demandloading module was still being imported
+                if code.co_name == '<module>' and code.co_filename == self.file:
+                    self.early = True
+            frame = frame.f_back
+        stack.reverse()
+        self.stack = tuple(stack)
+
+    def as_dict(self):
+        return {attr: getattr(self, attr) for attr in self.__slots__}
+
+
+def _describe_load_func(load_func):
+    if isinstance(load_func, functools.partial) and load_func.args:
+        if load_func.func is load_any:
+            return load_func.args[0]
+        return "%s%r" % (getattr(load_func.func, '__name__', load_func.func), load_func.args)
+    return repr(load_func)
+
+
+def enable_audit():
+    """Start recording placeholder creation, triggering, and load costs.
+
+    Only placeholders created while auditing is enabled are tracked.  For
+    each one the demandloading file, target, whether and how early it was
+    triggered, the first access stack, the time spent loading the target,
+    and the number of times :py:meth:`Placeholder._target_already_loaded`
+    complained are recorded.
+    """
+    global _audit_log
+    if _audit_log is None:
+        _audit_log = []
+
+
+def disable_audit():
+    """Stop recording, discarding any collected audit data."""
+    global _audit_log
+    _audit_log = None
+
+
+def audit_records():
+    """:return: list of dicts describing each audited placeholder"""
+    return [x.as_dict() for x in (_audit_log or ())]
+
+
+def read_audit_log(path):
+    """Read audit records written via ``SNAKEOIL_DEMANDLOAD_AUDIT=<path>``.
+
+    :return: list of record lists, one per recorded run
+    """
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def audit_report(runs=None, out=None):
+    """Write a report of audited placeholders, suggesting demandload changes.
+
+    Targets that were triggered while their demandloading module was still
+    being imported, or were triggered in every run, are suggested to be
+    imported eagerly; targets never triggered in any run are flagged as
+    possibly unused.
+
+    :param runs: list of record lists (one per run) as returned by
+        :py:func:`read_audit_log`, defaults to the records for this process
+    :param out: file object to write to, defaults to stderr
+    """
+    if runs is None:
+        runs = [audit_records()]
+    if out is None:
+        out = sys.stderr
+
+    # (file, name, target) -> [runs seen, runs loaded, early loads, total load time, complaints]
+    targets = {}
+    for records in runs:
+        for record in records:
+            key = (record["file"], record["name"], record["target"])
+            data = targets.setdefault(key, [0, 0, 0, 0.0, 0])
+            data[0] += 1
+            if record["loaded"]:
+                data[1] += 1
+                data[3] += record["load_time"]
+            if record["early"]:
+                data[2] += 1
+            data[4] += record["complaints"]
+
+    out.write("demandload audit: %i placeholders over %i run(s)\n" % (len(targets), len(runs)))
+    out.write("loaded targets (average load time, slowest first):\n")
+    loaded = sorted(
+        ((data[3] / data[1], key, data) for key, data in targets.items() if data[1]),
+        key=lambda x: (-x[0], x[1]))
+    for avg, (path, name, target), data in loaded:
+        flags = []
+        if data[2]:
+            flags.append("early")
+        if data[4]:
+            flags.append("complaints=%i" % data[4])
+        out.write("  %9.3fms  %s: %s (%s) loaded %i/%i%s\n" % (
+            avg * 1000, path, name, target, data[1], data[0],
+            " [%s]" % ", ".join(flags) if flags else ""))
+
+    eager = sorted(key for key, data in targets.items() if data[2] or data[1] == data[0])
+    unused = sorted(key for key, data in targets.items() if not data[1])
+    if eager:
+        out.write("suggested eager imports (triggered at import time or in every run):\n")
+        for path, name, target in eager:
+            out.write("  %s: %s (%s)\n" % (path, name, target))
+    if unused:
+        out.write("possibly unused targets (never triggered):\n")
+        for path, name, target in unused:
+            out.write("  %s: %s (%s)\n" % (path, name, target))
+
+
+def _write_audit_log(path):
+    with open(path, 'a') as f:
+        f.write(json.dumps(audit_records()) + "\n")
+
 
 class Placeholder(object):
 
@@ -173,6 +333,12 @@ class Placeholder(object):
         object.__setattr__(self, '_replacing_tids', [])
         object.__setattr__(self, '_load_func', load_func)
         object.__setattr__(self, '_loading_lock', threading.Lock())
+        if _audit_log is not None:
+            record = _AuditRecord(scope, name, load_func)
+            _audit_log.append(record)
+        else:
+            record = None
+        object.__setattr__(self, '_audit', record)
 
     def _target_already_loaded(self, complain=True):
         name = object.__getattribute__(self, '_name')
@@ -194,6 +360,9 @@ class Placeholder(object):
         if complain:
             tids_to_complain_about = object.__getattribute__(self, '_replacing_tids')
             if threading.current_thread().ident in tids_to_complain_about:
+                record = object.__getattribute__(self, '_audit')
+                if record is not None:
+                    record.complaints += 1
                 if _protection_enabled():
                     raise ValueError('Placeholder for %r was triggered twice' % (name,))
                 elif _noisy_protection():
@@ -218,7 +387,14 @@ class Placeholder(object):
                 # We're the first thread to try and do the load; load the target,
                 # fix the scope, and replace this method with one that shortcircuits
                 # (and appropriately complains) the lookup.
-                result = load_func()
+                record = object.__getattribute__(self, '_audit')
+                if record is None:
+                    result = load_func()
+                else:
+                    from time import perf_counter
+                    start = perf_counter()
+                    result = load_func()
+                    record.record_trigger(perf_counter() - start)
                 scope = object.__getattribute__(self, '_scope')
                 name = object.__getattribute__(self, '_name')
                 scope[name] = result
@@ -281,6 +457,79 @@ def demandload(*imports, **kwargs):
 # disabled_demandload easier.
 enabled_demandload = demandload
 
+# avoid importing types just for this
+_ModuleType = type(sys)
+
+
+def _lazy_module(name):
+    """Return a lazily executed module object for ``name``.
+
+    :return: the module, or None if a lazy module can't be created for
+        ``name`` without importing something.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if sys.version_info < (3, 5):
+        # importlib.util.LazyLoader is new in 3.5
+        return None
+    parent, _, _ = name.rpartition('.')
+    if parent:
+        # only look for submodules of already imported packages; finding the
+        # spec would otherwise force the parent import.
+        parent_module = sys.modules.get(parent)
+        # note the type check avoids triggering loads of lazy modules
+        if type(parent_module) is not _ModuleType or not hasattr(parent_module, '__path__'):
+            return None
+    # imported here to keep them off the startup path of the default backend
+    import importlib.machinery
+    import importlib.util
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    # builtin and extension modules are created (thus loaded) up front
+    if spec is None or not isinstance(spec.loader, importlib.machinery.SourceFileLoader):
+        return None
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    if parent:
+        setattr(parent_module, name.rpartition('.')[2], module)
+    return module
+
+
+def lazyloader_demandload(*imports, **kwargs):
+    """Exactly like :py:func:`demandload`, but binds real module objects where possible.
+
+    Module targets are bound to modules created via
+    :py:class:`importlib.util.LazyLoader`; the module is executed on first
+    attribute access.  Since these are the real module objects (registered
+    in :py:data:`sys.modules`), references to them can be freely passed
+    around or imported by other modules, and accessing them doesn't go
+    through a proxy.
+
+    Targets that are already imported are bound directly, while attributes
+    of modules that aren't imported yet (and modules that can't be lazily
+    loaded such as builtin or extension modules) fall back to
+    :py:class:`Placeholder` objects, as do all targets on python versions
+    lacking LazyLoader (before 3.5).
+    """
+    scope = kwargs.pop('scope', sys._getframe(1).f_globals)
+    for source, target in parse_imports(imports):
+        obj = _lazy_module(source)
+        if obj is None:
+            base, _, attr = source.rpartition('.')
+            if base:
+                module = sys.modules.get(base)
+                # note the type check avoids triggering loads of lazy modules
+                if type(module) is _ModuleType:
+                    obj = getattr(module, attr, None)
+        if obj is None:
+            obj = Placeholder.load_namespace(scope, target, source)
+        scope[target] = obj
+
 
 def disabled_demandload(*imports, **kwargs):
     """Exactly like :py:func:`demandload` but does all imports immediately."""
@@ -309,8 +558,20 @@ def disabled_demand_compile_regexp(name, *args, **kwargs):
 if os.environ.get("SNAKEOIL_DEMANDLOAD_DISABLED", 'n').lower() in ('y', 'yes' '1', 'true'):
     demandload = disabled_demandload
     demand_compile_regexp = disabled_demand_compile_regexp
+elif os.environ.get("SNAKEOIL_DEMANDLOAD_BACKEND", 'placeholder').lower() == 'lazyloader':
+    demandload = lazyloader_demandload
+
+_audit_target = os.environ.get("SNAKEOIL_DEMANDLOAD_AUDIT", 'n')
+if _audit_target.lower() not in ('n', 'no', '0', 'false', ''):
+    import atexit
+    enable_audit()
+    if _audit_target.lower() in ('y', 'yes', '1', 'true'):
+        atexit.register(audit_report)
+    else:
+        atexit.register(_write_audit_log, _audit_target)
 
 demandload(
+    'json',
     'logging',
     're',
 )
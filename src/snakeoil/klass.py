@@ -13,7 +13,7 @@ __all__ = (
     "generic_equality", "reflective_hash", "inject_richcmp_methods_from_cmp",
     "static_attrgetter", "instance_attrgetter", "jit_attr", "jit_attr_none",
     "jit_attr_named", "jit_attr_ext_method", "alias_attr", "cached_hash",
-    "cached_property", "cached_property_named",
+    "cached_property", "cached_property_named", "Generation", "global_generation",
     "steal_docs", "immutable_instance", "inject_immutable_instance",
     "alias_method", "aliased", "alias", "patch",
 )
@@ -22,6 +22,8 @@ from collections import deque
 from functools import partial, wraps
 from importlib import import_module
 from operator import attrgetter
+from threading import Lock, get_ident
+from time import perf_counter
 
 from . import caching, compatibility
 from .currying import post_curry
@@ -108,16 +110,125 @@ def native_reflective_hash(attr):
     return __hash__
 
 
+class Generation(object):
+    """Counter used to invalidate cached jit attributes in bulk.
+
+    Values of jit attributes using a generation record its value when
+    they're generated, and are regenerated on access once it's been bumped;
+    instances aren't touched until then.
+
+    >>> from snakeoil.klass import Generation, jit_attr_named
+    >>> class foo(object):
+    ...   generation = Generation()
+    ...   @jit_attr_named('_attr', generation=generation)
+    ...   def attr(self):
+    ...     print("invoked")
+    ...     return 1
+    >>>
+    >>> obj = foo()
+    >>> print(obj.attr)
+    invoked
+    1
+    >>> print(obj.attr)
+    1
+    >>> foo.generation.bump()
+    >>> print(obj.attr)
+    invoked
+    1
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def bump(self):
+        """Invalidate all values cached in the current generation."""
+        self.value += 1
+
+
+# generation for attributes that should be invalidated together process wide
+global_generation = Generation()
+
+
+class _GenerationalValue(object):
+    """Value stored by generational jit attributes, tagged with its generation"""
+
+    __slots__ = ('generation', 'value')
+
+    def __init__(self, generation, value):
+        self.generation = generation
+        self.value = value
+
+
+class _JitAttrFlight(object):
+    """In progress computation of a locking jit attr; held by the computing thread"""
+
+    __slots__ = ('lock', 'owner')
+
+    def __init__(self):
+        self.lock = Lock()
+        self.lock.acquire()
+        self.owner = get_ident()
+
+
+# Locking jit attrs register in flight computations in a fixed table of
+# striped registries rather than carrying a lock per instance; stripe locks are
+# only held while registering, waiting happens on the flight itself.
+_JIT_ATTR_STRIPES = 64
+_jit_attr_stripes = tuple((Lock(), {}) for x in range(_JIT_ATTR_STRIPES))
+
+
+def _jit_attr_single_flight(attr, instance, obj_type, get):
+    """Compute a locking jit attr, waiting on any thread already computing it.
+
+    :param attr: jit attr descriptor being accessed
+    :param get: unlocked __get__ implementation of attr, invoked as
+        get(attr, instance, obj_type); it must recheck the cached value
+    """
+    key = (id(instance), attr.storage_attr)
+    stripe_lock, flights = _jit_attr_stripes[hash(key) & (_JIT_ATTR_STRIPES - 1)]
+    with stripe_lock:
+        flight = flights.get(key)
+        if flight is None:
+            flight = flights[key] = _JitAttrFlight()
+            leader = True
+        else:
+            leader = False
+    if leader:
+        try:
+            return get(attr, instance, obj_type)
+        finally:
+            with stripe_lock:
+                del flights[key]
+            flight.lock.release()
+    if flight.owner == get_ident():
+        # reentrant access while computing the attr; behave as if unlocked
+        return get(attr, instance, obj_type)
+    with flight.lock:
+        pass
+    # if the computing thread failed, this retries the computation
+    return attr.__get__(instance, obj_type)
+
+
 def _native_internal_jit_attr(
-        func, attr_name, singleton=None,
-        use_cls_setattr=False, use_singleton=True, doc=None):
+        func, attr_name, singleton=None, use_cls_setattr=False,
+        use_singleton=True, doc=None, generation=None, locking=False):
     """Object implementing the descriptor protocol for use in Just In Time access to attributes.
 
     Consumers should likely be using the :py:func:`jit_func` line of helper functions
     instead of directly consuming this.
     """
     doc = getattr(func, '__doc__', None) if doc is None else doc
-    kls = _raw_native_internal_jit_attr
+    if generation is None:
+        if locking:
+            kls = _raw_native_locking_jit_attr
+        else:
+            kls = _raw_native_internal_jit_attr
+    elif locking:
+        kls = _raw_native_locking_generational_jit_attr
+    else:
+        kls = _raw_native_generational_jit_attr
     class _native_internal_jit_attr(kls):
         __doc__ = doc
         __slots__ = ()
@@ -125,16 +236,18 @@ def _native_internal_jit_attr(
 
     return kls(
         func, attr_name, singleton=singleton, use_cls_setattr=use_cls_setattr,
-        use_singleton=use_singleton)
+        use_singleton=use_singleton, generation=generation, locking=locking)
 
 
 class _raw_native_internal_jit_attr(object):
     """See _native_internal_jit_attr; this is an implementation detail of that"""
 
-    __slots__ = ("storage_attr", "function", "_setter", "singleton", "use_singleton")
+    __slots__ = ("storage_attr", "function", "_setter", "singleton", "use_singleton",
+                 "generation", "__weakref__")
 
     def __init__(self, func, attr_name, singleton=None,
-                 use_cls_setattr=False, use_singleton=True):
+                 use_cls_setattr=False, use_singleton=True, generation=None,
+                 locking=False):
         """
         :param func: function to invoke upon first request for this content
         :param attr_name: attribute name to store the generated value in
@@ -148,7 +261,19 @@ class _raw_native_internal_jit_attr(object):
             (and this is enforced by a __setattr__), use_cls_setattr=True would be warranted
             to bypass that protection for caching the hash value
         :type use_cls_setattr: boolean
+        :param generation: :py:class:`Generation` instance; if given, the value
+            is stored along with the generation it was generated in, and is
+            regenerated once the generation is bumped.  singleton is unused
+            in this case.
+        :param locking: if True, concurrent threads accessing the uncached
+            attribute of the same instance compute it once, the others waiting
+            for the result.
+        :type locking: boolean
         """
+        if generation is not None and not use_singleton:
+            raise ValueError("generation requires use_singleton")
+        if locking and not use_singleton:
+            raise ValueError("locking requires use_singleton")
         if bool(use_cls_setattr):
             self._setter = setattr
         else:
@@ -157,6 +282,7 @@ class _raw_native_internal_jit_attr(object):
         self.storage_attr = attr_name
         self.singleton = singleton
         self.use_singleton = use_singleton
+        self.generation = generation
 
     def __get__(self, instance, obj_type):
         if instance is None:
@@ -174,6 +300,107 @@ class _raw_native_internal_jit_attr(object):
         return obj
 
 
+class _raw_native_generational_jit_attr(_raw_native_internal_jit_attr):
+    """See _native_internal_jit_attr; this is an implementation detail of that"""
+
+    __slots__ = ()
+
+    def __get__(self, instance, obj_type):
+        if instance is None:
+            return self
+        generation = self.generation.value
+        cached = getattr(instance, self.storage_attr, None)
+        if cached.__class__ is _GenerationalValue and cached.generation == generation:
+            return cached.value
+        obj = self.function(instance)
+        self._setter(instance, self.storage_attr, _GenerationalValue(generation, obj))
+        return obj
+
+
+class _raw_native_locking_jit_attr(_raw_native_internal_jit_attr):
+    """See _native_internal_jit_attr; this is an implementation detail of that"""
+
+    __slots__ = ()
+
+    def __get__(self, instance, obj_type):
+        if instance is None:
+            return self
+        obj = getattr(instance, self.storage_attr, self.singleton)
+        if obj is not self.singleton:
+            return obj
+        return _jit_attr_single_flight(
+            self, instance, obj_type, _raw_native_internal_jit_attr.__get__)
+
+
+class _raw_native_locking_generational_jit_attr(_raw_native_generational_jit_attr):
+    """See _native_internal_jit_attr; this is an implementation detail of that"""
+
+    __slots__ = ()
+
+    def __get__(self, instance, obj_type):
+        if instance is None:
+            return self
+        cached = getattr(instance, self.storage_attr, None)
+        if cached.__class__ is _GenerationalValue and cached.generation == self.generation.value:
+            return cached.value
+        return _jit_attr_single_flight(
+            self, instance, obj_type, _raw_native_generational_jit_attr.__get__)
+
+
+_native_jit_attr_get = _raw_native_internal_jit_attr.__get__
+_native_generational_jit_attr_get = _raw_native_generational_jit_attr.__get__
+
+
+def _stats_jit_attr_get(self, instance, obj_type):
+    """__get__ implementation for jit attrs recording computation statistics"""
+    if instance is None:
+        return self
+    if self.use_singleton:
+        obj = getattr(instance, self.storage_attr, self.singleton)
+        if obj is not self.singleton:
+            return obj
+    start = perf_counter()
+    obj = self.function(instance)
+    elapsed = perf_counter() - start
+    counters = caching._jit_attr_stats.setdefault(self, [0, 0.0])
+    counters[0] += 1
+    counters[1] += elapsed
+    self._setter(instance, self.storage_attr, obj)
+    return obj
+
+
+def _stats_generational_jit_attr_get(self, instance, obj_type):
+    """__get__ implementation for generational jit attrs recording computation statistics"""
+    if instance is None:
+        return self
+    generation = self.generation.value
+    cached = getattr(instance, self.storage_attr, None)
+    if cached.__class__ is _GenerationalValue and cached.generation == generation:
+        return cached.value
+    start = perf_counter()
+    obj = self.function(instance)
+    elapsed = perf_counter() - start
+    counters = caching._jit_attr_stats.setdefault(self, [0, 0.0])
+    counters[0] += 1
+    counters[1] += elapsed
+    self._setter(instance, self.storage_attr, _GenerationalValue(generation, obj))
+    return obj
+
+
+def _toggle_jit_attr_stats(enabled):
+    # swapped in (and out) at the class level so disabled stats cost nothing
+    if enabled:
+        _raw_native_internal_jit_attr.__get__ = _stats_jit_attr_get
+        _raw_native_generational_jit_attr.__get__ = _stats_generational_jit_attr_get
+    else:
+        _raw_native_internal_jit_attr.__get__ = _native_jit_attr_get
+        _raw_native_generational_jit_attr.__get__ = _native_generational_jit_attr_get
+
+caching._stats_toggles.append(_toggle_jit_attr_stats)
+if caching._stats_enabled:
+    _toggle_jit_attr_stats(True)
+
+
 try:
     # pylint: disable=unused-import
     from ._klass import (
@@ -383,7 +610,18 @@ class _singleton_kls(object):
 
 _uncached_singleton = _singleton_kls
 
-def jit_attr(func, kls=_internal_jit_attr, uncached_val=_uncached_singleton):
+def _jit_attr_options(generation=None, locking=False):
+    # only pass non-default options so custom kls implementations that
+    # predate them keep working
+    options = {}
+    if generation is not None:
+        options['generation'] = generation
+    if locking:
+        options['locking'] = True
+    return options
+
+def jit_attr(func, kls=_internal_jit_attr, uncached_val=_uncached_singleton,
+             generation=None, locking=False):
     """
     decorator to JIT generate, and cache the wrapped functions result in
     '_' + func.__name__ on the instance.
@@ -394,10 +632,15 @@ def jit_attr(func, kls=_internal_jit_attr, uncached_val=_uncached_singleton):
     :param uncached_val: the value to treat as missing/force regeneration
         when accessing the instance.  Note this normally defaults to a singleton
         that will not be in use anywhere else.
+    :param generation: optional :py:class:`Generation` instance that
+        invalidates the cached value when bumped
+    :param locking: if True, the function is invoked only once per instance
+        when multiple threads access the attribute concurrently
     :return: functor implementing the described behaviour
     """
     attr_name = "_%s" % func.__name__
-    return kls(func, attr_name, uncached_val, False)
+    return kls(func, attr_name, uncached_val, False,
+               **_jit_attr_options(generation, locking))
 
 def jit_attr_none(func, kls=_internal_jit_attr):
     """
@@ -411,18 +654,20 @@ def jit_attr_none(func, kls=_internal_jit_attr):
     return jit_attr(func, kls=kls, uncached_val=None)
 
 def jit_attr_named(stored_attr_name, use_cls_setattr=False, kls=_internal_jit_attr,
-                   uncached_val=_uncached_singleton):
+                   uncached_val=_uncached_singleton, generation=None, locking=False):
     """
     Version of :py:func:`jit_attr` decorator that allows for explicit control over the
     attribute name used to store the cache value.
 
     See :py:class:`_internal_jit_attr` for documentation of the misc params.
     """
-    return post_curry(kls, stored_attr_name, uncached_val, use_cls_setattr)
+    return post_curry(kls, stored_attr_name, uncached_val, use_cls_setattr,
+                      **_jit_attr_options(generation, locking))
 
 def jit_attr_ext_method(func_name, stored_attr_name,
                         use_cls_setattr=False, kls=_internal_jit_attr,
-                        uncached_val=_uncached_singleton):
+                        uncached_val=_uncached_singleton, generation=None,
+                        locking=False):
     """
     Decorator handing maximal control of attribute JIT'ing to the invoker.
 
@@ -432,7 +677,8 @@ def jit_attr_ext_method(func_name, stored_attr_name,
     """
 
     return kls(alias_method(func_name), stored_attr_name,
-               uncached_val, use_cls_setattr)
+               uncached_val, use_cls_setattr,
+               **_jit_attr_options(generation, locking))
 
 
 def cached_property(func, kls=_internal_jit_attr, use_cls_setattr=False):
@@ -9,12 +9,16 @@ __all__ = (
     "DictMixin", "LazyValDict", "LazyFullValLoadDict",
     "ProtectedDict", "ImmutableDict", "IndeterminantDict",
     "defaultdictkey", "AttrAccessible", "StackedDict",
-    "make_SlottedDict_kls", "ProxiedAttrs",
+    "make_SlottedDict_kls", "ProxiedAttrs", "RecordTable",
+    "VersionedDict", "IndexedStackedDict", "CopyOnWriteDict",
 )
 
-from collections import defaultdict
-from itertools import chain, filterfalse
+from array import array
+from collections import OrderedDict, defaultdict
+from functools import lru_cache, partial
+from itertools import chain, filterfalse, repeat
 import operator
+from weakref import WeakValueDictionary, ref
 
 from .klass import get, contains, steal_docs
 
@@ -302,6 +306,171 @@ class ProtectedDict(DictMixin):
                                    key in self.orig)
 
 
+# markers for missing and deleted keys in CopyOnWriteDict layers
+_missing = object()
+_deleted = object()
+
+
+class _CowLayer(object):
+    """Frozen changes shared between :py:class:`CopyOnWriteDict` snapshots."""
+
+    __slots__ = ("changes", "parent", "depth", "_merged")
+
+    def __init__(self, changes, parent=None):
+        self.changes = changes
+        self.parent = parent
+        self.depth = 1 if parent is None else parent.depth + 1
+        self._merged = None
+
+    def merged(self):
+        """Return the combined changes of this layer and its parents."""
+        if self._merged is None:
+            if self.parent is None:
+                self._merged = self.changes
+            else:
+                merged = dict(self.parent.merged())
+                merged.update(self.changes)
+                self._merged = merged
+        return self._merged
+
+
+class CopyOnWriteDict(DictMixin):
+    """Mapping wrapper storing changes to a dict without modifying the original.
+
+    This is a drop-in replacement for :py:class:`ProtectedDict` that supports
+    O(1) snapshots via :py:meth:`snapshot`: pending changes are frozen into a
+    layer shared between the original and the snapshot, with new changes
+    going into separate dicts.  Layers are compacted once more than
+    ``max_depth`` are stacked, bounding lookup cost.
+    """
+
+    __slots__ = ("orig", "_layer", "_changes")
+
+    max_depth = 8
+
+    def __init__(self, orig):
+        """
+        :param orig: original dictionary to wrap
+        """
+        self.orig = orig
+        self._layer = None
+        self._changes = {}
+
+    def _lookup(self, key):
+        value = self._changes.get(key, _missing)
+        if value is _missing:
+            layer = self._layer
+            while layer is not None:
+                value = layer.changes.get(key, _missing)
+                if value is not _missing:
+                    break
+                layer = layer.parent
+            else:
+                try:
+                    return self.orig[key]
+                except KeyError:
+                    return _missing
+        if value is _deleted:
+            return _missing
+        return value
+
+    def _merged_changes(self):
+        if self._layer is None:
+            return self._changes
+        merged = self._layer.merged()
+        if self._changes:
+            merged = dict(merged)
+            merged.update(self._changes)
+        return merged
+
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is _missing:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, val):
+        self._changes[key] = val
+
+    def __delitem__(self, key):
+        if self._lookup(key) is _missing:
+            raise KeyError(key)
+        self._changes[key] = _deleted
+
+    def __contains__(self, key):
+        return self._lookup(key) is not _missing
+
+    def keys(self):
+        changes = self._merged_changes()
+        for k, v in changes.items():
+            if v is not _deleted:
+                yield k
+        for k in self.orig.keys():
+            if k not in changes:
+                yield k
+
+    @property
+    def new(self):
+        """Mapping of keys set since wrapping the original dict to their values."""
+        return {k: v for k, v in self._merged_changes().items() if v is not _deleted}
+
+    @property
+    def blacklist(self):
+        """Mapping of keys removed since wrapping the original dict."""
+        return {k: True for k, v in self._merged_changes().items() if v is _deleted}
+
+    def snapshot(self):
+        """Return an independent copy of this mapping in O(1)."""
+        if self._changes:
+            layer = _CowLayer(self._changes, self._layer)
+            if layer.depth > self.max_depth:
+                # compact the layers into a new root
+                layer = _CowLayer(dict(layer.merged()))
+            self._layer = layer
+            self._changes = {}
+        obj = self.__class__.__new__(self.__class__)
+        obj.orig = self.orig
+        obj._layer = self._layer
+        obj._changes = {}
+        return obj
+
+    copy = snapshot
+
+    def diff(self, other):
+        """Return the keys with differing values between this and another mapping.
+
+        Keys missing in one mapping but not the other are included.  For
+        snapshots of the same original, only keys changed since they diverged
+        are compared.
+
+        :param other: :py:class:`CopyOnWriteDict` instance
+        :return: set of keys
+        """
+        if self.orig is not other.orig:
+            keys = set(self).union(other)
+        else:
+            keys = set(self._changes).union(other._changes)
+            a, b = self._layer, other._layer
+            # walk both layer chains up to their common ancestor
+            while a is not b:
+                if b is None or (a is not None and a.depth >= b.depth):
+                    keys.update(a.changes)
+                    a = a.parent
+                else:
+                    keys.update(b.changes)
+                    b = b.parent
+
+        changed = set()
+        for k in keys:
+            x, y = self._lookup(k), other._lookup(k)
+            if x is _missing or y is _missing:
+                if x is not y:
+                    changed.add(k)
+            elif x != y:
+                changed.add(k)
+        return changed
+
+
 class ImmutableDict(dict):
     """Immutable Dict, unchangeable after instantiating.
 
@@ -395,6 +564,184 @@ class StackedDict(DictMixin):
     __delitem__ = clear = __setitem__
 
 
+class VersionedDict(dict):
+    """dict tracking modifications for use with :py:class:`IndexedStackedDict`.
+
+    Watching instances have their caches invalidated when keys are added or
+    removed.
+    """
+
+    __slots__ = ("_watchers", "__weakref__")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._watchers = None
+
+    def _watch(self, watcher):
+        if self._watchers is None:
+            # watchers aren't necessarily hashable, key them by id
+            self._watchers = WeakValueDictionary()
+        self._watchers[id(watcher)] = watcher
+
+    def _modified(self):
+        if self._watchers:
+            for watcher in self._watchers.values():
+                watcher._index = None
+
+    def __setitem__(self, key, value):
+        if key in self:
+            # value changes don't affect watchers
+            dict.__setitem__(self, key, value)
+        else:
+            dict.__setitem__(self, key, value)
+            self._modified()
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._modified()
+
+    def __ior__(self, other):
+        # dict only supports |= on 3.9 and up
+        self.update(other)
+        return self
+
+    def pop(self, key, *a):
+        if key in self:
+            value = dict.pop(self, key)
+            self._modified()
+            return value
+        return dict.pop(self, key, *a)
+
+    def popitem(self):
+        item = dict.popitem(self)
+        self._modified()
+        return item
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self._modified()
+
+    def clear(self):
+        dict.clear(self)
+        self._modified()
+
+
+class IndexedStackedDict(StackedDict):
+    """:py:class:`StackedDict` with a merged index of keys to their layers.
+
+    Lookups, membership tests, and key iteration use the index instead of
+    probing every layer. The index is only used if all layers are
+    :py:class:`VersionedDict` instances, which invalidate it when keys are
+    added to or removed from them; otherwise this behaves the same as
+    :py:class:`StackedDict`.
+    """
+
+    def __init__(self, *dicts):
+        super().__init__(*dicts)
+        self._index = None
+        self._keys = None
+        self._indexed = all(isinstance(x, VersionedDict) for x in dicts)
+        if self._indexed:
+            for x in dicts:
+                x._watch(self)
+
+    def _build_index(self):
+        # the key order is tracked separately since dicts aren't ordered
+        # before 3.7; the updates map keys to the first layer providing them
+        self._keys = list(OrderedDict.fromkeys(chain(*self._dicts)))
+        index = {}
+        for x in reversed(self._dicts):
+            index.update(zip(x, repeat(x)))
+        self._index = index
+        return index
+
+    def __getitem__(self, key):
+        index = self._index
+        if index is None:
+            if not self._indexed:
+                return StackedDict.__getitem__(self, key)
+            index = self._build_index()
+        return index[key][key]
+
+    def keys(self):
+        index = self._index
+        if index is None:
+            if not self._indexed:
+                return StackedDict.keys(self)
+            self._build_index()
+        return iter(self._keys)
+
+    def __contains__(self, key):
+        index = self._index
+        if index is None:
+            if not self._indexed:
+                return StackedDict.__contains__(self, key)
+            index = self._build_index()
+        return key in index
+
+    def __len__(self):
+        index = self._index
+        if index is None:
+            if not self._indexed:
+                return StackedDict.__len__(self)
+            index = self._build_index()
+        return len(index)
+
+
+class _SharedFolder(object):
+    """Shared folding cache, registered for as long as a folding dict holds it."""
+
+    __slots__ = ('fold', '__weakref__')
+
+    def __init__(self, fold):
+        self.fold = fold
+
+
+# (folder id, cache size) -> weakref to a _SharedFolder.  Folders are keyed by
+# id since they aren't necessarily hashable (bound methods hash their instance
+# before 3.8); the holder keeps the folder alive, so the id stays unique for as
+# long as the entry exists.  lru_cache wrappers can't be weakly referenced
+# before 3.9, thus the holder.  Entries (and with them the folder) are dropped
+# once no folding dict uses them anymore.
+_folder_caches = {}
+
+
+def _drop_folder_cache(key, holder_ref):
+    # the entry may have been replaced by a fresh cache in the meantime
+    if _folder_caches.get(key) is holder_ref:
+        del _folder_caches[key]
+
+
+def _cached_folder(folder, cache_size, shared, fresh=False):
+    """Return a key folding function memoized by a bounded LRU cache.
+
+    :param cache_size: maximum number of cached keys, disables caching if 0
+    :param shared: whether to use a cache shared by all callers using the
+        same folding function object and cache size
+    :param fresh: if shared, replace the current shared cache with an empty
+        one for this and later callers; existing users keep the old cache
+    :return: the folding function, and an object callers must keep a
+        reference to while using a shared cache (None otherwise)
+    """
+    if not cache_size:
+        return folder, None
+    if not shared:
+        return lru_cache(cache_size)(folder), None
+    key = (id(folder), cache_size)
+    holder_ref = None if fresh else _folder_caches.get(key)
+    holder = None if holder_ref is None else holder_ref()
+    if holder is None:
+        holder = _SharedFolder(lru_cache(cache_size)(folder))
+        _folder_caches[key] = ref(holder, partial(_drop_folder_cache, key))
+    return holder.fold, holder
+
+
 class PreservingFoldingDict(DictMixin):
     """dict that uses a 'folder' function when looking up keys.
 
@@ -405,15 +752,27 @@ class PreservingFoldingDict(DictMixin):
     This version returns the original 'unfolded' key.
     """
 
-    def __init__(self, folder, sourcedict=None):
-        self._folder = folder
-        # dict mapping folded keys to (original key, value)
+    def __init__(self, folder, sourcedict=None, cache_size=0, shared_cache=False):
+        """
+        :param folder: function folding keys
+        :param sourcedict: mapping or iterable of key, value pairs to add
+        :param cache_size: if nonzero, cache up to this many folded keys in
+            a LRU cache, requiring keys to be hashable
+        :param shared_cache: share the cache with other folding dicts using
+            the same folder and cache size
+        """
+        self._raw_folder = folder
+        self._cache_args = (cache_size, shared_cache)
+        self._folder, self._shared_folder = _cached_folder(
+            folder, cache_size, shared_cache)
+        # dict mapping folded keys to (original key, value) pairs
         self._dict = {}
         if sourcedict is not None:
             self.update(sourcedict)
 
     def copy(self):
-        return PreservingFoldingDict(self._folder, iter(self.items()))
+        return PreservingFoldingDict(
+            self._raw_folder, iter(self.items()), *self._cache_args)
 
     def refold(self, folder=None):
         """Use the remembered original keys to update to a new folder.
@@ -421,13 +780,27 @@ class PreservingFoldingDict(DictMixin):
         If folder is None, keep the current folding function (this
         is useful if the folding function uses external data and that
         data changed).
+
+        Only entries whose folded key changed are moved; if several keys
+        now fold to the same key, the moved entries take precedence.
         """
-        if folder is not None:
-            self._folder = folder
-        oldDict = self._dict
-        self._dict = {}
-        for key, value in oldDict.values():
-            self._dict[self._folder(key)] = (key, value)
+        if folder is None:
+            if self._folder is not self._raw_folder:
+                # the cached folds are stale; other dicts sharing the cache
+                # are left alone
+                cache_size, shared = self._cache_args
+                self._folder, self._shared_folder = _cached_folder(
+                    self._raw_folder, cache_size, shared, fresh=True)
+        else:
+            self._raw_folder = folder
+            self._folder, self._shared_folder = _cached_folder(
+                folder, *self._cache_args)
+        fold = self._folder
+        d = self._dict
+        moved = [(folded, fold(entry[0])) for folded, entry in d.items()]
+        entries = [(new, d.pop(old)) for old, new in moved if old != new]
+        for folded, entry in entries:
+            d[folded] = entry
 
     def __getitem__(self, key):
         return self._dict[self._folder(key)][1]
@@ -469,15 +842,27 @@ class NonPreservingFoldingDict(DictMixin):
     This version returns the 'folded' key.
     """
 
-    def __init__(self, folder, sourcedict=None):
-        self._folder = folder
+    def __init__(self, folder, sourcedict=None, cache_size=0, shared_cache=False):
+        """
+        :param folder: function folding keys
+        :param sourcedict: mapping or iterable of key, value pairs to add
+        :param cache_size: if nonzero, cache up to this many folded keys in
+            a LRU cache, requiring keys to be hashable
+        :param shared_cache: share the cache with other folding dicts using
+            the same folder and cache size
+        """
+        self._raw_folder = folder
+        self._cache_args = (cache_size, shared_cache)
+        self._folder, self._shared_folder = _cached_folder(
+            folder, cache_size, shared_cache)
         # dict mapping folded keys to values.
         self._dict = {}
         if sourcedict is not None:
             self.update(sourcedict)
 
     def copy(self):
-        return NonPreservingFoldingDict(self._folder, iter(self.items()))
+        return NonPreservingFoldingDict(
+            self._raw_folder, iter(self.items()), *self._cache_args)
 
     def __getitem__(self, key):
         return self._dict[self._folder(key)]
@@ -711,6 +1096,8 @@ except ImportError:
 
 
 slotted_dict_cache = {}
+# mangled names of the SlottedDict bookkeeping slots
+_slotted_dict_reserved = frozenset(('_SlottedDict__present', '_SlottedDict__count'))
 def make_SlottedDict_kls(keys):
     """Create a space efficient mapping class with a limited set of keys.
 
@@ -755,6 +1142,12 @@ def make_SlottedDict_kls(keys):
     differ for other python implementations or versions, although for cpython
     the stats above should hold +/- a couple of bites.
 
+    Instances also track which slots are set via a bitmap and a count, making
+    len() O(1) and iteration proportional to the number of keys set at a cost
+    of two extra slots per instance; see benchmarks/slotted_dict.py.  Those
+    bookkeeping slots are never exposed as keys, and the two names they use,
+    _SlottedDict__present and _SlottedDict__count, aren't allowed as keys.
+
     Finally, it's worth noting that the stats above are the minimal savings-
     via a side affect of the __slots__ the keys are automatically interned.
 
@@ -766,41 +1159,327 @@ def make_SlottedDict_kls(keys):
     new_keys = tuple(sorted(keys))
     o = slotted_dict_cache.get(new_keys, None)
     if o is None:
+        reserved = _slotted_dict_reserved.intersection(new_keys)
+        if reserved:
+            raise ValueError(
+                "reserved SlottedDict keys: %s" % ', '.join(sorted(reserved)))
+
         class SlottedDict(DictMixin):
-            __slots__ = new_keys
+            # bookkeeping slots are name mangled to keep them apart from keys
+            __slots__ = new_keys + ('__present', '__count')
             __externally_mutable__ = True
+            __slot_keys__ = new_keys
+            # bit flagging each key as set in __present
+            __slot_bits__ = {k: 1 << i for i, k in enumerate(new_keys)}
 
             def __init__(self, iterables=()):
+                self.__present = 0
+                self.__count = 0
                 if iterables:
                     self.update(iterables)
 
-            __setitem__ = attr_setitem
-            __getitem__ = attr_getitem
-            __delitem__ = attr_delitem
-            __contains__ = attr_contains
-            update = attr_update
-            pop = attr_pop
-            get = attr_get
+            def __getitem__(self, key):
+                bit = self.__slot_bits__.get(key)
+                if bit is None or not self.__present & bit:
+                    raise KeyError(key)
+                return getattr(self, key)
+
+            def __contains__(self, key):
+                bit = self.__slot_bits__.get(key)
+                return bit is not None and self.__present & bit != 0
+
+            def get(self, key, default=None):
+                bit = self.__slot_bits__.get(key)
+                if bit is None or not self.__present & bit:
+                    return default
+                return getattr(self, key)
+
+            def __setitem__(self, key, value):
+                bit = self.__slot_bits__.get(key)
+                if bit is None:
+                    # match the AttributeError raised for unknown slots
+                    raise AttributeError(
+                        "%r object has no attribute %r" % (self.__class__.__name__, key))
+                object.__setattr__(self, key, value)
+                if not self.__present & bit:
+                    self.__present |= bit
+                    self.__count += 1
+
+            def __delitem__(self, key):
+                bit = self.__slot_bits__.get(key)
+                if bit is None or not self.__present & bit:
+                    raise KeyError(key)
+                object.__delattr__(self, key)
+                self.__present ^= bit
+                self.__count -= 1
+
+            def pop(self, key, *a):
+                if len(a) > 1:
+                    raise TypeError("pop accepts 1 or 2 args only")
+                bit = self.__slot_bits__.get(key)
+                if bit is None or not self.__present & bit:
+                    if a:
+                        return a[0]
+                    raise KeyError(key)
+                o = getattr(self, key)
+                del self[key]
+                return o
+
+            def update(self, iterable):
+                for k, v in iterable:
+                    self[k] = v
 
             def __iter__(self):
-                for k in self.__slots__:
-                    if hasattr(self, k):
-                        yield k
+                keys = self.__slot_keys__
+                # reversed, so string offsets match bit indexes
+                bits = bin(self.__present)[:1:-1]
+                i = bits.find('1')
+                while i != -1:
+                    yield keys[i]
+                    i = bits.find('1', i + 1)
 
             def keys(self):
                 return iter(self)
 
             def values(self):
                 for k in self:
-                    yield self[k]
+                    yield getattr(self, k)
 
-            def clear(self):
+            def items(self):
                 for k in self:
-                    del self[k]
+                    yield k, getattr(self, k)
+
+            def clear(self):
+                for k in list(self):
+                    object.__delattr__(self, k)
+                self.__present = 0
+                self.__count = 0
 
             def __len__(self):
-                return len(list(self.keys()))
+                return self.__count
+
+            def __copy__(self):
+                return self.__class__(self.items())
+
+            def __reduce__(self):
+                return (_rebuild_SlottedDict, (self.__slot_keys__, list(self.items())))
 
         o = SlottedDict
         slotted_dict_cache[new_keys] = o
     return o
+
+
+def _rebuild_SlottedDict(keys, items):
+    """Unpickle a :py:func:`make_SlottedDict_kls` instance."""
+    return make_SlottedDict_kls(keys)(items)
+
+
+class _RecordView(DictMixin):
+    """Mapping view of a single row in a :py:class:`RecordTable`."""
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key):
+        value = self._table._get(self._row, key)
+        if value is _sentinel:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._table._set(self._row, key, value)
+
+    def __delitem__(self, key):
+        if self._table._get(self._row, key) is _sentinel:
+            raise KeyError(key)
+        self._table._set(self._row, key, _sentinel)
+
+    def keys(self):
+        table, row = self._table, self._row
+        return (k for k in table.keys if table._get(row, k) is not _sentinel)
+
+    def __contains__(self, key):
+        try:
+            return self._table._get(self._row, key) is not _sentinel
+        except KeyError:
+            return False
+
+    def __len__(self):
+        return sum(1 for _ in self.keys())
+
+    def __repr__(self):
+        return '<%s row %i: %r>' % (self.__class__.__name__, self._row, dict(self.items()))
+
+
+class RecordTable(object):
+    """Columnar store for large numbers of records sharing a set of keys.
+
+    Instead of a mapping object per record, values are stored in a list per
+    key and rows are accessed through lightweight mapping views implementing
+    the :py:class:`DictMixin` protocol, created on demand.
+
+    Columns with a limited set of distinct values can be dictionary encoded,
+    storing each distinct value once along with a compact array of integer
+    codes per row; this also interns the values.
+
+    Records can only be appended, row indexes are stable.
+
+    >>> from snakeoil.mappings import RecordTable
+    >>> table = RecordTable(["name", "slot"], encoded=["slot"])
+    >>> table.append({"name": "foo", "slot": "0"})
+    0
+    >>> table.extend_columns({"name": ["bar", "baz"], "slot": ["0", "1"]})
+    >>> table.column("slot")
+    ['0', '0', '1']
+    >>> table[2]["name"]
+    'baz'
+    >>> table.select("slot", "0")
+    [0, 1]
+    """
+
+    __slots__ = ("keys", "_columns", "_encodings", "_len")
+
+    def __init__(self, keys, encoded=()):
+        """
+        :param keys: sequence of keys records may have
+        :param encoded: subset of ``keys`` to dictionary encode
+        """
+        self.keys = tuple(keys)
+        encoded = frozenset(encoded)
+        unknown = encoded.difference(self.keys)
+        if unknown:
+            raise ValueError("unknown encoded keys: %s" % ', '.join(sorted(map(str, unknown))))
+        self._columns = {}
+        # map of encoded keys to their lists of distinct values and reverse
+        # mappings of values to codes; code 0 is reserved for unset values
+        self._encodings = {}
+        for k in self.keys:
+            if k in encoded:
+                self._columns[k] = array('i')
+                self._encodings[k] = ([_sentinel], {})
+            else:
+                self._columns[k] = []
+        self._len = 0
+
+    def _check_keys(self, keys):
+        unknown = set(keys).difference(self._columns)
+        if unknown:
+            raise ValueError("unknown keys: %s" % ', '.join(sorted(map(str, unknown))))
+
+    def _encode(self, key, value):
+        values, codes = self._encodings[key]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+    def _get(self, row, key):
+        """Return the value of a key for a row, _sentinel if it's unset."""
+        value = self._columns[key][row]
+        encoding = self._encodings.get(key)
+        if encoding is not None:
+            return encoding[0][value]
+        return value
+
+    def _set(self, row, key, value):
+        if key not in self._columns:
+            raise KeyError(key)
+        if key in self._encodings:
+            value = 0 if value is _sentinel else self._encode(key, value)
+        self._columns[key][row] = value
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, row):
+        """Return a mapping view of a given row."""
+        if row < 0:
+            row += self._len
+        if not 0 <= row < self._len:
+            raise IndexError(row)
+        return _RecordView(self, row)
+
+    def __iter__(self):
+        return map(partial(_RecordView, self), range(self._len))
+
+    def append(self, record):
+        """Add a record.
+
+        :param record: mapping of keys to values
+        :return: row index of the record
+        :raises ValueError: if the record has keys the table doesn't
+        """
+        self._check_keys(record)
+        # encode the whole row first so a failure doesn't leave it partially added
+        row = []
+        for k, column in self._columns.items():
+            value = record.get(k, _sentinel)
+            if k in self._encodings:
+                value = 0 if value is _sentinel else self._encode(k, value)
+            row.append((column, value))
+        for column, value in row:
+            column.append(value)
+        self._len += 1
+        return self._len - 1
+
+    def extend(self, records):
+        """Add multiple records, see :py:meth:`append`."""
+        for record in records:
+            self.append(record)
+
+    def extend_columns(self, columns):
+        """Bulk add records from columns of values.
+
+        :param columns: mapping of keys to equal length sequences of values,
+            keys that aren't specified are unset for the added records
+        :raises ValueError: if there are keys the table doesn't have or the
+            columns differ in length
+        """
+        self._check_keys(columns)
+        columns = {k: list(v) for k, v in columns.items()}
+        lengths = set(map(len, columns.values()))
+        if len(lengths) > 1:
+            raise ValueError("columns must be of equal length")
+        count = lengths.pop() if lengths else 0
+
+        # encode everything first so a failure doesn't leave a partial update
+        new = []
+        for k, column in self._columns.items():
+            values = columns.get(k)
+            if values is None:
+                values = repeat(0 if k in self._encodings else _sentinel, count)
+            elif k in self._encodings:
+                values = list(map(partial(self._encode, k), values))
+            new.append((column, values))
+        for column, values in new:
+            column.extend(values)
+        self._len += count
+
+    def column(self, key, default=None):
+        """Return all values for a given key without creating row views.
+
+        :param default: value to use for records without the key
+        :return: list of values in row order
+        """
+        column = self._columns[key]
+        encoding = self._encodings.get(key)
+        if encoding is not None:
+            values = list(encoding[0])
+            values[0] = default
+            return list(map(values.__getitem__, column))
+        return [default if v is _sentinel else v for v in column]
+
+    def select(self, key, value):
+        """Return the row indexes of records with a given value for a key."""
+        column = self._columns[key]
+        encoding = self._encodings.get(key)
+        if encoding is not None:
+            value = encoding[1].get(value)
+            if value is None:
+                return []
+            return [i for i, code in enumerate(column) if code == value]
+        return [i for i, v in enumerate(column) if v is not _sentinel and v == value]
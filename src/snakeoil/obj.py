@@ -78,10 +78,27 @@ try to proxy builtin objects like tuples, lists, dicts, sets, etc.
 
 
 
-__all__ = ("DelayedInstantiation", "DelayedInstantiation_kls", "make_kls", "popattr")
+__all__ = (
+    "DelayedInstantiation", "DelayedInstantiation_kls", "make_kls", "materialize",
+    "popattr",
+)
+
+import os
 
 from . import klass
+from .demandload import demandload
+
+demandload('concurrent.futures:ThreadPoolExecutor')
 
+try:
+    from ._obj import DelayedObjectBase as _proxy_base, forward_method
+    _native_proxy = True
+except ImportError:
+    _proxy_base = object
+    _native_proxy = False
+
+    def forward_method(name, doc=None):
+        return klass.alias_method("__obj__.%s" % (name,), doc=doc)
 
 # For our proxy, we have two sets of descriptors-
 # common, "always there" descriptors that come from
@@ -111,7 +128,7 @@ def popattr(obj, name, default=klass._sentinel):
         getattr(obj, name)
 
 
-class BaseDelayedObject(object):
+class BaseDelayedObject(_proxy_base):
     """
     Base proxying object
 
@@ -119,6 +136,10 @@ class BaseDelayedObject(object):
     it's basically a base object proxy, defined specifically to avoid having
     to generate a custom class for object derivatives that don't modify slotted
     methods.
+
+    When the native extension is available, attribute access and special
+    method lookups are forwarded at the C level once the proxied object
+    exists.
     """
 
     def __new__(cls, desired_kls, func, *a, **kwd):
@@ -128,26 +149,27 @@ class BaseDelayedObject(object):
 
         All other args and keywords are passed to func during instantiation
         """
-        o = object.__new__(cls)
+        o = _proxy_base.__new__(cls)
         object.__setattr__(o, "__delayed__", (desired_kls, func, a, kwd))
         object.__setattr__(o, "__obj__", None)
         return o
 
-    def __getattribute__(self, attr):
-        obj = object.__getattribute__(self, "__obj__")
-        if obj is None:
-            if attr == '__class__':
-                return object.__getattribute__(self, "__delayed__")[0]
-            elif attr == '__doc__':
-                kls = object.__getattribute__(self, "__delayed__")[0]
-                return getattr(kls, '__doc__', None)
+    if not _native_proxy:
+        def __getattribute__(self, attr):
+            obj = object.__getattribute__(self, "__obj__")
+            if obj is None:
+                if attr == '__class__':
+                    return object.__getattribute__(self, "__delayed__")[0]
+                elif attr == '__doc__':
+                    kls = object.__getattribute__(self, "__delayed__")[0]
+                    return getattr(kls, '__doc__', None)
 
-            obj = object.__getattribute__(self, '__instantiate_proxy_instance__')()
+                obj = object.__getattribute__(self, '__instantiate_proxy_instance__')()
 
-        if attr == "__obj__":
-            # special casing for klass.alias_method
-            return obj
-        return getattr(obj, attr)
+            if attr == "__obj__":
+                # special casing for klass.alias_method
+                return obj
+            return getattr(obj, attr)
 
     def __instantiate_proxy_instance__(self):
         delayed = object.__getattribute__(self, "__delayed__")
@@ -158,9 +180,8 @@ class BaseDelayedObject(object):
 
     # special case the normal descriptors
     for x in base_kls_descriptors:
-        locals()[x] = klass.alias_method(
-            "__obj__.%s" % (x,),
-            doc=getattr(getattr(object, x), '__doc__', None))
+        locals()[x] = forward_method(
+            x, doc=getattr(getattr(object, x), '__doc__', None))
     # pylint: disable=undefined-loop-variable
     del x
 
@@ -198,8 +219,7 @@ kls_descriptors = frozenset([
 
 
 kls_descriptors = kls_descriptors.difference(base_kls_descriptors)
-descriptor_overrides = {k: klass.alias_method("__obj__.%s" % (k,))
-                        for k in kls_descriptors}
+descriptor_overrides = {k: forward_method(k) for k in kls_descriptors}
 
 
 _method_cache = {}
@@ -254,3 +274,68 @@ def DelayedInstantiation(resultant_kls, func, *a, **kwd):
         o = make_kls(resultant_kls)
         _class_cache[resultant_kls] = o
     return o(resultant_kls, func, *a, **kwd)
+
+
+def _materialize_proxy(proxy):
+    try:
+        return object.__getattribute__(proxy, '__instantiate_proxy_instance__')(), None
+    except Exception as e:
+        return None, e
+
+
+def materialize(proxies, max_workers=None, return_exceptions=False):
+    """Instantiate a collection of delayed instantiation proxies concurrently.
+
+    Useful for prefetching proxies with I/O bound instantiation when all of
+    them are going to be used anyway.  Objects that aren't proxies and proxies
+    that were already instantiated are passed through.  Proxies that fail to
+    instantiate are left as is, so accessing them later retries instantiation.
+
+    Note that the proxies shouldn't be accessed from other threads while this
+    is running.
+
+    :param proxies: iterable of objects
+    :param max_workers: maximum number of threads to use, defaults to five
+        per CPU, capped by the number of proxies to instantiate
+    :param return_exceptions: if True, exceptions raised while instantiating
+        proxies are returned in place of their objects, otherwise the
+        exception of the first failed proxy is raised once all proxies have
+        been handled
+    :return: list of the proxied objects, in the same order as ``proxies``
+    """
+    results = list(proxies)
+    # map of proxy ids to the proxy and its indexes, handling duplicates
+    pending = {}
+    for i, o in enumerate(results):
+        if issubclass(type(o), BaseDelayedObject):
+            obj = object.__getattribute__(o, '__obj__')
+            if obj is None:
+                pending.setdefault(id(o), (o, []))[1].append(i)
+            else:
+                results[i] = obj
+
+    if not pending:
+        return results
+
+    pending = list(pending.values())
+    if max_workers is None:
+        # ThreadPoolExecutor only picks a default itself on 3.5 and up
+        max_workers = min(len(pending), (os.cpu_count() or 1) * 5)
+    if max_workers == 1 or len(pending) == 1:
+        materialized = [_materialize_proxy(proxy) for proxy, _ in pending]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            materialized = list(executor.map(
+                _materialize_proxy, (proxy for proxy, _ in pending)))
+
+    errors = []
+    for (_, indexes), (obj, exc) in zip(pending, materialized):
+        if exc is not None:
+            errors.append((indexes[0], exc))
+            obj = exc
+        for i in indexes:
+            results[i] = obj
+
+    if errors and not return_exceptions:
+        raise min(errors, key=lambda x: x[0])[1]
+    return results
@@ -5,15 +5,24 @@
 
 __all__ = (
     'unstable_unique', 'stable_unique', 'iter_stable_unique',
-    'iflatten_instance', 'iflatten_func', 'ChainedLists', 'predicate_split',
-    'namedtuple', 'split_negations',
+    'iflatten_instance', 'iflatten_func', 'flatten_to_list',
+    'ChainedLists', 'IndexedChainedLists',
+    'predicate_split',
+    'namedtuple', 'split_negations', 'split_elements',
+    'split_negations_string', 'split_elements_string',
 )
 
+from bisect import bisect_right
+from collections import OrderedDict
+from functools import lru_cache, partial
 from operator import itemgetter
+from sys import intern
 
 from .iterables import expandable_chain
 from .klass import steal_docs
 
+_sentinel = object()
+
 
 def unstable_unique(sequence):
     """Given a sequence, return a list of the unique items without preserving ordering."""
@@ -41,10 +50,15 @@ def unstable_unique(sequence):
         lasti = i = 1
         while i < n:
             if t[i] != last:
+                if not last < t[i]:
+                    # partially ordered items (e.g. sets), duplicates may
+                    # not be adjacent
+                    break
                 t[lasti] = last = t[i]
                 lasti += 1
             i += 1
-        return t[:lasti]
+        else:
+            return t[:lasti]
 
     # blah.  back to original portage.unique_array
     u = []
@@ -60,7 +74,35 @@ def stable_unique(iterable):
     For performance reasons, only use this if you really do need to preserve
     the ordering.
     """
-    return list(iter_stable_unique(iterable))
+    if not isinstance(iterable, (list, tuple)):
+        iterable = list(iterable)
+    # collapse the hashable case to C; plain dicts only guarantee insertion
+    # order from python 3.7
+    try:
+        return list(OrderedDict.fromkeys(iterable))
+    except TypeError:
+        pass
+
+    # unhashable items, try sorting indexes by item to find the first
+    # instance of each item
+    try:
+        indexes = sorted(range(len(iterable)), key=iterable.__getitem__)
+    except TypeError:
+        return list(iter_stable_unique(iterable))
+    unique = []
+    last = _sentinel
+    for i in indexes:
+        x = iterable[i]
+        if last is _sentinel or x != last:
+            if last is not _sentinel and not last < x:
+                # partially ordered items (e.g. sets), duplicates may not
+                # be adjacent
+                return list(iter_stable_unique(iterable))
+            # stable sorting means this is the first instance of the item
+            unique.append(i)
+            last = x
+    unique.sort()
+    return [iterable[i] for i in unique]
 
 
 def iter_stable_unique(iterable):
@@ -81,8 +123,10 @@ def iter_stable_unique(iterable):
         try:
             for x in iterable:
                 if x not in s:
-                    yield x
+                    # add before yielding, set membership tests accept sets
+                    # while adding them fails
                     sadd(x)
+                    yield x
         except TypeError:
             # unhashable item...
             if x not in sl:
@@ -139,16 +183,98 @@ def native_iflatten_func(l, skip_func):
         pass
 
 
+def native_flatten_to_list(l, skip_flattening=(str, bytes)):
+    """collapse [[1],2] into [1,2], returning a list
+
+    This is the same as ``list(iflatten_instance(l, skip_flattening))``
+    without the overhead of resuming a generator for every item.
+
+    :param skip_flattening: list of classes to not descend through
+    :return: list of items that cannot be flattened (or are skipped due to
+        being a instance of ``skip_flattening``)
+    """
+    if isinstance(l, skip_flattening):
+        return [l]
+    flattened = []
+    append = flattened.append
+    iters = [iter(l)]
+    while iters:
+        for x in iters[-1]:
+            if (hasattr(x, '__iter__') and not (
+                    isinstance(x, skip_flattening) or (
+                        isinstance(x, (str, bytes)) and len(x) == 1))):
+                iters.append(iter(x))
+                break
+            append(x)
+        else:
+            iters.pop()
+    return flattened
+
+
+def _tokenize(s, sep):
+    if isinstance(s, bytes):
+        s = s.decode()
+    if sep is None:
+        return s.split()
+    return [x for x in s.split(sep) if x]
+
+
+def _apply(l, func):
+    if func is None:
+        return tuple(l)
+    return tuple(x for x in map(func, l) if x is not None)
+
+
+def native_split_negations_string(s, func=None, sep=None):
+    """Split a delimited string into interned negative and positive elements.
+
+    See :py:func:`split_negations_string`.
+    """
+    neg, pos = [], []
+    for token in _tokenize(s, sep):
+        if token[0] == '-':
+            if len(token) == 1:
+                raise ValueError("'-' negation without a token")
+            neg.append(intern(token[1:]))
+        else:
+            pos.append(intern(token))
+    return _apply(neg, func), _apply(pos, func)
+
+
+def native_split_elements_string(s, func=None, sep=None):
+    """Split a delimited string into interned negative, neutral, and positive elements.
+
+    See :py:func:`split_elements_string`.
+    """
+    neg, neu, pos = [], [], []
+    token_map = {'-': neg, '+': pos}
+    for token in _tokenize(s, sep):
+        l = token_map.get(token[0])
+        if l is None:
+            neu.append(intern(token))
+        elif len(token) == 1:
+            raise ValueError('%r without a token' % (token,))
+        else:
+            l.append(intern(token[1:]))
+    return _apply(neg, func), _apply(neu, func), _apply(pos, func)
+
+
 try:
     # No name "readdir" in module osutils
     # pylint: disable=E0611
-    from ._sequences import iflatten_instance, iflatten_func
+    from ._sequences import (
+        iflatten_instance, iflatten_func, flatten_to_list, namedtuple_new,
+        split_negations_string as _split_negations_string,
+        split_elements_string as _split_elements_string)
     cpy_builtin = True
 except ImportError:
     cpy_builtin = False
-    cpy_iflatten_instance = cpy_iflatten_func = None
+    cpy_iflatten_instance = cpy_iflatten_func = namedtuple_new = None
     iflatten_instance = native_iflatten_instance
     iflatten_func = native_iflatten_func
+    flatten_to_list = native_flatten_to_list
+    _split_negations_string = native_split_negations_string
+    _split_elements_string = native_split_elements_string
 
 
 class ChainedLists(object):
@@ -232,6 +358,134 @@ class ChainedLists(object):
         self._lists.extend(items)
 
 
+class _SequenceView(object):
+    """Read-only view of a subset of a sequence's elements, selected via a range."""
+
+    __slots__ = ("_seq", "_range")
+
+    def __init__(self, seq, indexes):
+        self._seq = seq
+        self._range = indexes
+
+    def __len__(self):
+        return len(self._range)
+
+    def __getitem__(self, idx):
+        return self._seq[self._range[idx]]
+
+    def __iter__(self):
+        return map(self._seq.__getitem__, self._range)
+
+    def __str__(self):
+        return str(list(self))
+
+
+class IndexedChainedLists(ChainedLists):
+    """:py:class:`ChainedLists` variant maintaining offsets of the sequences.
+
+    Random access is O(log k) for k sequences via bisecting cumulative
+    lengths, len() is O(1), and slicing returns views without copying any
+    elements.  If enabled, membership tests use sets of each sequence's
+    elements, built on first use.
+
+    Note that the offsets and sets are only updated when sequences are added
+    via :py:meth:`append` and :py:meth:`extend`, the underlying sequences
+    must not be modified after being added.
+
+    >>> from snakeoil.sequences import IndexedChainedLists
+    >>> cl = IndexedChainedLists([0, 1, 2, 3], [4, 5, 6])
+    >>> print(cl[4])
+    4
+    >>> print(list(cl[2:5]))
+    [2, 3, 4]
+    """
+    __slots__ = ("_offsets", "_hashed", "_sets")
+
+    def __init__(self, *lists, hashed=False):
+        """
+        :param hashed: use sets of elements for membership tests, all
+            elements must be hashable for this to be effective
+        """
+        super().__init__(*lists)
+        self._offsets = []
+        self._hashed = hashed
+        self._sets = []
+        self._add_offsets(self._lists)
+
+    def _add_offsets(self, lists):
+        total = self._offsets[-1] if self._offsets else 0
+        for l in lists:
+            total += len(l)
+            self._offsets.append(total)
+            self._sets.append(None)
+
+    def __len__(self):
+        return self._offsets[-1] if self._offsets else 0
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return self._slice(idx)
+        if idx < 0:
+            idx += len(self)
+            if idx < 0:
+                raise IndexError
+        i = bisect_right(self._offsets, idx)
+        if i == len(self._offsets):
+            raise IndexError
+        if i:
+            idx -= self._offsets[i - 1]
+        return self._lists[i][idx]
+
+    def _slice(self, slc):
+        indexes = range(len(self))[slc]
+        if indexes.step != 1:
+            return self.__class__(_SequenceView(self, indexes), hashed=self._hashed)
+        # contiguous slices reference the overlapping parts of each sequence
+        views = []
+        start, stop = indexes.start, indexes.stop
+        i = bisect_right(self._offsets, start)
+        while start < stop:
+            offset = self._offsets[i - 1] if i else 0
+            end = min(stop, self._offsets[i])
+            if end > start:
+                views.append(_SequenceView(self._lists[i], range(start - offset, end - offset)))
+            start = end
+            i += 1
+        return self.__class__(*views, hashed=self._hashed)
+
+    def __contains__(self, obj):
+        if not self._hashed:
+            return any(obj in l for l in self._lists)
+        for i, l in enumerate(self._lists):
+            elements = self._sets[i]
+            if elements is None:
+                try:
+                    elements = frozenset(l)
+                except TypeError:
+                    # unhashable elements, fallback to scanning the sequence
+                    elements = l
+                self._sets[i] = elements
+            try:
+                if obj in elements:
+                    return True
+            except TypeError:
+                # unhashable object
+                if obj in l:
+                    return True
+        return False
+
+    @steal_docs(list)
+    def append(self, item):
+        super().append(item)
+        self._add_offsets([item])
+
+    @steal_docs(list)
+    def extend(self, items):
+        items = list(items)
+        super().extend(items)
+        self._add_offsets(items)
+
+
 def predicate_split(func, stream, key=None):
     """
     Given a stream and a function, split the stream into two sequences based on
@@ -270,13 +524,36 @@ def predicate_split(func, stream, key=None):
     return false_l, true_l
 
 
+try:
+    # C field accessors, as used by collections.namedtuple
+    from _collections import _tuplegetter
+except ImportError:
+    def _tuplegetter(index, doc):
+        return property(itemgetter(index), doc=doc)
+
+_tuple_new = tuple.__new__
+
+
 class base_namedtuple(tuple):
 
     __slots__ = ()
     _fields = ()
 
-    def __new__(cls, *values):
-        return super(base_namedtuple, cls).__new__(cls, values)
+    if namedtuple_new is not None:
+        __new__ = staticmethod(namedtuple_new)
+    else:
+        def __new__(cls, *values):
+            return _tuple_new(cls, values)
+
+    @classmethod
+    def _make(cls, iterable):
+        """Create an instance from an iterable of field values."""
+        return _tuple_new(cls, iterable)
+
+    @classmethod
+    def _make_many(cls, rows):
+        """Create a list of instances from an iterable of field value iterables."""
+        return list(map(partial(_tuple_new, cls), rows))
 
 
 def namedtuple(typename, field_names):
@@ -292,7 +569,7 @@ def namedtuple(typename, field_names):
         __slots__ = ()
         _fields = tuple(field_names)
 
-        locals().update((k, property(itemgetter(idx)))
+        locals().update((k, _tuplegetter(idx, None))
                         for idx, k in enumerate(field_names))
 
     kls.__name__ = typename
@@ -348,3 +625,50 @@ def split_elements(iterable, func=str):
         if obj is not None:
             l.append(obj)
     return tuple(neg), tuple(neu), tuple(pos)
+
+
+# metadata strings are highly repetitive, so memoize split results
+_split_negations_string_cached = lru_cache(maxsize=4096)(_split_negations_string)
+_split_elements_string_cached = lru_cache(maxsize=4096)(_split_elements_string)
+
+
+def split_negations_string(s, func=None, sep=None, memoize=True):
+    """Split a delimited string into negative and positive elements.
+
+    Batch version of :py:func:`split_negations` for whole strings; tokens
+    are interned before being passed to ``func``.
+
+    Args:
+        s: string or bytes targeted for splitting
+        func: optional wrapper method to modify tokens
+        sep: token delimiter, defaulting to whitespace
+        memoize: cache results for repeated input, in which case ``func``
+            must be hashable and its results are shared between calls
+
+    Returns:
+        Tuple containing negative and positive element tuples, respectively.
+    """
+    if memoize:
+        return _split_negations_string_cached(s, func, sep)
+    return _split_negations_string(s, func, sep)
+
+
+def split_elements_string(s, func=None, sep=None, memoize=True):
+    """Split a delimited string into negative, neutral, and positive elements.
+
+    Batch version of :py:func:`split_elements` for whole strings; tokens
+    are interned before being passed to ``func``.
+
+    Args:
+        s: string or bytes targeted for splitting
+        func: optional wrapper method to modify tokens
+        sep: token delimiter, defaulting to whitespace
+        memoize: cache results for repeated input, in which case ``func``
+            must be hashable and its results are shared between calls
+
+    Returns:
+        Tuple containing negative, neutral, and positive element tuples, respectively.
+    """
+    if memoize:
+        return _split_elements_string_cached(s, func, sep)
+    return _split_elements_string(s, func, sep)
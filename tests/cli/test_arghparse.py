@@ -291,6 +291,79 @@ class TestExistentPathType(BaseArgparseOptions):
         assert namespace.path == str(tmpdir)
 
 
+class TestLazySubparsers(object):
+
+    @pytest.fixture(autouse=True)
+    def _setup(self, monkeypatch):
+        monkeypatch.setattr(arghparse, '_generate_docs', False)
+        self.parser = argparse_helpers.mangle_parser(arghparse.ArgumentParser())
+        self.subparsers = self.parser.add_subparsers()
+        self.built = []
+
+    def _factory(self, name):
+        def factory(parser):
+            self.built.append(name)
+            parser.add_argument('--%s-opt' % name, action='store_true')
+            parser.bind_main_func(lambda *args: name)
+        return factory
+
+    def test_selected_only(self):
+        for name in ('foo', 'bar'):
+            placeholder = self.subparsers.add_parser(
+                name, help='%s cmd' % name, factory=self._factory(name))
+            assert not isinstance(placeholder, argparse.ArgumentParser)
+        assert not self.built
+        assert '{foo,bar}' in self.parser.format_help()
+        assert not self.built
+
+        namespace = self.parser.parse_args(['bar', '--bar-opt'])
+        assert self.built == ['bar']
+        assert namespace.bar_opt
+        assert namespace.main_func() == 'bar'
+        assert namespace.prog.endswith(' bar')
+
+        # parsers are only constructed once
+        self.parser.parse_args(['bar'])
+        assert self.built == ['bar']
+        assert self.subparsers.get_parser('bar') is self.parser.subparsers['bar']
+
+    def test_subparsers(self):
+        self.subparsers.add_parser('foo', factory=self._factory('foo'))
+        self.subparsers.add_parser('bar', aliases=['baz'], factory=self._factory('bar'))
+        assert set(self.parser.subparsers) == {'foo', 'bar', 'baz'}
+        assert not self.built
+        parser = self.parser.subparsers['baz']
+        assert isinstance(parser, arghparse.ArgumentParser)
+        assert self.parser.subparsers['bar'] is parser
+        assert self.built == ['bar']
+
+    def test_default_subparser(self):
+        subparsers = self.parser.add_subparsers(default='foo')
+        subparsers.add_parser('foo', factory=self._factory('foo'))
+        subparsers.add_parser('bar', factory=self._factory('bar'))
+        namespace = self.parser.parse_args(['--foo-opt'])
+        assert namespace.main_func() == 'foo'
+        assert self.built == ['foo']
+
+    def test_generate_docs(self, monkeypatch):
+        # doc generation requires all parsers to be constructed upfront
+        monkeypatch.setattr(arghparse, '_generate_docs', True)
+        parser = self.subparsers.add_parser('foo', factory=self._factory('foo'))
+        assert self.built == ['foo']
+        assert isinstance(parser, arghparse.ArgumentParser)
+
+    def test_factory_path(self, monkeypatch):
+        self.subparsers.add_parser('foo', factory='snakeoil.klass.nonexistent')
+        with pytest.raises(ImportError):
+            self.parser.parse_args(['foo'])
+
+        monkeypatch.setattr(
+            arghparse, '_lazy_factory', self._factory('bar'), raising=False)
+        self.subparsers.add_parser('bar', factory='snakeoil.cli.arghparse._lazy_factory')
+        namespace = self.parser.parse_args(['bar', '--bar-opt'])
+        assert namespace.bar_opt
+
+
 class TestNamespace(object):
 
     def setup_method(self, method):
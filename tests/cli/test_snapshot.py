@@ -0,0 +1,137 @@
+# License: BSD/GPL2
+
+import os
+import sys
+import textwrap
+from io import BytesIO
+
+import pytest
+
+from snakeoil.cli import arghparse, snapshot
+from snakeoil.cli.tool import Tool
+
+
+TOOL = textwrap.dedent("""\
+    from snakeoil.cli import arghparse
+
+    argparser = arghparse.ArgumentParser(prog='snaptool', version=False)
+    argparser.add_argument('--foo', action='store_true')
+    subparsers = argparser.add_subparsers()
+    sub = subparsers.add_parser('sub', help='subcommand')
+    sub.add_argument('--bar', action='store_true')
+    other = subparsers.add_parser('other', help='other subcommand')
+
+    @argparser.bind_main_func
+    def main(options, out, err):
+        out.write('ran %s' % (options.subcommand,))
+        return 0
+    """)
+
+
+@pytest.fixture
+def tool_module(tmpdir, monkeypatch):
+    tmpdir.join('snaptool.py').write(TOOL)
+    monkeypatch.syspath_prepend(str(tmpdir))
+    monkeypatch.delitem(sys.modules, 'snaptool', raising=False)
+    yield 'snaptool'
+    sys.modules.pop('snaptool', None)
+
+
+class TestParserSnapshot(object):
+
+    def test_from_parser(self, tool_module):
+        from snaptool import argparser
+        snap = snapshot.ParserSnapshot.from_parser(argparser)
+        assert set(snap.parsers) == {(), ('sub',), ('other',)}
+        assert snap.help() == argparser.format_help()
+        assert snap.help(['sub']) == argparser.subparsers['sub'].format_help()
+        assert '--foo' in snap.parsers[()]['options']
+        assert snap.parsers[()]['subcommands'] == ['other', 'sub']
+        assert snap.parsers[('sub',)]['options'] == ['--bar', '--color', '--debug',
+            '--help', '--quiet', '--verbose', '-h', '-q', '-v']
+
+    def test_resolve(self, tool_module):
+        from snaptool import argparser
+        snap = snapshot.ParserSnapshot.from_parser(argparser)
+        assert snap.resolve([]) == ()
+        assert snap.resolve(['--foo', 'sub', '-h']) == ('sub',)
+        assert snap.resolve(['unknown', '-h']) is None
+        assert snap.resolve(['--', 'sub']) is None
+
+    def test_complete(self, tool_module):
+        from snaptool import argparser
+        snap = snapshot.ParserSnapshot.from_parser(argparser)
+        assert snap.complete([]) == ['other', 'sub']
+        assert snap.complete(['s']) == ['sub']
+        assert snap.complete(['--f']) == ['--foo']
+        assert snap.complete(['sub', '--b']) == ['--bar']
+        assert snap.complete(['bad', '']) is None
+
+    def test_save_load(self, tool_module, tmpdir):
+        from snaptool import argparser
+        source = str(tmpdir.join('snaptool.py'))
+        path = str(tmpdir.join('cache', 'snapshot.json'))
+        snapshot.ParserSnapshot.from_parser(argparser, [source]).save(path)
+        snap = snapshot.ParserSnapshot.load(path)
+        assert snap is not None
+        assert snap.help(['sub']) == argparser.subparsers['sub'].format_help()
+
+        # modified sources invalidate it
+        st = os.stat(source)
+        os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        assert snapshot.ParserSnapshot.load(path) is None
+
+        # as do corrupted or missing files
+        with open(path, 'w') as f:
+            f.write('{')
+        assert snapshot.ParserSnapshot.load(path) is None
+        assert snapshot.ParserSnapshot.load(str(tmpdir.join('nonexistent'))) is None
+
+
+class TestRun(object):
+
+    def test_help(self, tool_module, tmpdir, capsys):
+        path = str(tmpdir.join('snapshot.json'))
+        from snaptool import argparser
+        real_help = argparser.subparsers['sub'].format_help()
+
+        # snapshot is generated on the first request
+        assert snapshot.run(tool_module, args=['sub', '--help'], cache_path=path) == 0
+        assert capsys.readouterr().out == real_help
+        assert os.path.exists(path)
+
+        # served from the snapshot, without importing the tool
+        del sys.modules[tool_module]
+        assert snapshot.run(tool_module, args=['sub', '--help'], cache_path=path) == 0
+        assert capsys.readouterr().out == real_help
+        assert tool_module not in sys.modules
+
+    def test_run_tool(self, tool_module, tmpdir):
+        path = str(tmpdir.join('snapshot.json'))
+        out = BytesIO()
+        tool = lambda parser: Tool(parser, outfile=out, errfile=BytesIO())
+        assert snapshot.run(tool_module, args=['sub'], cache_path=path, tool=tool) == 0
+        assert out.getvalue() == b'ran sub\n'
+        assert not os.path.exists(path)
+
+    def test_get_snapshot(self, tool_module, tmpdir):
+        path = str(tmpdir.join('snapshot.json'))
+        snap = snapshot.get_snapshot(tool_module, cache_path=path)
+        assert str(tmpdir.join('snaptool.py')) in snap.sources
+        assert snap.complete(['o']) == ['other']
+        del sys.modules[tool_module]
+        snap = snapshot.get_snapshot(tool_module, cache_path=path)
+        assert tool_module not in sys.modules
+        assert snap.complete(['o']) == ['other']
+
+    def test_preloaded_dependencies(self, tool_module, tmpdir, monkeypatch):
+        # dependencies imported before the tool are still tracked
+        tmpdir.join('snaptool_helper.py').write('def helper():\n    pass\n')
+        tmpdir.join('snaptool.py').write(
+            'from snaptool_helper import helper\n' + TOOL)
+        monkeypatch.delitem(sys.modules, 'snaptool_helper', raising=False)
+        import snaptool_helper
+        path = str(tmpdir.join('snapshot.json'))
+        snap = snapshot.get_snapshot(tool_module, cache_path=path)
+        assert str(tmpdir.join('snaptool_helper.py')) in snap.sources
+        assert os.path.abspath(arghparse.__file__) in snap.sources
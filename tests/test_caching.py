@@ -2,12 +2,19 @@
 # License: BSD/GPL2
 
 import gc
+import inspect
+import sys
+import textwrap
+from io import StringIO
+import threading
+import time
 from types import FrameType
+import weakref
 
 import pytest
 
 from snakeoil.test import mk_cpy_loadable_testcase
-from snakeoil import caching
+from snakeoil import caching, klass
 
 
 def gen_test(WeakInstMeta):
@@ -177,6 +184,625 @@ def gen_test(WeakInstMeta):
 
 TestNativeWeakInstMeta = gen_test(caching.native_WeakInstMeta)
 
+
+def mk_caching_class(__init__, **attrs):
+    """create a caching class counting its constructor calls"""
+    def init(self, *args, **kwargs):
+        self.__class__.counter += 1
+        __init__(self, *args, **kwargs)
+    init.__signature__ = inspect.signature(__init__)
+    attrs.update(__inst_caching__=True, __init__=init, counter=0)
+    return caching.native_WeakInstMeta('caching_inst', (object,), attrs)
+
+
+class TestSingleFlight(object):
+
+    def mk_class(self, delay=0.05, fail=()):
+        failures = list(fail)
+        def __init__(self, *args):
+            time.sleep(delay)
+            if failures:
+                raise failures.pop(0)
+        return mk_caching_class(__init__)
+
+    def run_threads(self, func, count=20):
+        results = [None] * count
+        barrier = threading.Barrier(count)
+        def run(idx):
+            barrier.wait()
+            try:
+                results[idx] = func()
+            except Exception as e:
+                results[idx] = e
+        threads = [threading.Thread(target=run, args=(x,)) for x in range(count)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    def test_contention(self):
+        kls = self.mk_class()
+        results = self.run_threads(lambda: kls(1))
+        assert kls.counter == 1
+        assert all(x is results[0] for x in results)
+        assert not kls.__inst_inflight__
+
+    def test_distinct_keys(self):
+        kls = self.mk_class()
+        results = self.run_threads(lambda: kls(threading.get_ident()), count=5)
+        assert kls.counter == 5
+        assert len(set(map(id, results))) == 5
+
+    def test_failed_construction(self):
+        kls = self.mk_class(fail=[ValueError('boom')])
+        results = self.run_threads(lambda: kls(1), count=10)
+        errors = [x for x in results if isinstance(x, ValueError)]
+        instances = [x for x in results if not isinstance(x, ValueError)]
+        # the failing builder sees its error, waiters retry and share an instance
+        assert len(errors) == 1
+        assert len(instances) == 9
+        assert all(x is instances[0] for x in instances)
+        assert kls.counter == 2
+        assert not kls.__inst_inflight__
+
+    def test_reentrant(self):
+        # instantiating the same key from within its constructor must not deadlock
+        calls = []
+        class nested(object, metaclass=caching.native_WeakInstMeta):
+            __inst_caching__ = True
+            def __init__(self, arg):
+                calls.append(arg)
+                if len(calls) == 1:
+                    self.inner = nested(arg)
+
+        o = nested(1)
+        assert len(calls) == 2
+        assert o.inner is not o
+        assert nested(1) is o
+
+    def test_cross_key_cycle(self):
+        # thread A builds 1 which needs 2, while thread B builds 2 which
+        # needs 1; one of them must fall back to uncached construction.
+        barrier = threading.Barrier(2)
+        local = threading.local()
+        def __init__(self, arg):
+            if not getattr(local, 'building', False):
+                local.building = True
+                barrier.wait()
+                time.sleep(0.05)
+                self.inner = kls(3 - arg)
+        kls = mk_caching_class(__init__)
+        results = {}
+        def run(arg):
+            results[arg] = kls(arg)
+        threads = [threading.Thread(target=run, args=(x,)) for x in (1, 2)]
+        for t in threads:
+            t.daemon = True
+            t.start()
+        for t in threads:
+            t.join(5)
+        assert not any(t.is_alive() for t in threads), "deadlocked"
+        assert sorted(results) == [1, 2]
+        # the builders were reached from both sides, one of them uncached
+        assert kls.counter == 3
+        assert not kls.__inst_inflight__
+        assert not caching._flight_waits
+
+
+class TestStrongRefLRU(object):
+
+    def mk_class(self, size=2, ttl=None):
+        def __init__(self, *args, **kwargs):
+            pass
+        return mk_caching_class(
+            __init__, __inst_lru_size__=size, __inst_lru_ttl__=ttl)
+
+    def test_invalid_settings(self):
+        with pytest.raises(ValueError):
+            caching.StrongRefLRU(0)
+        with pytest.raises(ValueError):
+            caching.StrongRefLRU(1, ttl=0)
+
+    def test_disabled(self):
+        class weak_inst(object, metaclass=caching.native_WeakInstMeta):
+            __inst_caching__ = True
+        assert weak_inst.__inst_lru__ is None
+        assert weak_inst() is weak_inst()
+
+    def test_keeps_alive(self):
+        kls = self.mk_class()
+        kls(1)
+        kls(2)
+        gc.collect()
+        assert kls.counter == 2
+        kls(1)
+        kls(2)
+        assert kls.counter == 2
+        assert kls.__inst_lru__.stats() == {
+            'hits': 2, 'misses': 2, 'evictions': 0, 'size': 2}
+
+    def test_eviction(self):
+        kls = self.mk_class()
+        kls(1)
+        kls(2)
+        # refresh 1, so 2 is the least recently used entry
+        kls(1)
+        kls(3)
+        gc.collect()
+        assert ((2,), ()) not in kls.__inst_lru__
+        assert kls.__inst_lru__.evictions == 1
+        assert kls.counter == 3
+        kls(1)
+        assert kls.counter == 3
+        kls(2)
+        assert kls.counter == 4
+
+    def test_external_refs(self):
+        kls = self.mk_class(size=1)
+        o = kls(1)
+        kls(2)
+        assert kls.__inst_lru__.evictions == 1
+        # evicted from the lru, but still weakly cached
+        assert o is kls(1)
+
+    def test_ttl(self, monkeypatch):
+        now = [0]
+        monkeypatch.setattr(caching, 'monotonic', lambda: now[0])
+        kls = self.mk_class(size=10, ttl=5)
+        kls(1)
+        now[0] = 3
+        kls(2)
+        now[0] = 6
+        kls(2)
+        gc.collect()
+        assert kls.__inst_lru__.evictions == 1
+        assert len(kls.__inst_lru__) == 1
+        kls(1)
+        assert kls.counter == 3
+
+    def test_inheritance(self):
+        kls = self.mk_class(size=3, ttl=10)
+
+        class subclass(kls):
+            __inst_caching__ = True
+
+        assert subclass.__inst_lru__ is not kls.__inst_lru__
+        assert subclass.__inst_lru__.maxsize == 3
+        assert subclass.__inst_lru__.ttl == 10
+
+    def test_clear(self):
+        kls = self.mk_class()
+        kls(1)
+        kls.__inst_lru__.clear()
+        gc.collect()
+        kls(1)
+        assert kls.counter == 2
+        assert kls.__inst_lru__.misses == 2
+
+    def test_uncached(self):
+        kls = self.mk_class()
+        with pytest.warns(UserWarning):
+            kls([])
+        kls(1, disable_inst_caching=True)
+        assert kls.counter == 2
+        # uncached instantiations aren't lru lookups
+        assert kls.__inst_lru__.stats() == {
+            'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0}
+
+
+class TestNormalizedArgs(object):
+
+    key_kls = staticmethod(caching._native_signature_key)
+
+    @pytest.fixture(autouse=True)
+    def _key_kls(self, monkeypatch):
+        monkeypatch.setattr(caching, '_signature_key', self.key_kls)
+
+    def mk_class(self, init):
+        return mk_caching_class(init, __inst_normalize_args__=True)
+
+    def test_defaults(self):
+        def __init__(self, a, b=2, c=None):
+            pass
+        kls = self.mk_class(__init__)
+        o = kls(1)
+        assert o is kls(1, 2)
+        assert o is kls(1, 2, None)
+        assert o is kls(1, b=2)
+        assert o is kls(a=1, c=None, b=2)
+        assert o is not kls(1, 3)
+        assert kls(1, c=3) is kls(1, 2, 3)
+
+    def test_bad_args(self):
+        def __init__(self, a, b=2):
+            pass
+        kls = self.mk_class(__init__)
+        for args, kwargs in (
+                ((), {}),
+                ((1, 2, 3), {}),
+                ((1,), {'a': 1}),
+                ((1,), {'c': 1}),
+                ((), {'b': 1})):
+            with pytest.raises(TypeError):
+                kls(*args, **kwargs)
+
+    def test_kwonly(self):
+        def __init__(self, a, *, b, c=3):
+            pass
+        kls = self.mk_class(__init__)
+        assert kls(1, b=2) is kls(a=1, c=3, b=2)
+        assert kls(1, b=2) is not kls(1, b=2, c=4)
+        with pytest.raises(TypeError):
+            kls(1)
+
+    def test_var_args(self):
+        def __init__(self, a, *args, b=1, **kwargs):
+            pass
+        kls = self.mk_class(__init__)
+        assert kls(1) is kls(a=1, b=1)
+        assert kls(1, 2, 3) is kls(1, 2, 3, b=1)
+        assert kls(1, 2, 3) is not kls(1, 2)
+        assert kls(1, x=1, y=2) is kls(1, y=2, x=1, b=1)
+        assert kls(1, x=1) is not kls(1, x=2)
+
+    def test_inherited(self):
+        def __init__(self, a=1):
+            pass
+        kls = self.mk_class(__init__)
+
+        class subclass(kls):
+            __inst_caching__ = True
+            def __init__(self, a, b=2):
+                pass
+
+        assert subclass.__inst_key_func__ is not kls.__inst_key_func__
+        assert subclass(1) is subclass(1, b=2)
+
+    def test_disable_inst_caching(self):
+        def __init__(self, a=1):
+            pass
+        kls = self.mk_class(__init__)
+        assert kls() is not kls(disable_inst_caching=True)
+
+
+@pytest.mark.skipif(caching._signature_key is caching._native_signature_key,
+                    reason="cpython extension isn't available")
+class TestCPyNormalizedArgs(TestNormalizedArgs):
+
+    key_kls = staticmethod(caching._signature_key)
+
+
+class TestLRUCache(object):
+
+    def test_eviction(self):
+        cache = caching.LRUCache(2)
+        cache.store(1, 'a')
+        cache.store(2, 'b')
+        assert cache.lookup(1) == 'a'
+        cache.store(3, 'c')
+        assert cache.lookup(2) is None
+        assert cache.lookup(1) == 'a'
+        assert cache.lookup(3) == 'c'
+        assert cache.stats() == {'hits': 3, 'misses': 1, 'evictions': 1, 'size': 2}
+
+    def test_weigher(self):
+        cache = caching.LRUCache(10, weigher=len)
+        cache.store(1, 'a' * 4)
+        cache.store(2, 'b' * 4)
+        cache.store(3, 'c' * 4)
+        assert cache.lookup(1) is None
+        assert cache.weight == 8
+        # too large to ever be cached
+        cache.store(4, 'd' * 11)
+        assert cache.lookup(4) is None
+        assert len(cache) == 2
+        cache.store(2, 'b')
+        assert cache.weight == 5
+        # replacing a value with one too large drops the stale value
+        cache.store(2, 'b' * 11)
+        assert cache.lookup(2) is None
+        assert cache.weight == 4
+        cache.store(2, 'b')
+        cache.invalidate(3)
+        assert cache.weight == 1
+        cache.clear()
+        assert cache.weight == 0
+        assert len(cache) == 0
+
+
+class TestLFUCache(object):
+
+    def test_eviction(self):
+        cache = caching.LFUCache(2)
+        cache.store(1, 'a')
+        cache.store(2, 'b')
+        for x in range(3):
+            assert cache.lookup(1) == 'a'
+        cache.store(3, 'c')
+        assert cache.lookup(2) is None
+        assert cache.lookup(3) == 'c'
+        cache.store(4, 'd')
+        # 3 was used less than 1
+        assert cache.lookup(3) is None
+        assert cache.lookup(1) == 'a'
+        assert cache.evictions == 2
+
+    def test_ties(self):
+        cache = caching.LFUCache(2)
+        cache.store(1, 'a')
+        cache.store(2, 'b')
+        cache.store(3, 'c')
+        assert cache.lookup(1) is None
+        assert cache.lookup(2) == 'b'
+
+    def test_invalidate(self):
+        cache = caching.LFUCache(2)
+        cache.store(1, 'a')
+        cache.lookup(1)
+        cache.store(2, 'b')
+        cache.invalidate(2)
+        cache.invalidate(2)
+        assert len(cache) == 1
+        cache.store(3, 'c')
+        cache.store(4, 'd')
+        assert cache.lookup(3) is None
+        assert cache.lookup(1) == 'a'
+        cache.clear()
+        assert len(cache) == 0
+        cache.store(1, 'a')
+        assert cache.lookup(1) == 'a'
+
+
+class TestMemoize(object):
+
+    def test_it(self):
+        calls = []
+
+        @caching.memoize
+        def func(*args, **kwargs):
+            calls.append(args)
+            return len(calls)
+
+        assert func(1) == func(1) == 1
+        assert func(1, a=1) == func(1, a=1) == 2
+        assert func(1, ('a', 1)) == 3
+        assert func.cache_stats() == {'hits': 2, 'misses': 3, 'evictions': 0, 'size': 3}
+        func.cache_invalidate(1)
+        assert func(1) == 4
+        func.cache_clear()
+        assert func(1, a=1) == 5
+        # unhashable args aren't cached
+        assert func([]) == 6
+        assert func([]) == 7
+
+    def test_bad_args(self):
+        with pytest.raises(ValueError):
+            caching.memoize(len, policy='foo')
+        with pytest.raises(ValueError):
+            caching.memoize(len, policy='lfu', weigher=len)
+
+    def test_policies(self):
+        for policy in ('lru', 'lfu'):
+            calls = []
+
+            @caching.memoize(maxsize=1, policy=policy)
+            def func(x):
+                calls.append(x)
+                return x
+            func(1)
+            func(2)
+            func(1)
+            assert calls == [1, 2, 1]
+
+    def test_key(self):
+        calls = []
+
+        @caching.memoize(key=lambda x, ignored=None: x)
+        def func(x, ignored=None):
+            calls.append(x)
+            return x
+        func(1)
+        func(1, ignored=2)
+        assert calls == [1]
+        func.cache_invalidate(1, ignored=3)
+        func(1)
+        assert calls == [1, 1]
+
+    def test_slotted_immutable_method(self):
+        class kls(object, metaclass=klass.immutable_instance):
+            __slots__ = ('x',)
+            calls = []
+
+            def __init__(self, x):
+                object.__setattr__(self, 'x', x)
+
+            @caching.memoize_method(weak_keys=False)
+            def double(self):
+                self.calls.append(self)
+                return self.x * 2
+
+        o1, o2 = kls(1), kls(2)
+        assert o1.double() == o1.double() == 2
+        assert o2.double() == 4
+        assert kls.calls == [o1, o2]
+
+    def test_weak_keys(self):
+        class kls(object):
+            calls = 0
+
+            @caching.memoize_method(maxsize=1)
+            def method(self, x):
+                kls.calls += 1
+                return x
+
+        o1, o2 = kls(), kls()
+        o1.method(1)
+        o2.method(1)
+        o1.method(1)
+        # per instance caches
+        assert kls.calls == 2
+        assert kls.method.cache_stats()['size'] == 2
+        kls.method.cache_invalidate(o1, 1)
+        o1.method(1)
+        assert kls.calls == 3
+        del o1
+        gc.collect()
+        assert kls.method.cache_stats()['size'] == 1
+        kls.method.cache_clear()
+        assert kls.method.cache_stats()['size'] == 0
+
+    def test_weak_keys_unreferenceable(self):
+        class slotted(object):
+            __slots__ = ('x',)
+            calls = []
+
+            def __init__(self, x):
+                self.x = x
+
+            @caching.memoize_method
+            def method(self):
+                self.calls.append(self)
+                return self.x
+
+        o1, o2 = slotted(1), slotted(2)
+        assert o1.method() == o1.method() == 1
+        assert o2.method() == o2.method() == 2
+        assert slotted.calls == [o1, o2]
+        assert slotted.method.cache_stats()['size'] == 2
+        slotted.method.cache_invalidate(o1)
+        assert o1.method() == 1
+        assert slotted.calls == [o1, o2, o1]
+
+    def test_weak_keys_no_args(self):
+        calls = []
+
+        @caching.memoize(weak_keys=True)
+        def func(**kw):
+            calls.append(kw)
+            return len(calls)
+
+        assert func() == func() == 1
+        assert func(a=1) == func(a=1) == 2
+        func.cache_invalidate()
+        assert func() == 3
+
+
+class TestStats(object):
+
+    @pytest.fixture(autouse=True)
+    def _stats(self):
+        caching.reset_stats()
+        yield
+        caching.disable_stats()
+        caching.reset_stats()
+
+    def test_inst_stats(self):
+        class weak_inst(object, metaclass=caching.native_WeakInstMeta):
+            __inst_caching__ = True
+            def __init__(self, *args):
+                pass
+
+        # disabled by default
+        o = weak_inst(1)
+        assert o is weak_inst(1)
+        stats = caching.get_stats()['classes']
+        name = '%s.%s' % (__name__, weak_inst.__qualname__)
+        size = lambda x: sys.getsizeof(x) + sys.getsizeof(x.__dict__)
+        assert stats[name] == {
+            'hits': 0, 'misses': 0, 'unhashable': 0, 'live': 1, 'memory': size(o)}
+
+        caching.enable_stats()
+        assert o is weak_inst(1)
+        o2 = weak_inst(2)
+        with pytest.warns(UserWarning):
+            weak_inst([])
+        assert caching.get_stats()['classes'][name] == {
+            'hits': 1, 'misses': 1, 'unhashable': 1, 'live': 2,
+            'memory': size(o) + size(o2)}
+
+        # collected data is kept, but no longer updated
+        caching.disable_stats()
+        assert o is weak_inst(1)
+        assert caching.get_stats()['classes'][name]['hits'] == 1
+        del o, o2
+        gc.collect()
+        assert caching.get_stats()['classes'][name]['live'] == 0
+
+    def test_classes_created_while_enabled(self):
+        caching.enable_stats()
+
+        class weak_inst(object, metaclass=caching.native_WeakInstMeta):
+            __inst_caching__ = True
+
+        o = weak_inst()
+        assert o is weak_inst()
+        name = '%s.%s' % (__name__, weak_inst.__qualname__)
+        assert caching.get_stats()['classes'][name]['hits'] == 1
+
+    def test_dump_stats(self):
+        class weak_inst(object, metaclass=caching.native_WeakInstMeta):
+            __inst_caching__ = True
+
+        caching.enable_stats()
+        o = weak_inst()
+        assert o is weak_inst()
+        out = StringIO()
+        caching.dump_stats(out)
+        lines = out.getvalue().splitlines()
+        assert lines[0] == 'instance caching:'
+        line = [x for x in lines if x.endswith(weak_inst.__qualname__)][0]
+        size = sys.getsizeof(o) + sys.getsizeof(o.__dict__)
+        assert line.split()[:6] == ['1', '1', '1', str(size), '0', '50.0%']
+        assert 'jit attributes:' in lines
+
+    def test_registries_are_weak(self):
+        caching.enable_stats()
+
+        class weak_inst(object, metaclass=caching.native_WeakInstMeta):
+            __inst_caching__ = True
+            @klass.jit_attr
+            def attr(self):
+                return 1
+
+        assert weak_inst().attr == 1
+        assert weak_inst in caching._inst_stats
+        assert weak_inst.__dict__['attr'] in caching._jit_attr_stats
+        kls_ref = weakref.ref(weak_inst)
+        attr_ref = weakref.ref(weak_inst.__dict__['attr'])
+        del weak_inst
+        gc.collect()
+        assert kls_ref() is None
+        assert attr_ref() is None
+
+    def test_main(self, tmpdir, monkeypatch):
+        argv, path = ['prog'], list(sys.path)
+        monkeypatch.setattr(sys, 'argv', argv)
+        monkeypatch.setattr(sys, 'path', path)
+        orig_path = path[:]
+        script = tmpdir.join('script.py')
+        script.write(textwrap.dedent("""\
+            import sys
+            from snakeoil.caching import WeakInstMeta
+            class script_inst(object, metaclass=WeakInstMeta):
+                __inst_caching__ = True
+            o = script_inst()
+            assert o is script_inst()
+            assert sys.argv[1:] == ['--arg']
+            sys.exit(3)
+        """))
+        out = tmpdir.join('report')
+        assert caching.main(['-o', str(out), str(script), '--arg']) == 3
+        # the target's argv and path changes don't leak out
+        assert sys.argv is argv
+        assert argv == ['prog']
+        assert sys.path is path
+        assert path == orig_path
+        lines = out.read().splitlines()
+        line = [x for x in lines if x.endswith('script_inst')][0]
+        assert line.split()[:2] == ['1', '1']
+
+
 if caching.cpy_WeakInstMeta is not None:
     Test_CPY_WeakInstMeta = gen_test(caching.cpy_WeakInstMeta)
 else:
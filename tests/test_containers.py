@@ -2,6 +2,7 @@
 # Copyright: 2010 Brian Harring <ferringb@gmail.com>
 # License: BSD/GPL2
 
+import pickle
 from itertools import chain
 
 import pytest
@@ -85,16 +86,148 @@ class TestSetMethods(object):
         assert c - s == r1
         assert s - c == r2
 
+class TestVocabulary(object):
+
+    def test_it(self):
+        vocab = containers.Vocabulary('abc')
+        assert list(vocab) == ['a', 'b', 'c']
+        assert len(vocab) == 3
+        assert vocab['c'] == 2
+        assert vocab.add('a') == 0
+        assert vocab.add('d') == 3
+        assert 'd' in vocab
+        assert 'e' not in vocab
+        with pytest.raises(KeyError):
+            vocab['e']
+
+    def test_mask(self):
+        vocab = containers.Vocabulary('abc')
+        assert vocab.mask(()) == 0
+        assert vocab.mask('ac') == 0b101
+        assert vocab.mask('ce', register=False) == 0b100
+        assert 'e' not in vocab
+        assert vocab.mask('e') == 0b1000
+        assert vocab.keys_of(0b1101) == ['a', 'c', 'e']
+        assert vocab.keys_of(0) == []
+        # large vocabularies
+        vocab = containers.Vocabulary(range(1000))
+        keys = list(range(0, 1000, 7))
+        assert vocab.keys_of(vocab.mask(keys)) == keys
+
+
+class TestBitSet(object):
+
+    def setup_method(self, method):
+        self.vocab = containers.Vocabulary('abcdef')
+
+    def kls(self, keys=(), inverted=False):
+        return containers.BitSet(keys, self.vocab, inverted=inverted)
+
+    def test_basic(self):
+        s = self.kls('ace')
+        assert 'a' in s
+        assert 'b' not in s
+        assert 'z' not in s
+        assert 'z' not in self.vocab
+        assert len(s) == 3
+        assert sorted(s) == ['a', 'c', 'e']
+        assert s == {'a', 'c', 'e'}
+        assert s != {'a'}
+        assert s == self.kls('eca')
+        assert s != self.kls('eca', inverted=True)
+        assert s
+        assert not self.kls()
+        assert s == containers.BitSet('ace')
+
+    def test_changes(self):
+        s = self.kls()
+        s.add('b')
+        s.add('z')
+        assert 'z' in self.vocab
+        assert sorted(s) == ['b', 'z']
+        s.update('ab')
+        assert sorted(s) == ['a', 'b', 'z']
+        s.remove('a')
+        with pytest.raises(KeyError):
+            s.remove('a')
+        with pytest.raises(KeyError):
+            s.remove('y')
+        s.discard('b')
+        s.discard('y')
+        assert list(s) == ['z']
+        c = s.copy()
+        c.add('a')
+        assert list(s) == ['z']
+
+    def test_inverted(self):
+        s = self.kls('ab', inverted=True)
+        assert 'a' not in s
+        assert 'c' in s
+        assert 'z' in s
+        s.add('c')
+        assert 'c' not in s
+        with pytest.raises(TypeError):
+            iter(s)
+        with pytest.raises(TypeError):
+            len(s)
+        assert ~s == self.kls('abc')
+        # matches InvertedContains
+        inverted = containers.InvertedContains('abc')
+        for key in 'abcxyz':
+            assert (key in s) == (key in inverted)
+        assert s == self.kls() & inverted | self.kls(inverted=True) & inverted
+
+    def test_algebra(self):
+        vocab = self.vocab
+        sets = {'abc': set('abc'), 'cde': set('cde'), '': set()}
+        universe = set(vocab) | {'x'}
+        def contents(s):
+            return {k for k in universe if k in s}
+        for x in sets:
+            for y in sets:
+                for x_inv in (False, True):
+                    for y_inv in (False, True):
+                        a = self.kls(x, inverted=x_inv)
+                        b = self.kls(y, inverted=y_inv)
+                        a_set = universe - sets[x] if x_inv else sets[x]
+                        b_set = universe - sets[y] if y_inv else sets[y]
+                        assert contents(a & b) == a_set & b_set
+                        assert contents(a | b) == a_set | b_set
+                        assert contents(a + b) == a_set | b_set
+                        assert contents(a - b) == a_set - b_set
+                        assert contents(a ^ b) == a_set ^ b_set
+        # operands are untouched
+        a = self.kls('abc')
+        a & self.kls('a')
+        assert sorted(a) == ['a', 'b', 'c']
+
+    def test_mixed_types(self):
+        a = self.kls('abc')
+        assert sorted(a & ['b', 'c', 'z']) == ['b', 'c']
+        assert sorted(['b', 'z'] & a) == ['b']
+        assert sorted(a | {'z'}) == ['a', 'b', 'c', 'z']
+        assert sorted({'a', 'q'} - a) == ['q']
+        assert sorted(a - containers.InvertedContains('ab')) == ['a', 'b']
+        other = containers.BitSet('bq')
+        assert sorted(a & other) == ['b']
+        assert a != other
+        assert containers.BitSet('ab') == self.kls('ba')
+        with pytest.raises(TypeError):
+            a & containers.BitSet('b', inverted=True)
+
+
 class TestLimitedChangeSet(object):
 
+    kls = containers.LimitedChangeSet
+
     def setup_method(self, method):
-        self.set = containers.LimitedChangeSet(range(12))
+        self.set = self.kls(range(12))
 
     def test_validator(self):
         def f(val):
             assert isinstance(val, int)
             return val
-        self.set = containers.LimitedChangeSet(range(12), key_validator=f)
+        self.set = self.kls(range(12), key_validator=f)
         self.set.add(13)
         self.set.add(14)
         self.set.remove(11)
@@ -192,6 +325,13 @@ class TestLimitedChangeSet(object):
         self.set.commit()
         assert sorted(list(self.set)) == list(range(-1, 13))
 
+    def test_unchanged_rollback(self):
+        self.set.add(0)
+        self.set.remove(12)
+        assert 2 == self.set.changes_count()
+        self.set.rollback()
+        self.test_basic()
+
     def test_str(self):
         assert str(containers.LimitedChangeSet([7])) == 'LimitedChangeSet([7])'
 
@@ -203,6 +343,56 @@ class TestLimitedChangeSet(object):
         assert containers.LimitedChangeSet([]) != object()
 
 
+class TestCheckpointedChangeSet(TestLimitedChangeSet):
+
+    kls = containers.CheckpointedChangeSet
+
+    def test_checkpoints(self):
+        assert self.set.checkpoint('start') == 0
+        self.set.add(12)
+        self.set.remove(0)
+        assert self.set.checkpoint('a') == 2
+        self.set.add(13)
+        assert self.set.checkpoint('b') == 3
+        self.set.remove(1)
+        self.set.rollback('b')
+        assert sorted(self.set) == list(range(1, 14))
+        self.set.rollback('a')
+        assert sorted(self.set) == list(range(1, 13))
+        # later checkpoints are discarded
+        with pytest.raises(KeyError):
+            self.set.rollback('b')
+        # changes are allowed again after being rolled back
+        self.set.add(13)
+        self.set.remove(1)
+        self.set.rollback('start')
+        self.test_basic()
+        # commits discard all checkpoints
+        self.set.commit()
+        with pytest.raises(KeyError):
+            self.set.rollback('start')
+
+    def test_committed(self):
+        committed = self.set.committed
+        for i in range(50):
+            self.set.add(i + 12)
+            self.set.remove(i)
+            self.set.commit()
+            assert sorted(self.set.committed) == list(range(i + 1, i + 13))
+        assert 50 in self.set.committed
+        assert 49 not in self.set.committed
+        assert 12 == len(self.set.committed)
+        assert self.set.committed.depth <= self.kls.max_depth
+        # old committed states are unaffected
+        assert sorted(committed) == list(range(12))
+        # as are committed states by uncommitted changes
+        self.set.remove(50)
+        assert 50 in self.set.committed
+        self.set.rollback()
+        self.set.commit()
+        assert 50 in self.set.committed
+
+
 class TestLimitedChangeSetWithBlacklist(object):
 
     def setup_method(self, method):
@@ -290,3 +480,94 @@ class TestRefCountingSet(object):
         c = self.kls([1, 2, 3, 1])
         assert c[2] == 1
         assert c[1] == 2
+
+    def test_update(self):
+        c = self.kls([1])
+        c.update(self.kls([1, 1, 2]))
+        assert c == {1: 2, 2: 1}
+
+    def test_update_many(self):
+        c = self.kls()
+        c.update_many(x % 3 for x in range(10))
+        assert c == {0: 4, 1: 3, 2: 3}
+        c.update_many({0: 2, 5: 1, 6: 0})
+        assert c == {0: 6, 1: 3, 2: 3, 5: 1}
+        with pytest.raises(ValueError):
+            c.update_many({7: -1})
+        assert 7 not in c
+
+    def test_remove_many(self):
+        c = self.kls([1, 1, 2, 3])
+        c.remove_many([1, 2])
+        assert c == {1: 1, 3: 1}
+        c.remove_many({1: 1, 3: 0})
+        assert c == {3: 1}
+        # all or nothing
+        c.update_many([1, 2])
+        for items in ([3, 2, 3], {1: 1, 4: 1}):
+            with pytest.raises(KeyError):
+                c.remove_many(items)
+            assert c == {1: 1, 2: 1, 3: 1}
+        with pytest.raises(TypeError):
+            c.remove_many([[]])
+
+    def test_algebra(self):
+        c1 = self.kls([1, 1, 2])
+        c2 = self.kls([1, 2, 2, 3])
+        for result, expected in (
+                (c1 + c2, {1: 3, 2: 3, 3: 1}),
+                (c1 - c2, {1: 1}),
+                (c2 - c1, {2: 1, 3: 1}),
+                (c1 | c2, {1: 2, 2: 2, 3: 1}),
+                (c1 & c2, {1: 1, 2: 1}),
+                (c1 + [4], {1: 2, 2: 1, 4: 1}),
+                ({2, 4} | c1, {1: 2, 2: 1, 4: 1}),
+                ({2, 4} & c1, {2: 1}),
+                ):
+            assert isinstance(result, self.kls)
+            assert result == expected
+        # operands are untouched
+        assert c1 == {1: 2, 2: 1}
+        assert c2 == {1: 1, 2: 2, 3: 1}
+        alias = c1
+        c1 |= c2
+        assert c1 is alias
+        assert alias == {1: 2, 2: 2, 3: 1}
+        c1 |= {4: 1}
+        assert c1 is alias
+        assert alias == {1: 2, 2: 2, 3: 1, 4: 1}
+
+    def test_copy(self):
+        c = self.kls([1, 1])
+        copy = c.copy()
+        assert isinstance(copy, self.kls)
+        copy.add(1)
+        assert c == {1: 2}
+        assert pickle.loads(pickle.dumps(c)) == c
+
+    def test_snapshot(self):
+        c = self.kls([1, 1, 2, 3])
+        snapshot = c.snapshot()
+        with pytest.raises(TypeError):
+            snapshot[1] = 3
+        c.remove_many([1, 2])
+        c.update_many([3, 4])
+        assert snapshot == {1: 2, 2: 1, 3: 1}
+        added, removed = c.diff(snapshot)
+        assert added == {3: 1, 4: 1}
+        assert removed == {1: 1, 2: 1}
+        assert c.diff(c.snapshot()) == ({}, {})
+        assert c.diff([1, 5]) == ({3: 2, 4: 1}, {5: 1})
+
+
+class NativeRefCountingSet(containers.RefCountingSet):
+
+    add = containers._native_RefCountingSetBase.add
+    remove = containers._native_RefCountingSetBase.remove
+    update_many = containers._native_RefCountingSetBase.update_many
+    remove_many = containers._native_RefCountingSetBase.remove_many
+
+
+class TestNativeRefCountingSet(TestRefCountingSet):
+
+    kls = NativeRefCountingSet
@@ -2,7 +2,11 @@
 # Copyright: 2007 Marien Zwart <marienz@gentoo.org>
 # License: BSD/GPL2
 
+import io
+import os
 import sre_constants
+import subprocess
+import sys
 
 import pytest
 
@@ -130,3 +134,127 @@ class TestDemandCompileRegexp(object):
         obj = scope['foo']
         with pytest.raises(sre_constants.error):
             getattr(obj, 'pattern')
+
+
+class TestLazyLoaderDemandload(object):
+
+    @reset_globals
+    def test_loaded_targets(self):
+        scope = {}
+        demandload.lazyloader_demandload(
+            'snakeoil:demandload', 'sys', 'os:path@ospath', scope=scope)
+        assert scope['demandload'] is demandload
+        assert scope['sys'] is sys
+        assert scope['ospath'] is os.path
+
+    def test_lazy_module(self, tmpdir, monkeypatch):
+        tmpdir.join('lazy_target.py').write(
+            'import sys\nloaded = True\nsys.lazy_target_loaded = True\n')
+        pkg = tmpdir.mkdir('lazy_pkg')
+        pkg.join('__init__.py').write('')
+        pkg.join('sub.py').write('value = 1\n')
+        monkeypatch.syspath_prepend(str(tmpdir))
+        for name in ('lazy_target', 'lazy_pkg', 'lazy_pkg.sub'):
+            monkeypatch.delitem(sys.modules, name, raising=False)
+        monkeypatch.delattr(sys, 'lazy_target_loaded', raising=False)
+        import lazy_pkg
+
+        scope = {}
+        demandload.lazyloader_demandload(
+            'lazy_target:loaded', 'lazy_pkg:sub,missing', scope=scope)
+        # attributes of modules that aren't loaded fall back to placeholders
+        assert isinstance(scope['loaded'], demandload.Placeholder)
+        assert isinstance(scope['missing'], demandload.Placeholder)
+        assert not hasattr(sys, 'lazy_target_loaded')
+        assert scope['sub'] is sys.modules['lazy_pkg.sub']
+        assert lazy_pkg.sub is scope['sub']
+        assert scope['sub'].value == 1
+
+        demandload.lazyloader_demandload('lazy_target', scope=scope)
+        module = scope['lazy_target']
+        assert sys.modules['lazy_target'] is module
+        assert not hasattr(sys, 'lazy_target_loaded')
+        assert module.loaded
+        assert sys.lazy_target_loaded
+
+    def test_startup_imports(self):
+        # the lazyloader machinery shouldn't be imported until it's used
+        path = os.path.dirname(os.path.dirname(demandload.__file__))
+        code = (
+            "import sys; sys.path.insert(0, %r); import snakeoil.demandload; "
+            "print(sorted(x for x in ('importlib.util', 'importlib.machinery') "
+            "if x in sys.modules))" % (path,))
+        out = subprocess.check_output([sys.executable, '-S', '-c', code])
+        assert out.decode().strip() == '[]'
+
+
+class TestAudit(object):
+
+    @pytest.fixture(autouse=True)
+    def _audit(self):
+        orig = demandload._audit_log
+        demandload.disable_audit()
+        demandload.enable_audit()
+        yield
+        demandload._audit_log = orig
+
+    def test_records(self):
+        scope = {'__file__': 'fake.py'}
+        demandload.demandload('snakeoil:demandload', 'snakeoil:klass@unused', scope=scope)
+        placeholder = scope['demandload']
+        assert placeholder.__name__ == 'snakeoil.demandload'
+        demandload._protection_enabled = lambda: False
+        demandload._noisy_protection = lambda: False
+        try:
+            placeholder.__name__
+        finally:
+            demandload._protection_enabled = demandload._protection_enabled_enabled
+            demandload._noisy_protection = demandload._noisy_protection_enabled
+        records = {x['name']: x for x in demandload.audit_records()}
+        assert set(records) == {'demandload', 'unused'}
+        record = records['demandload']
+        assert record['file'] == 'fake.py'
+        assert record['target'] == 'snakeoil.demandload'
+        assert record['loaded']
+        assert record['load_time'] >= 0
+        assert record['complaints'] == 1
+        assert not record['early']
+        assert any('test_records' in x for x in record['stack'])
+        assert not records['unused']['loaded']
+
+    def test_early(self):
+        scope = {'__file__': __file__}
+        demandload.demand_compile_regexp('regex', 'foo', scope=scope)
+        code = compile('regex.pattern', __file__, 'exec')
+        exec(code, scope)
+        record = demandload.audit_records()[0]
+        assert record['target'] == "compile('foo',)"
+        assert record['early']
+
+    def test_report(self, tmpdir):
+        scope = {'__file__': 'fake.py'}
+        demandload.demandload('os:path@loaded', 'os:sep@unused', scope=scope)
+        scope['loaded'].__name__
+        log = str(tmpdir.join('audit.log'))
+        demandload._write_audit_log(log)
+        demandload._write_audit_log(log)
+        runs = demandload.read_audit_log(log)
+        assert len(runs) == 2
+        out = io.StringIO()
+        demandload.audit_report(runs, out)
+        lines = out.getvalue().splitlines()
+        assert lines[0] == 'demandload audit: 2 placeholders over 2 run(s)'
+        assert lines[2].endswith('fake.py: loaded (os.path) loaded 2/2')
+        assert lines[3:] == [
+            'suggested eager imports (triggered at import time or in every run):',
+            '  fake.py: loaded (os.path)',
+            'possibly unused targets (never triggered):',
+            '  fake.py: unused (os.sep)',
+        ]
+
+    def test_disabled(self):
+        demandload.disable_audit()
+        scope = {}
+        demandload.demandload('snakeoil:klass', scope=scope)
+        assert object.__getattribute__(scope['klass'], '_audit') is None
+        assert demandload.audit_records() == []
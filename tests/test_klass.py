@@ -4,11 +4,12 @@
 from functools import partial
 import math
 import re
-from time import time
+import threading
+from time import sleep, time
 
 import pytest
 
-from snakeoil import klass
+from snakeoil import caching, klass
 from snakeoil.test import mk_cpy_loadable_testcase
 
 
@@ -391,6 +392,145 @@ class Test_native_jit_attr(object):
         # pylint: disable=pointless-statement
         obj.attr
 
+    def test_generation(self):
+        generation = klass.Generation()
+        invokes = []
+
+        class cls(object):
+            @self.jit_attr_named('_attr', generation=generation)
+            def attr(self):
+                invokes.append(self)
+                return len(invokes)
+
+        o, o2 = cls(), cls()
+        assert o.attr == 1
+        assert o.attr == 1
+        assert o2.attr == 2
+        assert len(invokes) == 2
+
+        generation.bump()
+        assert o.attr == 3
+        assert o.attr == 3
+        assert o2.attr == 4
+        assert len(invokes) == 4
+
+        # dropping the stored value still forces regeneration
+        del o._attr
+        assert o.attr == 5
+
+        # unrelated generations don't invalidate
+        klass.Generation().bump()
+        assert o.attr == 5
+
+    def test_generation_ext_method(self):
+        generation = klass.Generation()
+        values = iter(range(5))
+
+        class cls(object):
+            def f(self):
+                return next(values)
+
+            attr = self.jit_attr_ext_method('f', '_attr', generation=generation)
+
+        o = cls()
+        assert o.attr == 0
+        assert o.attr == 0
+        generation.bump()
+        assert o.attr == 1
+
+    def test_generation_requires_singleton(self):
+        with pytest.raises(ValueError):
+            self.kls(lambda self: None, '_attr', use_singleton=False,
+                     generation=klass.Generation())
+
+    def _race(self, obj, attr, threads=8):
+        results = []
+        workers = [
+            threading.Thread(target=lambda: results.append(getattr(obj, attr)))
+            for x in range(threads)]
+        for t in workers:
+            t.start()
+        return workers, results
+
+    @pytest.mark.parametrize("generation", (None, klass.Generation()))
+    def test_locking(self, generation):
+        invokes = []
+        release = threading.Event()
+
+        class cls(object):
+            @self.jit_attr_named('_attr', locking=True, generation=generation)
+            def attr(self):
+                invokes.append(self)
+                release.wait(5)
+                return len(invokes)
+
+        o = cls()
+        workers, results = self._race(o, 'attr')
+        sleep(0.05)
+        release.set()
+        for t in workers:
+            t.join()
+        assert results == [1] * 8
+        assert len(invokes) == 1
+        assert o.attr == 1
+
+        if generation is not None:
+            generation.bump()
+            assert o.attr == 2
+
+    def test_locking_failure(self):
+        invokes = []
+        started = threading.Event()
+        release = threading.Event()
+
+        class cls(object):
+            @self.jit_attr_named('_attr', locking=True)
+            def attr(self):
+                invokes.append(self)
+                if len(invokes) == 1:
+                    started.set()
+                    release.wait(5)
+                    raise KeyError('attr')
+                return len(invokes)
+
+        o = cls()
+        failures = []
+
+        def leader():
+            try:
+                o.attr
+            except KeyError:
+                failures.append(None)
+
+        t = threading.Thread(target=leader)
+        t.start()
+        started.wait(5)
+        workers, results = self._race(o, 'attr', threads=2)
+        sleep(0.05)
+        release.set()
+        for x in workers + [t]:
+            x.join()
+        # waiters retry once the computing thread fails
+        assert len(failures) == 1
+        assert results == [2, 2]
+        assert len(invokes) == 2
+
+    def test_locking_reentrant(self):
+        class cls(object):
+            @self.jit_attr_named('_attr', locking=True)
+            def attr(self):
+                return self.other + 1
+
+            @self.jit_attr_named('_other', locking=True)
+            def other(self):
+                return 1
+
+        assert cls().attr == 2
+
+    def test_locking_requires_singleton(self):
+        with pytest.raises(ValueError):
+            self.kls(lambda self: None, '_attr', use_singleton=False, locking=True)
+
     def test_cached_property(self):
         l = []
         class foo(object):
@@ -433,6 +573,104 @@ class Test_cpy_jit_attr(Test_native_jit_attr):
     kls = staticmethod(klass._internal_jit_attr)
 
 
+class Test_jit_attr_stats(object):
+
+    @pytest.fixture(autouse=True)
+    def _stats(self):
+        caching.reset_stats()
+        yield
+        caching.disable_stats()
+        caching.reset_stats()
+
+    def test_it(self):
+        class cls(object):
+            @klass.jit_attr_named('_attr', kls=klass._native_internal_jit_attr)
+            def attr(self):
+                return 1
+
+            @klass.cached_property_named('prop', kls=klass._native_internal_jit_attr)
+            def prop(self):
+                return 2
+
+        o = cls()
+        assert o.attr == 1
+        assert caching.get_stats()['jit_attrs'] == {}
+
+        caching.enable_stats()
+        o = cls()
+        for x in range(3):
+            assert o.attr == 1
+            assert o.prop == 2
+        del o._attr
+        assert o.attr == 1
+        stats = caching.get_stats()['jit_attrs']
+        attr_stats = stats['%s.%s' % (__name__, cls.attr.function.__qualname__)]
+        prop_stats = stats['%s.%s' % (__name__, cls.prop.function.__qualname__)]
+        assert attr_stats['computations'] == 2
+        assert attr_stats['time'] >= 0
+        assert prop_stats['computations'] == 1
+
+        caching.disable_stats()
+        del o._attr
+        assert o.attr == 1
+        assert caching.get_stats()['jit_attrs'][
+            '%s.%s' % (__name__, cls.attr.function.__qualname__)]['computations'] == 2
+
+    def test_generation(self):
+        generation = klass.Generation()
+
+        class cls(object):
+            @klass.jit_attr_named('_attr', kls=klass._native_internal_jit_attr,
+                                  generation=generation)
+            def attr(self):
+                return 1
+
+        caching.enable_stats()
+        o = cls()
+        for x in range(3):
+            assert o.attr == 1
+        generation.bump()
+        assert o.attr == 1
+        stats = caching.get_stats()['jit_attrs']
+        attr_stats = stats['%s.%s' % (__name__, cls.attr.function.__qualname__)]
+        assert attr_stats['computations'] == 2
+        caching.disable_stats()
+        generation.bump()
+        assert o.attr == 1
+
+
+class Test_jit_attr_custom_kls(object):
+
+    class legacy_jit_attr(klass._raw_native_internal_jit_attr):
+        """custom kls predating generational and locking jit attrs"""
+
+        __slots__ = ()
+
+        def __init__(self, func, attr_name, singleton=None, use_cls_setattr=False):
+            super().__init__(func, attr_name, singleton, use_cls_setattr)
+
+    def test_it(self):
+        kls = self.legacy_jit_attr
+
+        class cls(object):
+            @klass.jit_attr_named('_named', kls=kls)
+            def named(self):
+                return 1
+
+            @partial(klass.jit_attr, kls=kls)
+            def attr(self):
+                return 2
+
+            def f(self):
+                return 3
+
+            ext = klass.jit_attr_ext_method('f', '_ext', kls=kls)
+
+        o = cls()
+        assert (o.named, o.attr, o.ext) == (1, 2, 3)
+        assert (o._named, o._attr, o._ext) == (1, 2, 3)
+
+
 class Test_aliased_attr(object):
 
     func = staticmethod(klass.alias_attr)
@@ -2,8 +2,12 @@
 # Copyright: 2006-2011 Brian Harring <ferringb@gmail.com>
 # License: BSD/GPL2
 
+import copy
+import gc
 from itertools import chain
 import operator
+import pickle
+import weakref
 
 import pytest
 
@@ -217,6 +221,63 @@ class TestProtectedDict(object):
         assert 1 not in self.dict
 
 
+class TestCopyOnWriteDict(TestProtectedDict):
+
+    def setup_method(self, method):
+        self.orig = {1: -1, 2: -2}
+        self.dict = mappings.CopyOnWriteDict(self.orig)
+
+    def test_new_blacklist(self):
+        self.dict[3] = -3
+        del self.dict[1]
+        assert self.dict.new == {3: -3}
+        assert self.dict.blacklist == {1: True}
+        assert self.orig == {1: -1, 2: -2}
+
+    def test_snapshot(self):
+        self.dict[3] = -3
+        snapshot = self.dict.snapshot()
+        assert snapshot == self.dict
+        snapshot[4] = -4
+        del snapshot[3]
+        self.dict[1] = 1
+        assert dict(self.dict) == {1: 1, 2: -2, 3: -3}
+        assert dict(snapshot) == {1: -1, 2: -2, 4: -4}
+        assert self.orig == {1: -1, 2: -2}
+
+        # forks of forks
+        fork = snapshot.snapshot()
+        fork[5] = -5
+        assert 5 not in snapshot
+        assert dict(fork) == {1: -1, 2: -2, 4: -4, 5: -5}
+
+    def test_compaction(self):
+        d = self.dict
+        snapshots = []
+        for i in range(d.max_depth * 3):
+            d[i] = i
+            snapshots.append(d.snapshot())
+        assert d._layer.depth <= d.max_depth
+        for i, snapshot in enumerate(snapshots):
+            expected = dict(self.orig)
+            expected.update((k, k) for k in range(i + 1))
+            assert dict(snapshot) == expected
+
+    def test_diff(self):
+        self.dict[3] = -3
+        base = self.dict.snapshot()
+        assert self.dict.diff(base) == set()
+        self.dict[1] = 1
+        self.dict[4] = 4
+        del base[2]
+        base[3] = -3
+        assert self.dict.diff(base) == {1, 2, 4}
+        assert base.diff(self.dict) == {1, 2, 4}
+
+        other = mappings.CopyOnWriteDict({1: 1, 3: -3, 4: 4})
+        assert self.dict.diff(other) == {2}
+
+
 class TestImmutableDict(object):
 
     def setup_method(self, method):
@@ -285,6 +346,96 @@ class TestStackedDict(object):
             sorted(list(self.orig_dict.keys()) + list(self.new_dict.keys()))
 
 
+class TestVersionedDict(object):
+
+    def test_modifications(self):
+        d = mappings.VersionedDict({1: 2})
+        istd = mappings.IndexedStackedDict(d)
+
+        def changed(func, *args):
+            istd._build_index()
+            func(*args)
+            return istd._index is None
+
+        assert not changed(d.__setitem__, 1, 3)
+        assert changed(d.__setitem__, 2, 4)
+        assert changed(d.__delitem__, 2)
+        assert changed(d.pop, 1)
+        assert not changed(d.pop, 1, None)
+        assert changed(d.setdefault, 1, 2)
+        assert not changed(d.setdefault, 1, 3)
+        assert changed(d.update, {3: 4})
+        assert changed(d.__ior__, {4: 5})
+        assert changed(d.popitem)
+        assert changed(d.clear)
+        assert d == {}
+        with pytest.raises(KeyError):
+            d.pop(1)
+
+    def test_ior(self):
+        d = mappings.VersionedDict({1: 2})
+        d |= {3: 4}
+        d |= [(5, 6)]
+        assert d == {1: 2, 3: 4, 5: 6}
+        assert isinstance(d, mappings.VersionedDict)
+
+
+class TestIndexedStackedDict(object):
+
+    @pytest.mark.parametrize('kls', (dict, mappings.VersionedDict))
+    def test_semantics(self, kls):
+        layers = [kls({1: 'a', 2: 'b'}), kls({2: 'c', 3: 'd', 0: 'e'}), kls({4: 'f', 1: 'g'})]
+        std = mappings.StackedDict(*layers)
+        istd = mappings.IndexedStackedDict(*layers)
+
+        def check():
+            assert list(istd) == list(std)
+            assert list(istd.items()) == list(std.items())
+            assert len(istd) == len(std)
+            for key in range(6):
+                assert (key in istd) == (key in std)
+                assert istd.get(key) == std.get(key)
+            assert istd == std
+
+        check()
+        with pytest.raises(KeyError):
+            istd[5]
+        with pytest.raises(TypeError):
+            istd[1] = 2
+
+        layers[0][2] = 'h'
+        check()
+        layers[2][5] = 'i'
+        check()
+        del layers[0][1]
+        check()
+        layers[1].update({1: 'j'})
+        check()
+        layers[0].clear()
+        check()
+        layers[1].pop(2)
+        check()
+
+    def test_index(self):
+        d = mappings.VersionedDict({1: 2})
+        istd = mappings.IndexedStackedDict(d)
+        assert istd[1] == 2
+        index = istd._index
+        assert index is not None
+        # value changes don't require reindexing
+        d[1] = 3
+        assert istd._index is index
+        assert istd[1] == 3
+        d[2] = 4
+        assert istd._index is None
+        assert istd[2] == 4
+
+        # plain dicts aren't indexed
+        istd = mappings.IndexedStackedDict(d, {})
+        assert istd[2] == 4
+        assert istd._index is None
+
+
 class TestIndeterminantDict(object):
 
     def test_disabled_methods(self):
@@ -387,6 +538,94 @@ class TestFoldingDict(object):
         dct.clear()
         assert {} == dict(dct)
 
+    def test_refold(self):
+        dct = mappings.PreservingFoldingDict(
+            str.lower, [('Foo', 1), ('BAR', 2), ('baz', 3)])
+        dct.refold(str.upper)
+        assert sorted(dct.items()) == [('BAR', 2), ('Foo', 1), ('baz', 3)]
+        assert dct['FOO'] == 1
+        dct.refold(lambda x: x[:2].lower())
+        assert dct['fo'] == 1
+        # colliding keys collapse
+        assert len(dct) == 2
+        assert dct['ba'] in (2, 3)
+
+    def test_cache(self):
+        for kls in (mappings.PreservingFoldingDict, mappings.NonPreservingFoldingDict):
+            calls = []
+            def folder(key):
+                calls.append(key)
+                return key.lower()
+            dct = kls(folder, [('Foo', 1)], cache_size=10)
+            for _ in range(3):
+                assert dct['Foo'] == 1
+                assert 'Foo' in dct
+            assert calls == ['Foo']
+            # cache is private by default
+            other = kls(folder, [('Foo', 2)], cache_size=10)
+            assert calls == ['Foo', 'Foo']
+            # copies use a new cache of the same size
+            copy = dct.copy()
+            assert copy._folder is not dct._folder
+            del calls[:]
+            for _ in range(3):
+                assert copy['Foo'] == 1
+            assert len(calls) <= 1
+
+            del calls[:]
+            shared = kls(folder, [('Foo', 1)], cache_size=10, shared_cache=True)
+            other = kls(folder, [('Foo', 2)], cache_size=10, shared_cache=True)
+            assert shared['foo'] == 1
+            assert other['foo'] == 2
+            assert calls == ['Foo', 'foo']
+
+    def test_refold_cache(self):
+        mapping = {'a': 'x', 'b': 'y'}
+        dct = mappings.PreservingFoldingDict(
+            mapping.__getitem__, [('a', 1), ('b', 2)], cache_size=10)
+        assert dct['a'] == 1
+        # the folder's external data changed
+        mapping.update(a='y', b='x')
+        assert dct['a'] == 1
+        dct.refold()
+        assert dct['a'] == 1
+        assert dct._dict == {'y': ('a', 1), 'x': ('b', 2)}
+        assert sorted(dct.items()) == [('a', 1), ('b', 2)]
+
+    def test_refold_shared_cache(self):
+        mapping = {'a': 'x'}
+        folder = mapping.__getitem__
+        dct = mappings.PreservingFoldingDict(
+            folder, [('a', 1)], cache_size=10, shared_cache=True)
+        other = mappings.PreservingFoldingDict(
+            folder, [('a', 2)], cache_size=10, shared_cache=True)
+        mapping['a'] = 'y'
+        dct.refold()
+        assert dct['a'] == 1
+        # other dicts sharing the cache aren't affected by the refold
+        assert other._folder.cache_info().currsize == 1
+        assert other['a'] == 2
+        # later dicts share the refreshed cache, even once the old one is gone
+        del other
+        gc.collect()
+        new = mappings.PreservingFoldingDict(
+            folder, cache_size=10, shared_cache=True)
+        assert new._folder is dct._folder
+
+    def test_shared_cache_released(self):
+        class Folder(object):
+            def __call__(self, key):
+                return key.lower()
+
+        folder = Folder()
+        ref = weakref.ref(folder)
+        dct = mappings.PreservingFoldingDict(
+            folder, [('Foo', 1)], cache_size=10, shared_cache=True)
+        assert dct['foo'] == 1
+        del folder, dct
+        gc.collect()
+        assert ref() is None
+
 
 class Testdefaultdictkey(object):
 
@@ -482,3 +721,167 @@ class TestSlottedDict(object):
                 op(d, 'spork')
             with pytest.raises(KeyError):
                 op(d, 'foon')
+        with pytest.raises(AttributeError):
+            d['foon'] = 1
+        with pytest.raises(KeyError):
+            d.pop('spork')
+        with pytest.raises(TypeError):
+            d.pop('spork', 1, 2)
+
+    def test_mapping(self):
+        kls = self.kls(['a', 'b', 'c', 'd'])
+        assert kls is self.kls(['d', 'c', 'b', 'a'])
+        d = kls([('c', 3), ('a', 1)])
+        assert len(d) == 2
+        assert list(d) == ['a', 'c']
+        assert list(d.values()) == [1, 3]
+        assert list(d.items()) == [('a', 1), ('c', 3)]
+        assert 'a' in d and 'b' not in d and 'foon' not in d
+        assert d.get('a') == 1
+        assert d.get('b', 2) == 2
+
+        d['a'] = 4
+        d['b'] = 2
+        assert len(d) == 3
+        assert dict(d) == {'a': 4, 'b': 2, 'c': 3}
+        assert d.pop('a') == 4
+        assert d.pop('a', None) is None
+        del d['b']
+        assert len(d) == 1
+        assert d == {'c': 3}
+
+        d.update([('d', 4)])
+        assert sorted(d) == ['c', 'd']
+        d.clear()
+        assert len(d) == 0
+        assert list(d) == []
+
+    def test_copy_pickle(self):
+        kls = self.kls(['a', 'b', 'c'])
+        d = kls([('c', 3), ('a', 1)])
+        for new in (copy.copy(d), pickle.loads(pickle.dumps(d)), d.__copy__()):
+            assert new.__class__ is kls
+            assert new is not d
+            assert new == d
+            assert len(new) == 2
+            new['b'] = 2
+            assert 'b' not in d
+
+    def test_slots(self):
+        d = self.kls(['a', 'b', 'c'])([('a', 1)])
+        assert not hasattr(d, '__dict__')
+        assert d.__slots__[:3] == ('a', 'b', 'c')
+
+    def test_non_keys(self):
+        d = self.kls(['a', 'b'])([('a', 1)])
+        # bookkeeping slots and class attributes aren't keys
+        for attr in ('_SlottedDict__present', '_SlottedDict__count',
+                     '__present__', '__slot_bits__', '__class__', 'keys'):
+            assert attr not in d
+            with pytest.raises(KeyError):
+                d[attr]
+            assert d.get(attr) is None
+            assert d.pop(attr, None) is None
+        assert list(d) == ['a']
+
+        for key in ('_SlottedDict__present', '_SlottedDict__count'):
+            with pytest.raises(ValueError):
+                self.kls(['a', key])
+
+
+class TestRecordTable(object):
+
+    def test_init(self):
+        with pytest.raises(ValueError):
+            mappings.RecordTable(['a'], encoded=['b'])
+        table = mappings.RecordTable(['a', 'b'])
+        assert len(table) == 0
+        assert list(table) == []
+        assert table.keys == ('a', 'b')
+
+    @pytest.mark.parametrize('encoded', ((), ('b',), ('a', 'b')))
+    def test_append(self, encoded):
+        table = mappings.RecordTable(['a', 'b'], encoded=encoded)
+        assert table.append({'a': 1, 'b': 'x'}) == 0
+        assert table.append({'b': 'y'}) == 1
+        table.extend([{'a': 3, 'b': 'x'}, {}])
+        with pytest.raises(ValueError, match='unknown keys: c'):
+            table.append({'c': 1})
+        assert len(table) == 4
+
+        assert table.column('a') == [1, None, 3, None]
+        assert table.column('a', default=0) == [1, 0, 3, 0]
+        assert table.column('b') == ['x', 'y', 'x', None]
+        assert table.select('b', 'x') == [0, 2]
+        assert table.select('b', 'z') == []
+        assert table.select('a', None) == []
+
+        assert [dict(row) for row in table] == [
+            {'a': 1, 'b': 'x'}, {'b': 'y'}, {'a': 3, 'b': 'x'}, {}]
+
+    @pytest.mark.parametrize('encoded', ((), ('b',)))
+    def test_extend_columns(self, encoded):
+        table = mappings.RecordTable(['a', 'b', 'c'], encoded=encoded)
+        table.extend_columns({'a': range(3), 'b': iter('xyx')})
+        table.extend_columns({'c': [1]})
+        assert len(table) == 4
+        assert table.column('a') == [0, 1, 2, None]
+        assert table.column('b') == ['x', 'y', 'x', None]
+        assert table.column('c') == [None, None, None, 1]
+        with pytest.raises(ValueError):
+            table.extend_columns({'a': [1], 'b': [1, 2]})
+        with pytest.raises(ValueError, match='unknown keys: d'):
+            table.extend_columns({'d': [1]})
+        assert len(table) == 4
+
+    @pytest.mark.parametrize('encoded', (('a',), ('b',)))
+    def test_failed_additions(self, encoded):
+        # rows are added completely or not at all
+        table = mappings.RecordTable(['a', 'b'], encoded=encoded)
+        table.append({'a': 1, 'b': 2})
+        with pytest.raises(TypeError):
+            table.append({'a': [], 'b': []})
+        with pytest.raises(TypeError):
+            table.extend_columns({'a': [1, []], 'b': [2, []]})
+        assert len(table) == 1
+        assert table.column('a') == [1]
+        assert table.column('b') == [2]
+        table.append({'a': 3})
+        assert [dict(row) for row in table] == [{'a': 1, 'b': 2}, {'a': 3}]
+
+    @pytest.mark.parametrize('encoded', ((), ('a',)))
+    def test_row_view(self, encoded):
+        table = mappings.RecordTable(['a', 'b'], encoded=encoded)
+        table.append({'a': 1})
+        row = table[0]
+        assert table[-1] == row
+        with pytest.raises(IndexError):
+            table[1]
+
+        assert row['a'] == 1
+        assert 'a' in row and 'b' not in row
+        assert len(row) == 1
+        with pytest.raises(KeyError):
+            row['b']
+        with pytest.raises(KeyError):
+            row['c']
+        with pytest.raises(KeyError):
+            row['c'] = 1
+
+        row['b'] = 2
+        row['a'] = 3
+        assert dict(row) == {'a': 3, 'b': 2}
+        assert table.column('a') == [3]
+        del row['a']
+        with pytest.raises(KeyError):
+            del row['a']
+        assert list(row.items()) == [('b', 2)]
+        assert table.column('a') == [None]
+
+    def test_encoding(self):
+        table = mappings.RecordTable(['a'], encoded=['a'])
+        table.extend_columns({'a': [''.join(['fo', 'o']) for _ in range(3)]})
+        values = table.column('a')
+        assert values == ['foo'] * 3
+        # equal values are stored once
+        assert values[0] is values[1] is values[2]
@@ -1,6 +1,10 @@
 # Copyright: 2006-2011 Brian Harring <ferringb@gmail.com>
 # License: BSD/GPL2
 
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
 from snakeoil import obj
@@ -103,6 +107,96 @@ class TestDelayedInstantiation(object):
             "this is a class level attribute, thus shouldn't "
             "trigger instantiation")
 
+    def test_materialized_forwarding(self):
+        class foon(object):
+            def __init__(self):
+                self.attr = 1
+            def __len__(self):
+                return 2
+            def method(self):
+                return 3
+
+        o = make_DIkls(foon)
+        real = o.__obj__
+        assert isinstance(real, foon)
+        assert o.attr == 1
+        assert len(o) == 2
+        assert o.method() == 3
+        o.attr = 4
+        assert real.attr == 4
+        del o.attr
+        assert not hasattr(real, 'attr')
+        assert hash(o) == hash(real)
+        assert o == real
+
+    @pytest.mark.skipif(not obj._native_proxy, reason='native extension not available')
+    def test_native_proxy(self):
+        from snakeoil._obj import DelayedObjectBase, forward_method
+        assert issubclass(obj.BaseDelayedObject, DelayedObjectBase)
+        assert isinstance(obj.descriptor_overrides['__len__'], forward_method)
+        assert obj.BaseDelayedObject.__hash__.__doc__ == object.__hash__.__doc__
+
+
+class TestMaterialize(object):
+
+    def test_materialize(self):
+        barrier = threading.Barrier(3, timeout=5)
+        def f(value):
+            # would deadlock if the proxies were instantiated serially
+            barrier.wait()
+            return [value]
+
+        proxies = [make_DI(list, f, i) for i in range(3)]
+        values = obj.materialize(proxies + [proxies[0], 'foo'], max_workers=3)
+        assert values == [[0], [1], [2], [0], 'foo']
+        assert values[0] is values[3]
+        for proxy, value in zip(proxies, values):
+            assert proxy.__obj__ is value
+
+        # already instantiated proxies are passed through
+        assert obj.materialize(proxies[:1]) == [[0]]
+
+    def test_serial(self):
+        proxies = [make_DI(list, lambda i=i: [i]) for i in range(3)]
+        assert obj.materialize(proxies, max_workers=1) == [[0], [1], [2]]
+        assert obj.materialize([]) == []
+
+    def test_default_workers(self, monkeypatch):
+        workers = []
+        def record(max_workers):
+            workers.append(max_workers)
+            return ThreadPoolExecutor(max_workers=max_workers)
+        monkeypatch.setattr(obj, 'ThreadPoolExecutor', record)
+
+        proxies = [make_DI(list, lambda i=i: [i]) for i in range(3)]
+        assert obj.materialize(proxies) == [[0], [1], [2]]
+        # capped by the number of proxies needing instantiation
+        assert workers == [min(3, (os.cpu_count() or 1) * 5)]
+
+    def test_exceptions(self):
+        l = []
+        def f(value):
+            l.append(value)
+            if value in (1, 2):
+                raise ValueError(value)
+            return [value]
+
+        proxies = [make_DI(list, f, i) for i in range(4)]
+        with pytest.raises(ValueError) as excinfo:
+            obj.materialize(proxies)
+        assert excinfo.value.args == (1,)
+        assert sorted(l) == [0, 1, 2, 3]
+
+        values = obj.materialize(proxies, return_exceptions=True)
+        assert values[0] == [0]
+        assert isinstance(values[1], ValueError) and values[1].args == (1,)
+        assert isinstance(values[2], ValueError) and values[2].args == (2,)
+        assert values[3] == [3]
+        # failed proxies are retried
+        assert sorted(l) == [0, 1, 1, 2, 2, 3]
+        with pytest.raises(ValueError):
+            len(proxies[1])
+
 
 class TestPopattr(object):
 
@@ -2,6 +2,7 @@
 # Copyright: 2005 Marien Zwart <marienz@gentoo.org>
 # License: GPL2/BSD 3 clause
 
+import sys
 from collections import OrderedDict
 from itertools import chain
 from operator import itemgetter
@@ -9,7 +10,9 @@ from operator import itemgetter
 import pytest
 
 from snakeoil import sequences
-from snakeoil.sequences import namedtuple, split_negations, split_elements
+from snakeoil.sequences import (
+    namedtuple, split_negations, split_elements,
+    split_negations_string, split_elements_string)
 from snakeoil.test import mk_cpy_loadable_testcase
 
 
@@ -40,6 +43,37 @@ class TestStableUnique(object):
         l = [1, 2, 3, o, UnhashableComplex(), 4, 3, UnhashableComplex()]
         assert list(sequences.iter_stable_unique(l)) == [1, 2, 3, o, 4]
 
+    def test_stable_unique_unhashable(self):
+        func = sequences.stable_unique
+        # sortable
+        assert func([[1, 3], [1, 2], [1, 3], [0], [1, 2]]) == [[1, 3], [1, 2], [0]]
+        assert func(iter([[2], [1], [2]])) == [[2], [1]]
+        # unsortable
+        o = UnhashableComplex()
+        l = [1, 2, 3, o, UnhashableComplex(), 4, 3, UnhashableComplex()]
+        assert func(l) == [1, 2, 3, o, 4]
+        # partially ordered, duplicates aren't adjacent after sorting
+        assert func([{1}, {2}, {1}, {2}]) == [{1}, {2}]
+        assert sorted(sequences.unstable_unique(
+            [{1}, {2}, {1}, {2}]), key=min) == [{1}, {2}]
+
+    def test_stable_unique_colliding_hashes(self):
+        class collider(object):
+            def __init__(self, val):
+                self.val = val
+
+            def __hash__(self):
+                return 1
+
+            def __eq__(self, other):
+                return self.val == other.val
+
+        items = [collider(x) for x in reversed(range(200))]
+        items.extend(collider(x) for x in range(0, 200, 3))
+        result = sequences.stable_unique(items)
+        assert [x.val for x in result] == list(reversed(range(200)))
+        assert all(x is y for x, y in zip(result, items))
+
     def _generator(self):
         for x in range(5, -1, -1):
             yield x
@@ -108,6 +142,59 @@ class TestChainedLists(object):
         assert len(cl) == 150
 
 
+class TestIndexedChainedLists(TestChainedLists):
+
+    @staticmethod
+    def gen_cl(hashed=False):
+        return sequences.IndexedChainedLists(
+            list(range(3)),
+            [],
+            list(range(3, 6)),
+            list(range(6, 100)),
+            hashed=hashed,
+        )
+
+    def test_getitem_values(self):
+        cl = self.gen_cl()
+        assert [cl[x] for x in range(100)] == list(range(100))
+        assert [cl[x] for x in range(-100, 0)] == list(range(100))
+        cl.append([100])
+        cl.extend(iter([[], [101, 102]]))
+        assert len(cl) == 103
+        assert cl[102] == 102
+        assert cl[100] == 100
+
+    @pytest.mark.parametrize('hashed', (False, True))
+    def test_contains_values(self, hashed):
+        cl = self.gen_cl(hashed)
+        for x in range(100):
+            assert x in cl
+        assert 100 not in cl
+        assert [] not in cl
+        cl.append([[1], 100])
+        assert [1] in cl
+        assert 100 in cl
+
+    def test_slice(self):
+        cl = self.gen_cl()
+        expected = list(range(100))
+        for slc in (slice(None), slice(1, 5), slice(2, 50), slice(5, 5), slice(-10, None),
+                    slice(None, None, 2), slice(90, 3, -3), slice(200, 300)):
+            view = cl[slc]
+            assert isinstance(view, sequences.IndexedChainedLists)
+            assert list(view) == expected[slc]
+            assert len(view) == len(expected[slc])
+            assert [view[i] for i in range(len(view))] == expected[slc]
+        # slices of slices
+        assert list(cl[2:50][1:10:2]) == expected[2:50][1:10:2]
+        # no copying
+        l = [1, 2, 3]
+        cl = sequences.IndexedChainedLists(l)
+        view = cl[1:]
+        l[1] = 4
+        assert list(view) == [4, 3]
+
+
 class Test_iflatten_instance(object):
     func = staticmethod(sequences.native_iflatten_instance)
 
@@ -196,6 +283,38 @@ class Test_CPY_iflatten_func(Test_iflatten_func):
     func = staticmethod(sequences.iflatten_func)
 
 
+class Test_flatten_to_list(object):
+    func = staticmethod(sequences.native_flatten_to_list)
+
+    def test_it(self):
+        o = OrderedDict((k, None) for k in range(10))
+        for l, correct, skip in (
+                (["asdf", ["asdf", "asdf"], 1, None],
+                 ["asdf", "asdf", "asdf", 1, None], str),
+                ([o, 1, "fds"], [o, 1, "fds"], (str, OrderedDict)),
+                ([o, 1, "fds"], list(range(10)) + [1, "fds"], str),
+                ("fds", ["fds"], str),
+                ("fds", ["f", "d", "s"], int),
+                ('', [''], str),
+                (1, [1], int),
+                ([[[1], 2], [], (3, [4, [5]])], [1, 2, 3, 4, 5], str),
+                ):
+            assert self.func(l, skip) == correct
+
+        with pytest.raises(TypeError):
+            self.func(None)
+        assert self.func((), **{}) == []
+
+    def test_matches_iflatten_instance(self):
+        l = [list(range(x)) for x in range(50)] + ["a", b"b", ("cd", [b"ef"])]
+        assert self.func(l) == list(sequences.native_iflatten_instance(l))
+
+
+@pytest.mark.skipif(not sequences.cpy_builtin, reason="cpython extension isn't available")
+class Test_CPY_flatten_to_list(Test_flatten_to_list):
+    func = staticmethod(sequences.flatten_to_list)
+
+
 class Test_predicate_split(object):
     kls = staticmethod(sequences.predicate_split)
 
@@ -252,6 +371,16 @@ class TestNamedTuple(object):
         with pytest.raises(TypeError):
             q = self.point(x=1, y=2, z=3)
 
+    def test_make(self):
+        p = self.point._make(iter([1, 2, 3]))
+        assert isinstance(p, self.point)
+        assert (p.x, p.y, p.z) == (1, 2, 3)
+        points = self.point._make_many([(1, 2, 3), [4, 5, 6], range(3)])
+        assert points == [(1, 2, 3), (4, 5, 6), (0, 1, 2)]
+        assert all(isinstance(p, self.point) for p in points)
+        assert points[1].y == 5
+        assert self.point._make_many(iter([])) == []
+
 
 class TestSplitNegations(object):
 
@@ -355,3 +484,65 @@ class TestSplitElements(object):
         seq = chain.from_iterable(seq)
         assert split_elements(seq, int) == (
             tuple(range(100)), tuple(range(100)), tuple(range(100)))
+
+
+class TestSplitNegationsString(object):
+
+    funcs = (
+        sequences.native_split_negations_string,
+        split_negations_string,
+        lambda *args: split_negations_string(*args, memoize=False),
+    )
+
+    def test_it(self):
+        for func in self.funcs:
+            assert func('') == ((), ())
+            assert func(' a -b\tc\n-d ') == (('b', 'd'), ('a', 'c'))
+            assert func(b'a -b') == (('b',), ('a',))
+            assert func('1 -2 3', int) == ((2,), (1, 3))
+            assert func('a -b c', lambda x: None if x == 'a' else x) == (('b',), ('c',))
+            assert func('a,,-b,c d', None, ',') == (('b',), ('a', 'c d'))
+            for s in ('-', 'a b - c'):
+                with pytest.raises(ValueError):
+                    func(s)
+            neg, pos = func('-%s %s' % ('a' * 3, 'b' * 3))
+            assert neg[0] is sys.intern('aaa')
+            assert pos[0] is sys.intern('bbb')
+
+    def test_matches(self):
+        s = ' '.join('-%i %i' % (x, x) for x in range(100))
+        for func in self.funcs:
+            assert func(s) == split_negations(s.split())
+
+    def test_memoize(self):
+        s = 'a -b c'
+        assert split_negations_string(s) is split_negations_string(s)
+
+
+class TestSplitElementsString(object):
+
+    funcs = (
+        sequences.native_split_elements_string,
+        split_elements_string,
+        lambda *args: split_elements_string(*args, memoize=False),
+    )
+
+    def test_it(self):
+        for func in self.funcs:
+            assert func('') == ((), (), ())
+            assert func(' a -b\t+c\n-d ') == (('b', 'd'), ('a',), ('c',))
+            assert func(b'a -b +c') == (('b',), ('a',), ('c',))
+            assert func('1 -2 +3', int) == ((2,), (1,), (3,))
+            assert func('a,,-b,+c d', None, ',') == (('b',), ('a',), ('c d',))
+            for s in ('-', '+', 'a b - c', 'a + c'):
+                with pytest.raises(ValueError):
+                    func(s)
+
+    def test_matches(self):
+        s = ' '.join('-%i %i +%i' % (x, x, x) for x in range(100))
+        for func in self.funcs:
+            assert func(s) == split_elements(s.split())
+
+    def test_memoize(self):
+        s = 'a -b +c'
+        assert split_elements_string(s) is split_elements_string(s)